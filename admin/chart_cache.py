@@ -0,0 +1,56 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from cachetools import TTLCache
+from matplotlib.figure import Figure
+
+from bot.cache import get_data_version
+from settings import CHART_CACHE_SIZE, CHART_CACHE_TTL
+
+# Размер графика в дюймах (ширина, высота)
+ChartSize = Tuple[float, float]
+
+# Готовые PNG графиков по ключу (график, версия данных, размер).
+# Записи устаревших версий вытесняются по LRU, TTL ограничивает
+# устаревание при регистрациях через бота (другой процесс)
+chart_cache = TTLCache(maxsize=CHART_CACHE_SIZE, ttl=CHART_CACHE_TTL)
+
+# Графики рисуются в одном рабочем потоке: он не блокирует цикл событий,
+# а глобальные настройки matplotlib/seaborn не меняются параллельно
+_render_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix='chart_render'
+)
+
+
+def figure_to_png(fig: Figure) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+async def get_chart_png(
+    chart_id: str,
+    size: ChartSize,
+    load_data: Callable[[], Awaitable[Any]],
+    draw: Callable[[Any, ChartSize], Figure],
+) -> Optional[bytes]:
+    """
+    PNG графика из кэша. При промахе данные загружаются из БД,
+    а график рисуется в рабочем потоке. Если данных нет,
+    возвращается None и ничего не кэшируется.
+    """
+    key = (chart_id, get_data_version(), size)
+    png = chart_cache.get(key)
+    if png is not None:
+        return png
+    data = await load_data()
+    if not data:
+        return None
+    loop = asyncio.get_running_loop()
+    png = await loop.run_in_executor(
+        _render_executor, lambda: figure_to_png(draw(data, size))
+    )
+    chart_cache[key] = png
+    return png
@@ -1,8 +1,9 @@
-import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import pandas as pd
 import seaborn as sns
 import streamlit as st
+from chart_cache import get_chart_png
+from matplotlib.figure import Figure
 from stream_db import get_user_counts_by_level
 from user_management import (fetch_all_users, fetch_registered_users,
                              incomplete_registration_stats,
@@ -10,93 +11,108 @@ from user_management import (fetch_all_users, fetch_registered_users,
 
 from bot.decorators import db_session_decorator
 
+# Размер графиков по умолчанию (в дюймах)
+CHART_SIZE = (10, 6)
+REGISTRATION_STATS_SIZE = (12, 6)
 
-@db_session_decorator
-async def render_user_level_distribution(action_option, **kwargs):
-    """
-    Отображение круговой диаграммы распределения
-    зарегистрированных пользователей по уровням.
-    """
-    session = kwargs['session']
-    users = await fetch_registered_users(session)
-    if not users:
-        st.write("Нет пользователей.")
+
+def show_chart(png, empty_message=None):
+    """Вывод готового PNG графика или сообщения об отсутствии данных."""
+    if png is None:
+        if empty_message:
+            st.write(empty_message)
         return
-    level_counts = get_user_counts_by_level(users)
-    # Получение данных для круговой диаграммы
+    st.image(png, use_column_width=True)
+
+
+def draw_user_level_distribution(level_counts, size):
     levels = list(map(str, level_counts.keys()))
     counts = list(map(int, level_counts.values()))
     # Построение круговой диаграммы
-    fig = plt.figure(figsize=(10, 6))
-    plt.pie(
+    fig = Figure(figsize=size)
+    ax = fig.subplots()
+    ax.pie(
         counts,
         labels=levels,
         autopct='%1.1f%%',
         startangle=90
     )
-    plt.title('Распределение пользователей по уровням', color='green')
-    plt.tight_layout()  # Добавляем эту строку
-    fig.set_size_inches(10, 6)  # Устанавливаем размер
-    st.pyplot(fig)
+    ax.set_title('Распределение пользователей по уровням', color='green')
+    fig.tight_layout()
+    return fig
 
 
 @db_session_decorator
-async def render_registered_users_roles_distribution_pie_chart(
-    action_option, **kwargs
-):
+async def render_user_level_distribution(action_option, **kwargs):
     """
-    Отображает распределение ролей среди зарегистрированных пользователей
-    в виде круговой диаграммы.
+    Отображение круговой диаграммы распределения
+    зарегистрированных пользователей по уровням.
     """
     session = kwargs['session']
-    users = await fetch_registered_users(session)
-    if not users:
-        st.write("Нет зарегистрированных пользователей.")
-        return
-    # Сбор статистики по ролям
-    roles_count = {}
-    for user in users:
-        role = user.role
-        roles_count[role] = roles_count.get(role, 0) + 1
+
+    async def load_data():
+        users = await fetch_registered_users(session)
+        return get_user_counts_by_level(users)
+
+    png = await get_chart_png(
+        'user_level_distribution',
+        CHART_SIZE,
+        load_data,
+        draw_user_level_distribution,
+    )
+    show_chart(png, "Нет пользователей.")
+
+
+def draw_roles_distribution(roles_count, size):
     # Преобразуем в DataFrame
     df = pd.DataFrame(
         list(roles_count.items()), columns=['Роль', 'Количество']
     )
     # Построение круговой диаграммы
-    fig = plt.figure(figsize=(10, 6))
-    plt.pie(
+    fig = Figure(figsize=size)
+    ax = fig.subplots()
+    ax.pie(
         df['Количество'],
         labels=df['Роль'],
         autopct='%1.1f%%',
         startangle=90
     )
-    plt.title('Распределение пользователей по уровням', color='green')
-    plt.tight_layout()  # Добавляем эту строку
-    fig.set_size_inches(10, 6)  # Устанавливаем размер
-    st.pyplot(fig)
+    ax.set_title('Распределение пользователей по уровням', color='green')
+    fig.tight_layout()
+    return fig
 
 
 @db_session_decorator
-async def plot_registration_status_distribution_in_users(
+async def render_registered_users_roles_distribution_pie_chart(
     action_option, **kwargs
 ):
     """
-    Отображает распределение пользователей по статусу регистрации
-    (зарегистрированные и незарегистрированные) в виде круговой диаграммы.
+    Отображает распределение ролей среди зарегистрированных пользователей
+    в виде круговой диаграммы.
     """
     session = kwargs['session']
-    users = await fetch_all_users(session)
-    if not users:
-        st.write("Нет пользователей.")
-        return
-    # Сбор статистики по статусу регистрации
-    registered_count = sum(1 for user in users if user.is_registered)
-    unregistered_count = len(users) - registered_count
-    counts = [registered_count, unregistered_count]
+
+    async def load_data():
+        users = await fetch_registered_users(session)
+        # Сбор статистики по ролям
+        roles_count = {}
+        for user in users:
+            role = user.role
+            roles_count[role] = roles_count.get(role, 0) + 1
+        return roles_count
+
+    png = await get_chart_png(
+        'roles_distribution', CHART_SIZE, load_data, draw_roles_distribution
+    )
+    show_chart(png, "Нет зарегистрированных пользователей.")
+
+
+def draw_registration_status_distribution(counts, size):
     labels = ['Зарегистрированные', 'Незарегистрированные']
     # Построение круговой диаграммы
-    fig = plt.figure(figsize=(10, 6))
-    wedges, texts, autotexts = plt.pie(
+    fig = Figure(figsize=size)
+    ax = fig.subplots()
+    wedges, texts, autotexts = ax.pie(
         counts,
         labels=labels,
         autopct='%1.1f%%',
@@ -109,31 +125,54 @@ async def plot_registration_status_distribution_in_users(
         text.set_color("black")  # Цвет для процентов
         text.set_fontsize(12)  # Размер шрифта для процентов
     # Устанавливаем стиль названия
-    plt.title(
+    ax.set_title(
         "Диаграмма 'Зарегистрированные / Незарегистрированные' пользователи",
         color='green',
         loc='center'  # Центрируем заголовок
     )
-    plt.tight_layout()  # Добавляем эту строку
-    fig.set_size_inches(10, 6)
-    # Отображение в Streamlit
-    st.pyplot(plt)
+    fig.tight_layout()
+    return fig
 
 
 @db_session_decorator
-async def plot_incomplete_registration_bar_chart(action_option, session):
-    mapping = {
-        "school21_nickname": "Ник в Школе 21.",
-        "sber_id": "Имя в СберЧате.",
-        "username": "Ник в Telegram.",
-        "team_name": "Укажи команду.",
-        "role": "Укажи роль."
-    }
-    db = session
-    stats = await incomplete_registration_stats(db)
-    if not stats:
-        st.write("Нет данных для отображения.")
-        return
+async def plot_registration_status_distribution_in_users(
+    action_option, **kwargs
+):
+    """
+    Отображает распределение пользователей по статусу регистрации
+    (зарегистрированные и незарегистрированные) в виде круговой диаграммы.
+    """
+    session = kwargs['session']
+
+    async def load_data():
+        users = await fetch_all_users(session)
+        if not users:
+            return None
+        # Сбор статистики по статусу регистрации
+        registered_count = sum(1 for user in users if user.is_registered)
+        unregistered_count = len(users) - registered_count
+        return [registered_count, unregistered_count]
+
+    png = await get_chart_png(
+        'registration_status_distribution',
+        CHART_SIZE,
+        load_data,
+        draw_registration_status_distribution,
+    )
+    show_chart(png, "Нет пользователей.")
+
+
+# Понятные названия полей, на которых прервана регистрация
+INCOMPLETE_FIELD_LABELS = {
+    "school21_nickname": "Ник в Школе 21.",
+    "sber_id": "Имя в СберЧате.",
+    "username": "Ник в Telegram.",
+    "team_name": "Укажи команду.",
+    "role": "Укажи роль."
+}
+
+
+def draw_incomplete_registration_bar_chart(stats, size):
     df = pd.DataFrame.from_dict(
         stats, orient='index', columns=['count', 'percentage']
     )
@@ -143,12 +182,14 @@ async def plot_incomplete_registration_bar_chart(action_option, session):
     df['field_value'] = df['field_value'].fillna('Не указано')
     df['field_value'] = df['field_value'].astype(str)
     df['user_friendly_label'] = (
-        df['field_value'].map(mapping).fillna(df['field_value'])
+        df['field_value'].map(INCOMPLETE_FIELD_LABELS)
+        .fillna(df['field_value'])
     )
     # Сортировка столбцов по возрастанию
     # (если добавить ascending=False - будет по убыванию)
     df = df.sort_values(by=['count'])
-    fig, ax = plt.subplots()
+    fig = Figure(figsize=size)
+    ax = fig.subplots()
     colors = []
     for count in df['count']:
         if count > 5:  # Пример: красный цвет для значений больше 5
@@ -166,27 +207,33 @@ async def plot_incomplete_registration_bar_chart(action_option, session):
     )
     # Форматирование оси Y для отображения целых чисел
     ax.yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    st.pyplot(fig)
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+    return fig
 
 
 @db_session_decorator
-async def plot_registration_stats(action_option, session):
-    """
-    Строит график конверсии регистрации пользователей.
-    """
-    db = session
-    stats = await registration_stats_by_date(db)
-    if not stats:
-        return
+async def plot_incomplete_registration_bar_chart(action_option, session):
+    png = await get_chart_png(
+        'incomplete_registration',
+        CHART_SIZE,
+        lambda: incomplete_registration_stats(session),
+        draw_incomplete_registration_bar_chart,
+    )
+    show_chart(png, "Нет данных для отображения.")
+
+
+def draw_registration_stats(stats, size):
     df = pd.DataFrame.from_dict(stats, orient='index')
     df.index = pd.to_datetime(df.index)
     df = df.sort_index()  # Сортируем по дате
     df['conversion_rate'] = df['conversion_rate'].round(2)
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig = Figure(figsize=size)
     # Используем seaborn для более красивого графика
-    sns.set_style("whitegrid")  # Устанавливаем стиль сетки
+    with sns.axes_style("whitegrid"):  # Устанавливаем стиль сетки
+        ax = fig.subplots()
     sns.lineplot(
         x=df.index,
         y='conversion_rate',
@@ -200,10 +247,24 @@ async def plot_registration_stats(action_option, session):
     ax.set_ylabel('Конверсия (%)', fontsize=18, color="red")
     ax.tick_params(axis='x', rotation=45)
     # Выравниваем метки по правому краю
-    labels = ax.get_xticklabels()
-    ax.set_xticklabels(labels, ha='right')
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
     # Добавляем сетку для лучшей читаемости
     ax.grid(True, linestyle='--', alpha=0.7)
-    plt.title('Динамика конверсии регистрации', fontsize=24, color="Green")
-    plt.tight_layout()
-    st.pyplot(fig)
+    ax.set_title('Динамика конверсии регистрации', fontsize=24, color="Green")
+    fig.tight_layout()
+    return fig
+
+
+@db_session_decorator
+async def plot_registration_stats(action_option, session):
+    """
+    Строит график конверсии регистрации пользователей.
+    """
+    png = await get_chart_png(
+        'registration_stats',
+        REGISTRATION_STATS_SIZE,
+        lambda: registration_stats_by_date(session),
+        draw_registration_stats,
+    )
+    show_chart(png)
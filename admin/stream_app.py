@@ -15,6 +15,7 @@ from user_visualization import (display_registration_time,
                                 display_status_users, handle_user_actions)
 
 from bot.decorators import db_session_decorator
+from database.models import engine
 
 # Добавляем корневую директорию проекта в PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -217,5 +218,14 @@ async def main(session):
         await display_sidebar()
 
 
+async def run():
+    """Каждый перезапуск скрипта Streamlit идет в новом цикле событий,
+    соединения пула закрываются в конце прогона."""
+    try:
+        await main()
+    finally:
+        await engine.dispose()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(run())
@@ -9,12 +9,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
-from database.models import Level, User
+from bot.cache import bump_data_version
+from bot.catalog import level_catalog, role_catalog
+from database.engine import is_busy_error, retry_on_busy
+from database.models import User
 
 # Добавляем корневую директорию проекта в PYTHONPATH
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+@retry_on_busy
 async def add_user(
     db: AsyncSession,
     telegram_id: int,
@@ -44,13 +48,16 @@ async def add_user(
         is_admin=is_admin,
         is_registered=is_registered,
         role=role,
+        role_id=await role_catalog.get_or_create(db, role),
     )
     db.add(new_user)
     await db.commit()
+    bump_data_version()
     await db.refresh(new_user)
     return new_user
 
 
+@retry_on_busy
 async def update_user(
         db: AsyncSession, user_id: int, updated_user: Dict[str, Any]
 ) -> bool:
@@ -66,12 +73,20 @@ async def update_user(
             )
             user = result.scalar()
             if user:
+                if 'role' in updated_user:
+                    updated_user = {
+                        **updated_user,
+                        'role_id': await role_catalog.get_or_create(
+                            db, updated_user['role']
+                        ),
+                    }
                 changes_made = False
                 for key, value in updated_user.items():
                     if getattr(user, key) != value:  # Проверка на изменения
                         setattr(user, key, value)
                         changes_made = True
                 if changes_made:  # Если изменения были
+                    bump_data_version()
                     return True
                 else:
                     print("Нет изменений для обновления.")
@@ -80,10 +95,14 @@ async def update_user(
                 print(f"Пользователь с ID {user_id} не найден.")
                 return False
     except SQLAlchemyError as e:
+        # Занятая БД - повод повторить запись, а не ошибка данных
+        if is_busy_error(e):
+            raise
         print(f"Ошибка при обновлении пользователя: {e}")
         return False
 
 
+@retry_on_busy
 async def delete_user_by_telegram_id(
         db: AsyncSession, telegram_id: str
 ) -> bool:
@@ -99,6 +118,7 @@ async def delete_user_by_telegram_id(
         if user:
             await db.execute(delete(User).where(User.id == user.id))
             await db.commit()
+            bump_data_version()
             return True
         else:
             return False
@@ -108,10 +128,9 @@ async def get_level_id_by_level(level: str, db: AsyncSession) -> int:
     """
     Получение идентификатора уровня по его названию.
     """
-    result = await db.execute(select(Level).filter_by(name=level))
-    level_instance = result.scalar()
-    if level_instance:
-        return level_instance.id
+    level_id = await level_catalog.resolve(db, level)
+    if level_id is not None:
+        return level_id
     else:
         raise ValueError("Уровень не найден.")
 
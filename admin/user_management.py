@@ -1,7 +1,7 @@
 
 import os
 import sys
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import streamlit as st
 from sqlalchemy import func
@@ -9,7 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
-from database.models import User
+from bot.cache import get_data_version, metrics_cache
+from database.models import RegistrationDailyStats, User
 
 # Добавляем корневую директорию проекта в PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -86,16 +87,37 @@ async def fetch_user_by_telegram_id(
     return user
 
 
+async def fetch_registration_counts(db: AsyncSession) -> Dict[str, int]:
+    """
+    Количество зарегистрированных и незавершивших регистрацию
+    пользователей одним запросом COUNT ... GROUP BY is_registered.
+    """
+    result = await db.execute(
+        select(User.is_registered, func.count())
+        .group_by(User.is_registered)
+    )
+    counts = {"registered_users": 0, "abandoned_users": 0}
+    for is_registered, count in result.all():
+        key = "registered_users" if is_registered else "abandoned_users"
+        counts[key] += count
+    return counts
+
+
 async def update_metrics(session: AsyncSession):
     """
     Асинхронная функция для обновления метрик пользователей в сессии.
-    Функция получает данные о зарегистрированных и незавершивших регистрацию
-    пользователях из базы данных и сохраняет их в `st.session_state`.
+    Функция получает количество зарегистрированных и незавершивших
+    регистрацию пользователей и сохраняет их в `st.session_state`.
+    Счетчики кэшируются до изменения данных в админ-панели
+    или до истечения METRICS_CACHE_TTL.
     """
-    registered_users = await fetch_registered_users(session)
-    abandoned_users = await fetch_unregistered_users(session)
-    st.session_state.registered_users = len(registered_users)
-    st.session_state.abandoned_users = len(abandoned_users)
+    version = get_data_version()
+    counts = metrics_cache.get("header", version)
+    if counts is None:
+        counts = await fetch_registration_counts(session)
+        metrics_cache.set("header", version, counts)
+    st.session_state.registered_users = counts["registered_users"]
+    st.session_state.abandoned_users = counts["abandoned_users"]
 
 
 async def incomplete_registration_stats(db: AsyncSession):
@@ -141,54 +163,26 @@ async def incomplete_registration_stats(db: AsyncSession):
 
 async def registration_stats_by_date(db: AsyncSession):
     """
-    Извлекает статистику регистрации пользователей по дате (без учета времени),
-    корректно считая зарегистрированных пользователей.
+    Извлекает статистику регистрации пользователей по дате (без учета времени)
+    из таблицы registration_daily_stats, которую триггеры поддерживают
+    в актуальном состоянии при каждом изменении пользователей.
     """
-    # Подзапрос для подсчета зарегистрированных пользователей на каждую дату
-    registered_users_subquery = (
-        select(
-            func.date(User.registration_date).label("registration_date"),
-            func.count().label("registered_count")
-        )
-        .where(User.is_registered)
-        .group_by(func.date(User.registration_date))
-    ).subquery()
-
-    # Основной запрос
-    stmt = (
-        select(
-            func.date(User.registration_date).label("registration_date"),
-            func.count().label("total_users"),
-            registered_users_subquery.c
-            .registered_count.label("registered_users")
-        )
-        .outerjoin(
-            registered_users_subquery,
-            func.date(User.registration_date) == registered_users_subquery.c
-            .registration_date
-        )
-        .group_by(
-            func.date(User.registration_date),
-            registered_users_subquery.c.registered_count
-        )
+    result = await db.execute(
+        select(RegistrationDailyStats).order_by(RegistrationDailyStats.date)
     )
-
-    result = await db.execute(stmt)
-    rows = result.fetchall()
+    rows = result.scalars().all()
     if not rows:
         return {}
     stats = {}
-    for registration_date, total_users, registered_users in rows:
-        unregistered_users = total_users - (registered_users or 0)
+    for row in rows:
         conversion_rate = (
-            ((registered_users or 0) / total_users) * 100
-            if total_users > 0 else 0
+            (row.registered / row.total) * 100 if row.total > 0 else 0
         )
         conversion_rate = round(conversion_rate, 2)
-        stats[registration_date] = {
-            "total_users": total_users,
-            "registered_users": registered_users or 0,
-            "unregistered_users": unregistered_users,
+        stats[row.date] = {
+            "total_users": row.total,
+            "registered_users": row.registered,
+            "unregistered_users": row.abandoned,
             "conversion_rate": conversion_rate,
         }
     return stats
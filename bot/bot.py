@@ -2,10 +2,14 @@ import logging
 import os
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.utils.callback_answer import CallbackAnswerMiddleware
 from dotenv import load_dotenv
 
+from bot.metrics import (ApiMetricsMiddleware, HandlerMetricsMiddleware,
+                         UpdateMetricsMiddleware, install_db_metrics)
+from bot.sender import InteractivePriorityMiddleware, SendSchedulerMiddleware
+from bot.storage import FSMWriteBehindMiddleware, SQLiteStorage
+from database.models import AsyncSessionLocal, engine
 from logger.logmessages import LogMessage
 
 load_dotenv(override=True, verbose=True)
@@ -14,9 +18,24 @@ bot_logger = logging.getLogger("BOT_LOGGER")
 TELEGRAM_TOKEN: str = os.getenv('TELEGRAM_TOKEN')
 
 bot = Bot(token=TELEGRAM_TOKEN)
-# Хранилище для состояний пользователей
-storage = MemoryStorage()
+# Время запросов к Bot API и к БД учитывается в метриках апдейта
+bot.session.middleware(ApiMetricsMiddleware())
+install_db_metrics(engine)
+# Отправка в чаты идет через очередь с ограничением частоты
+bot.session.middleware(SendSchedulerMiddleware())
+# Хранилище для состояний пользователей, переживает перезапуск бота
+storage = SQLiteStorage(AsyncSessionLocal)
 dp = Dispatcher(storage=storage)
+# Полное время обработки апдейта, включая запись состояния FSM
+dp.update.outer_middleware(UpdateMetricsMiddleware())
+# Ответы на апдейты идут в очереди отправки раньше массовых сообщений
+dp.update.outer_middleware(InteractivePriorityMiddleware())
+# Изменения состояния за один апдейт записываются в БД одним коммитом
+dp.update.outer_middleware(FSMWriteBehindMiddleware())
+# Метки и время обработчиков всех роутеров
+dp.message.middleware(HandlerMetricsMiddleware())
+dp.callback_query.middleware(HandlerMetricsMiddleware())
+dp.inline_query.middleware(HandlerMetricsMiddleware())
 dp.callback_query.middleware(CallbackAnswerMiddleware())
 dp.callback_query.middleware(
     CallbackAnswerMiddleware(
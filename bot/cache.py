@@ -0,0 +1,73 @@
+from typing import Any, Hashable, Optional
+
+from cachetools import TTLCache
+
+from settings import (INLINE_INDEX_TTL, INLINE_QUERY_CACHE_SIZE,
+                      KEYBOARD_CACHE_TTL, METRICS_CACHE_TTL,
+                      USER_COUNT_CACHE_SIZE, USER_COUNT_CACHE_TTL,
+                      USER_STATUS_CACHE_SIZE, USER_STATUS_CACHE_TTL)
+
+# Статусы пользователей для стартовой клавиатуры (LRU + TTL).
+# TTL ограничивает устаревание при изменениях из другого процесса
+# (админ-панель), изменения внутри процесса сбрасывают запись сразу.
+user_status_cache = TTLCache(
+    maxsize=USER_STATUS_CACHE_SIZE, ttl=USER_STATUS_CACHE_TTL
+)
+
+# Версия данных пользователей в процессе: увеличивается при каждом
+# изменении, после которого производные данные нужно пересчитать
+_data_version = 0
+
+
+class VersionedCache:
+    """
+    Кэш производных данных (клавиатуры, метрики), привязанных к версии
+    данных. Запись считается устаревшей, если версия изменилась
+    или истек TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        return None
+
+    def set(self, key: Hashable, version: int, value: Any):
+        self._cache[key] = (version, value)
+
+    def clear(self):
+        self._cache.clear()
+
+
+# Готовые клавиатуры ролей и уровней для поиска
+keyboard_cache = VersionedCache(maxsize=16, ttl=KEYBOARD_CACHE_TTL)
+
+# Результаты инлайн-поиска: запрос -> id найденных пользователей,
+# версия - номер состояния индекса
+inline_query_cache = VersionedCache(
+    maxsize=INLINE_QUERY_CACHE_SIZE, ttl=INLINE_INDEX_TTL
+)
+
+# Агрегированные метрики админ-панели
+metrics_cache = VersionedCache(maxsize=16, ttl=METRICS_CACHE_TTL)
+
+# Количество пользователей в списке поиска: (role_id, level_id) -> число
+user_count_cache = VersionedCache(
+    maxsize=USER_COUNT_CACHE_SIZE, ttl=USER_COUNT_CACHE_TTL
+)
+
+
+def invalidate_user_status(telegram_id: int):
+    user_status_cache.pop(telegram_id, None)
+
+
+def bump_data_version():
+    global _data_version
+    _data_version += 1
+
+
+def get_data_version() -> int:
+    return _data_version
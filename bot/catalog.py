@@ -0,0 +1,257 @@
+import logging
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from sqlalchemy import bindparam, distinct, func, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from database.models import Level, Role, User
+from logger.logmessages import LogMessage
+from settings import (LEVEL_CATALOG_MISS_RELOAD_INTERVAL, LEVEL_CATALOG_TTL,
+                      ROLE_BACKFILL_BATCH_SIZE, ROLE_CATALOG_TTL,
+                      ROLE_SYNONYMS)
+
+db_logger = logging.getLogger('DB_LOGGER')
+
+# Уровень по умолчанию ("Не важно")
+DEFAULT_LEVEL_ID = 1
+# Префикс callback_data кнопок ролей: "role:<id>"
+ROLE_CALLBACK_PREFIX = 'role:'
+# Значение незаполненного поля у прервавших регистрацию
+EMPTY_VALUE = 'Пусто'
+
+# Разделители слов в роли и синонимы целыми словами или фразами,
+# длинные варианты проверяются первыми
+_ROLE_SEPARATORS = re.compile(r'[\s,;/|]+')
+_ROLE_SYNONYMS = re.compile(
+    r'(?<!\w)('
+    + '|'.join(map(re.escape, sorted(ROLE_SYNONYMS, key=len, reverse=True)))
+    + r')(?!\w)'
+)
+
+
+class LevelCatalog:
+    """
+    Справочник уровней в памяти процесса.
+    Загружается один раз при старте и перечитывается после импорта
+    фикстур и шифрования БД. Хранит словари название -> id, id -> название
+    и заранее скомпилированное регулярное выражение для разбора строки
+    "уровень + роль". Процессы, которые не могут узнать об изменении
+    уровней (админ-панель), перечитывают справочник раз в LEVEL_CATALOG_TTL.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._sorted_names: List[str] = []
+        self._pattern: Optional[Pattern] = None
+        self._loaded_at: Optional[float] = None
+        # Время последнего перечитывания из-за неизвестного уровня
+        self._miss_reloaded_at: Optional[float] = None
+        # Номер загрузки справочника, для кэшей производных данных
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @property
+    def names(self) -> List[str]:
+        """Названия уровней в алфавитном порядке (порядок клавиатуры)."""
+        return list(self._sorted_names)
+
+    async def load(self, session: AsyncSession):
+        result = await session.execute(
+            select(Level.id, Level.name).order_by(Level.id)
+        )
+        levels = result.all()
+        self._ids = {name: level_id for level_id, name in levels}
+        self._names = {level_id: name for level_id, name in levels}
+        self._sorted_names = sorted(self._ids)
+        # Длинные названия проверяем первыми, чтобы уровень, являющийся
+        # префиксом другого, не перехватывал совпадение
+        alternatives = sorted(self._ids, key=len, reverse=True)
+        self._pattern = (
+            re.compile(rf"^({'|'.join(map(re.escape, alternatives))})\b")
+            if alternatives else None
+        )
+        self._loaded_at = time.monotonic()
+        self.version += 1
+        db_logger.info(LogMessage.LEVEL_CATALOG_LOADED.format(len(levels)))
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if (
+            not self.loaded
+            or time.monotonic() - self._loaded_at > LEVEL_CATALOG_TTL
+        ):
+            await self.load(session)
+
+    def id_by_name(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    async def resolve(self, session: AsyncSession, name: str) -> Optional[int]:
+        """
+        Поиск id уровня по названию. Если названия нет в справочнике,
+        он перечитывается: уровень мог появиться после загрузки.
+        Промахи перечитывают справочник не чаще чем раз
+        в LEVEL_CATALOG_MISS_RELOAD_INTERVAL.
+        """
+        await self.ensure_loaded(session)
+        if name in self._ids:
+            return self._ids[name]
+        now = time.monotonic()
+        if self._miss_reloaded_at is None or (
+            now - self._miss_reloaded_at
+            > LEVEL_CATALOG_MISS_RELOAD_INTERVAL
+        ):
+            self._miss_reloaded_at = now
+            await self.load(session)
+        return self._ids.get(name)
+
+    def name_by_id(self, level_id: int) -> Optional[str]:
+        return self._names.get(level_id)
+
+    def parse(self, input_str: str) -> Tuple[int, str]:
+        """Разбор строки "уровень + роль" на id уровня и роль."""
+        match = self._pattern.match(input_str) if self._pattern else None
+        # Уровень найден
+        if match:
+            level_name = match.group(0)
+            # Всё, что после уровня, является ролью
+            role = input_str[len(level_name):].strip()
+            return self._ids.get(level_name, 0), role
+        # Если уровень не найден, ставим "Не важно", вся строка — это роль
+        return DEFAULT_LEVEL_ID, input_str.strip()
+
+
+level_catalog = LevelCatalog()
+
+
+def normalize_role(raw: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    Нормализация роли: ключ для сравнения (регистр, ё, разделители,
+    синонимы) и название для показа (без лишних пробелов).
+    None - роль не заполнена.
+    """
+    if raw is None:
+        return None
+    name = ' '.join(raw.split()).strip(' .,;:!-')[:Role.name.type.length]
+    if not name or name.casefold() == EMPTY_VALUE.casefold():
+        return None
+    key = ' '.join(_ROLE_SEPARATORS.split(name.casefold().replace('ё', 'е')))
+    key = _ROLE_SYNONYMS.sub(lambda match: ROLE_SYNONYMS[match.group(0)], key)
+    return ' '.join(key.split())[:Role.key.type.length], name
+
+
+def parse_role_callback(data: str) -> Optional[int]:
+    """id роли из callback_data кнопки "role:<id>"."""
+    if not data.startswith(ROLE_CALLBACK_PREFIX):
+        return None
+    role_id = data[len(ROLE_CALLBACK_PREFIX):]
+    return int(role_id) if role_id.isdigit() else None
+
+
+class RoleCatalog:
+    """
+    Справочник ролей в памяти процесса: нормализованный ключ -> id.
+    Новая роль добавляется в таблицу roles при первой регистрации с ней,
+    поэтому справочник только растет. Роли, добавленные другим
+    процессом, находятся запросом к БД при промахе, полностью
+    справочник перечитывается раз в ROLE_CATALOG_TTL.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+
+    async def load(self, session: AsyncSession):
+        result = await session.execute(select(Role.key, Role.id))
+        self._ids = dict(result.all())
+        self._loaded_at = time.monotonic()
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > ROLE_CATALOG_TTL
+        ):
+            await self.load(session)
+
+    async def get_or_create(
+        self, session: AsyncSession, raw: Optional[str]
+    ) -> Optional[int]:
+        """
+        id роли для введенного пользователем текста. Новая роль
+        добавляется в транзакции вызывающего кода, коммит - за ним.
+        """
+        normalized = normalize_role(raw)
+        if normalized is None:
+            return None
+        key, name = normalized
+        await self.ensure_loaded(session)
+        role_id = self._ids.get(key)
+        if role_id is None:
+            # Роль могли добавить одновременно из другого процесса
+            result = await session.execute(
+                insert(Role).values(key=key, name=name)
+                .on_conflict_do_nothing(index_elements=[Role.key])
+            )
+            role_id = await session.scalar(
+                select(Role.id).where(Role.key == key)
+            )
+            # Добавленная сейчас роль попадет в справочник после коммита:
+            # при откате транзакции ее id не должен остаться в памяти
+            if not result.rowcount:
+                self._ids[key] = role_id
+        return role_id
+
+    async def backfill(
+        self,
+        session: AsyncSession,
+        batch_size: int = ROLE_BACKFILL_BATCH_SIZE,
+    ) -> int:
+        """
+        Проставление role_id пользователям, у которых его нет (записи
+        до появления справочника, загруженные фикстуры). Различные
+        роли нормализуются пачками, каждая пачка - одна транзакция.
+        Возвращает число обновленных пользователей.
+        """
+        result = await session.execute(
+            select(distinct(User.role)).where(
+                User.role_id.is_(None), User.role.isnot(None)
+            )
+        )
+        raw_roles = result.scalars().all()
+        missing = select(func.count()).select_from(User).where(
+            User.role_id.is_(None)
+        )
+        missing_before = await session.scalar(missing)
+        users = User.__table__
+        statement = (
+            update(users)
+            .where(
+                users.c.role == bindparam('raw_role'),
+                users.c.role_id.is_(None),
+            )
+            .values(role_id=bindparam('new_role_id'))
+        )
+        for start in range(0, len(raw_roles), batch_size):
+            params = []
+            for raw_role in raw_roles[start:start + batch_size]:
+                role_id = await self.get_or_create(session, raw_role)
+                if role_id is not None:
+                    params.append(
+                        {'raw_role': raw_role, 'new_role_id': role_id}
+                    )
+            if params:
+                await session.execute(statement, params)
+            await session.commit()
+        updated = missing_before - await session.scalar(missing)
+        if updated:
+            db_logger.info(LogMessage.ROLES_BACKFILLED.format(updated))
+        return updated
+
+
+role_catalog = RoleCatalog()
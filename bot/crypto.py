@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from bot.cache import bump_data_version
+from bot.catalog import level_catalog
+from bot.peer_index import peer_index
+from bot.validators.uniqueness import uniqueness_index
+from database.models import (AdminSettings, AsyncSessionLocal, Level, Role,
+                             User, moscow_tz)
+from logger.logmessages import LogMessage
+from settings import CRYPT_BATCH_SIZE
+
+db_logger = logging.getLogger('DB_LOGGER')
+
+# Шифруемые таблицы в порядке обработки и их шифруемые колонки
+ENCRYPTED_COLUMNS = {
+    "users": (
+        "username", "sber_id", "role", "team_name", "description",
+        "school21_nickname",
+    ),
+    "levels": ("name",),
+    "roles": ("name",),
+}
+MODELS = {"users": User, "levels": Level, "roles": Role}
+
+# Признак того, что перешифровка уже идет в этом процессе
+_running = False
+
+
+def xor_encr_decr_many(
+    texts: Sequence[Optional[str]], key: str
+) -> List[Optional[str]]:
+    """
+    XOR-шифрование пачки строк одной операцией NumPy.
+    Результат совпадает с посимвольным chr(ord(char) ^ ord(key[i % len]))
+    для каждой строки: строки раскладываются в массив кодов UTF-32,
+    ключ повторяется с начала для каждой строки. None остается None.
+    """
+    values = [text for text in texts if text is not None]
+    if not values:
+        return list(texts)
+    encoded = [
+        np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        for text in values
+    ]
+    lengths = np.array([len(codes) for codes in encoded], dtype=np.int64)
+    codes = np.concatenate(encoded)
+    key_codes = np.frombuffer(
+        key.encode('utf-32-le', 'surrogatepass'), dtype='<u4'
+    )
+    # Позиция символа внутри своей строки определяет символ ключа
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = (np.arange(codes.size) - starts) % key_codes.size
+    data = (codes ^ key_codes[positions]).astype('<u4').tobytes()
+    ends = np.cumsum(lengths) * 4
+    decoded = iter([
+        data[end - length * 4:end].decode('utf-32-le', 'surrogatepass')
+        for end, length in zip(ends.tolist(), lengths.tolist())
+    ])
+    return [None if text is None else next(decoded) for text in texts]
+
+
+def is_reencryption_running() -> bool:
+    return _running
+
+
+async def _get_settings(session: AsyncSession) -> Optional[AdminSettings]:
+    result = await session.execute(select(AdminSettings).limit(1))
+    return result.scalar()
+
+
+async def _save_progress(session: AsyncSession, settings_id: int, **values):
+    await session.execute(
+        update(AdminSettings)
+        .where(AdminSettings.id == settings_id)
+        .values(**values)
+    )
+
+
+async def _reencrypt_batch(
+    session: AsyncSession,
+    settings_id: int,
+    table: str,
+    last_id: int,
+    key: str,
+) -> Optional[int]:
+    """
+    Перешифровка пачки строк таблицы table с id больше last_id.
+    Новые значения и контрольная точка фиксируются одним коммитом,
+    поэтому после сбоя ни одна строка не будет зашифрована дважды.
+    Возвращает id последней обработанной строки или None,
+    если строк в таблице больше нет.
+    """
+    model = MODELS[table]
+    columns = ENCRYPTED_COLUMNS[table]
+    result = await session.execute(
+        select(model.id, *(getattr(model, column) for column in columns))
+        .where(model.id > last_id)
+        .order_by(model.id)
+        .limit(CRYPT_BATCH_SIZE)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    values = {
+        column: xor_encr_decr_many(
+            [getattr(row, column) for row in rows], key
+        )
+        for column in columns
+    }
+    await session.execute(
+        update(model),
+        [
+            {
+                "id": row.id,
+                **{column: values[column][number] for column in columns},
+            }
+            for number, row in enumerate(rows)
+        ],
+    )
+    await _save_progress(session, settings_id, crypt_last_id=rows[-1].id)
+    await session.commit()
+    return rows[-1].id
+
+
+async def reencrypt_database(
+    session: AsyncSession,
+    key: str,
+    updated_by: Optional[int] = None,
+) -> bool:
+    """
+    Шифрование/дешифровка пользователей и уровней пачками по id.
+    Прогресс хранится в AdminSettings (crypt_in_progress, crypt_table,
+    crypt_last_id): прерванная перешифровка продолжается с контрольной
+    точки, а между пачками бот продолжает обрабатывать обновления.
+    Возвращает новое значение признака is_encrypted.
+    """
+    global _running
+    _running = True
+    try:
+        settings = await _get_settings(session)
+        settings_id = settings.id
+        is_encrypted = not settings.is_encrypted
+        tables = list(ENCRYPTED_COLUMNS)
+        if settings.crypt_in_progress:
+            table, last_id = settings.crypt_table, settings.crypt_last_id
+            db_logger.info(LogMessage.CRYPT_RESUMED.format(table, last_id))
+        else:
+            table, last_id = tables[0], 0
+            await _save_progress(
+                session, settings_id,
+                crypt_in_progress=True, crypt_table=table, crypt_last_id=0,
+            )
+            await session.commit()
+        while True:
+            batch_last_id = await _reencrypt_batch(
+                session, settings_id, table, last_id, key
+            )
+            if batch_last_id is not None:
+                last_id = batch_last_id
+                # Даем обработать накопившиеся обновления
+                await asyncio.sleep(0)
+                continue
+            if table == tables[-1]:
+                break
+            table, last_id = tables[tables.index(table) + 1], 0
+            await _save_progress(
+                session, settings_id, crypt_table=table, crypt_last_id=0
+            )
+            await session.commit()
+        values = {
+            # признак шифровки=1/дешифровки=0
+            "is_encrypted": is_encrypted,
+            "crypt_in_progress": False,
+            "crypt_table": None,
+            "crypt_last_id": None,
+            # когда произведено действие
+            "last_updated": datetime.now(moscow_tz),
+        }
+        # кем произведено действие
+        if updated_by is not None:
+            values["updated_by"] = updated_by
+        await _save_progress(session, settings_id, **values)
+        await session.commit()
+    finally:
+        _running = False
+    # Роли и названия уровней изменились, перечитываем справочник
+    bump_data_version()
+    await level_catalog.load(session)
+    uniqueness_index.invalidate()
+    peer_index.invalidate()
+    return is_encrypted
+
+
+async def resume_reencryption(key: str):
+    """
+    Продолжение перешифровки, прерванной остановкой бота.
+    Запускается фоновой задачей при старте, бот в это время работает.
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            settings = await _get_settings(session)
+            if settings is not None and settings.crypt_in_progress:
+                await reencrypt_database(session, key)
+    except Exception as error:
+        db_logger.error(LogMessage.ERROR.format(error))
@@ -0,0 +1,470 @@
+import codecs
+import json
+import os
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from bot.messages import Messages
+from database.models import Level, User
+from settings import (DATE_FORMAT, DUMP_CHUNK_SIZE, DUMP_FILE_NAME, DUMP_GZIP,
+                      DUMP_JSONL, FIXTURE_IMPORT_CHUNK_SIZE)
+
+# Таблицы дампа: ключ в файле и модель
+DUMP_TABLES = (
+    ("users", User),
+    ("levels", Level),
+)
+
+
+class DumpFile:
+    """
+    Асинхронная запись дампа в файл через aiofiles.
+    При compress=True данные сжимаются gzip по мере записи,
+    поэтому сжатие не требует держать дамп в памяти целиком.
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        self._path = path
+        self._compressor = (
+            zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+        )
+        self._file = None
+
+    async def __aenter__(self):
+        self._file = await aiofiles.open(self._path, 'wb')
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if self._compressor is not None:
+                await self._file.write(self._compressor.flush())
+        finally:
+            await self._file.close()
+
+    async def write(self, text: str):
+        data = text.encode('utf-8')
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        if data:
+            await self._file.write(data)
+
+
+def get_dump_file_path() -> str:
+    """Имя файла дампа с учетом формата и сжатия из настроек."""
+    path = DUMP_FILE_NAME
+    if DUMP_JSONL:
+        path = os.path.splitext(path)[0] + ".jsonl"
+    if DUMP_GZIP:
+        path += ".gz"
+    return path
+
+
+async def _stream_rows(
+    session: AsyncSession, model
+) -> AsyncIterator[List[dict]]:
+    """Чтение таблицы пачками по DUMP_CHUNK_SIZE строк."""
+    result = await session.stream_scalars(
+        select(model)
+        .order_by(model.id)
+        .execution_options(yield_per=DUMP_CHUNK_SIZE)
+    )
+    async for partition in result.partitions():
+        yield [row.to_dict() for row in partition]
+
+
+def _dumps(row: dict) -> str:
+    return json.dumps(row, ensure_ascii=False, default=str)
+
+
+async def create_orm_dump(
+    session: AsyncSession,
+    dump_file_path: str,
+    jsonl: bool = DUMP_JSONL,
+    compress: bool = DUMP_GZIP,
+):
+    """
+    Потоковая выгрузка таблиц в файл. Строки читаются из БД и пишутся
+    в файл пачками, поэтому расход памяти не зависит от размера таблиц.
+    В формате JSON файл совместим с загрузкой фикстур: объект с ключами
+    "users" и "levels", по одной записи на строку. В формате JSON Lines
+    каждая строка файла — {"table": ..., "row": {...}}.
+    """
+    async with DumpFile(dump_file_path, compress) as dump_file:
+        if not jsonl:
+            await dump_file.write("{")
+        for table_number, (table, model) in enumerate(DUMP_TABLES):
+            if not jsonl:
+                separator = ",\n" if table_number else "\n"
+                await dump_file.write(f'{separator}    "{table}": [')
+            rows_written = 0
+            async for rows in _stream_rows(session, model):
+                if jsonl:
+                    chunk = "".join(
+                        _dumps({"table": table, "row": row}) + "\n"
+                        for row in rows
+                    )
+                else:
+                    chunk = "".join(
+                        ("," if rows_written + number else "")
+                        + "\n        " + _dumps(row)
+                        for number, row in enumerate(rows)
+                    )
+                rows_written += len(rows)
+                await dump_file.write(chunk)
+            if not jsonl:
+                await dump_file.write("\n    ]" if rows_written else "]")
+        if not jsonl:
+            await dump_file.write("\n}\n")
+
+
+# Форматы файлов фикстур, которые принимает загрузка
+FIXTURE_FILE_EXTENSIONS = (".json", ".jsonl", ".json.gz", ".jsonl.gz")
+
+# Поля, значения которых не должны повторяться в файле фикстур
+UNIQUE_FIELDS = {
+    "users": (
+        "id", "telegram_id", "username", "sber_id", "school21_nickname",
+    ),
+    "levels": ("id",),
+}
+
+# Ключ, по которому запись из файла сопоставляется с записью в БД
+CONFLICT_KEYS = {
+    "users": "telegram_id",
+    "levels": "id",
+}
+
+MODELS = dict(DUMP_TABLES)
+FIELD_ERRORS = {
+    "users": Messages.ERROR_FIELD_FIXTURE_USER,
+    "levels": Messages.ERROR_FIELD_FIXTURE_LEVEL,
+}
+
+# Размер блока при чтении файла фикстур
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class FixtureError(Exception):
+    """Ошибка формата файла фикстур, текст предназначен пользователю."""
+
+    # Итог импорта до ошибки
+    summary: Optional[Dict[str, "ImportSummary"]] = None
+
+
+@dataclass
+class ImportSummary:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+
+async def _read_text(file_path: str) -> AsyncIterator[str]:
+    """Чтение файла блоками с распаковкой gzip и декодированием UTF-8."""
+    decompressor = (
+        zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        if file_path.endswith(".gz") else None
+    )
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    async with aiofiles.open(file_path, 'rb') as fixture_file:
+        while True:
+            raw_block = await fixture_file.read(READ_BLOCK_SIZE)
+            block = raw_block
+            if decompressor is not None:
+                block = (
+                    decompressor.decompress(raw_block) if raw_block
+                    else decompressor.flush()
+                )
+            text = decoder.decode(block, final=not raw_block)
+            if text:
+                yield text
+            if not raw_block:
+                return
+
+
+class _JSONReader:
+    """
+    Потоковый разбор файла фикстур формата
+    {"users": [{...}, ...], "levels": [{...}, ...]}.
+    Записи декодируются по одной, в памяти хранится только
+    непрочитанный остаток текущего блока.
+    """
+
+    def __init__(self, chunks: AsyncIterator[str]):
+        self._chunks = chunks
+        self._buffer = ""
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    async def _fill(self) -> bool:
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    async def _next_char(self) -> str:
+        """Следующий значимый символ (пробелы пропускаются)."""
+        while True:
+            while (
+                self._pos < len(self._buffer)
+                and self._buffer[self._pos].isspace()
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not await self._fill():
+                raise FixtureError(Messages.ERROR_FILE_FORMAT)
+
+    async def _expect(self, char: str):
+        if await self._next_char() != char:
+            raise FixtureError(Messages.ERROR_FILE_FORMAT)
+        self._pos += 1
+
+    async def _value(self):
+        await self._next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Значение еще не дочитано из файла целиком
+                if not await self._fill():
+                    raise FixtureError(Messages.ERROR_FILE_FORMAT)
+                continue
+            self._pos = end
+            return value
+
+    async def records(self) -> AsyncIterator[Tuple[str, dict]]:
+        await self._expect("{")
+        tables = set()
+        if await self._next_char() == "}":
+            self._pos += 1
+        else:
+            while True:
+                table = await self._value()
+                tables.add(table)
+                await self._expect(":")
+                await self._expect("[")
+                if await self._next_char() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield table, await self._value()
+                        char = await self._next_char()
+                        self._pos += 1
+                        if char == "]":
+                            break
+                        if char != ",":
+                            raise FixtureError(Messages.ERROR_FILE_FORMAT)
+                char = await self._next_char()
+                self._pos += 1
+                if char == "}":
+                    break
+                if char != ",":
+                    raise FixtureError(Messages.ERROR_FILE_FORMAT)
+        if not {"users", "levels"} <= tables:
+            raise FixtureError(Messages.ERROR_FILE_FORMAT)
+
+
+async def _jsonl_records(
+    chunks: AsyncIterator[str]
+) -> AsyncIterator[Tuple[str, dict]]:
+    """Потоковый разбор JSON Lines: {"table": ..., "row": {...}}."""
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield _parse_jsonl_line(line)
+    if tail.strip():
+        yield _parse_jsonl_line(tail)
+
+
+def _parse_jsonl_line(line: str) -> Tuple[str, dict]:
+    try:
+        record = json.loads(line)
+        return record["table"], record["row"]
+    except (ValueError, KeyError, TypeError):
+        raise FixtureError(Messages.ERROR_FILE_FORMAT)
+
+
+def read_fixture_records(file_path: str) -> AsyncIterator[Tuple[str, dict]]:
+    """Записи файла фикстур по одной: (таблица, словарь полей)."""
+    chunks = _read_text(file_path)
+    if file_path.endswith((".jsonl", ".jsonl.gz")):
+        return _jsonl_records(chunks)
+    return _JSONReader(chunks).records()
+
+
+def _validate_record(table: str, row: dict):
+    """Проверка записи при разборе: известная таблица и поля."""
+    if table not in MODELS or not isinstance(row, dict):
+        raise FixtureError(Messages.ERROR_FILE_FORMAT)
+    columns = MODELS[table].__table__.columns
+    for field in row:
+        if field not in columns:
+            raise FixtureError(FIELD_ERRORS[table].format(field=field))
+
+
+def _check_batch_duplicates(table: str, rows: List[dict]):
+    """
+    Дубликаты уникальных полей внутри пачки. Совпадения между пачками
+    и с данными БД разрешает upsert: запись с тем же ключом обновляется,
+    записи, нарушающие уникальность, пропускаются.
+    """
+    duplicates = {}
+    for field in UNIQUE_FIELDS[table]:
+        seen = set()
+        for row in rows:
+            value = row.get(field)
+            if value is None:
+                continue
+            if value in seen:
+                duplicates.setdefault(field, set()).add(value)
+            seen.add(value)
+    if duplicates:
+        raise FixtureError(
+            Messages.ERROR_FIXTURE_FILE_DUBLICATES.format(
+                dublicates="; ".join(
+                    f"{field}: {', '.join(map(str, sorted(values, key=str)))}"
+                    for field, values in duplicates.items()
+                )
+            )
+        )
+
+
+def _prepare_row(table: str, row: dict) -> Optional[dict]:
+    """Проверка и приведение типов одной записи, None — запись пропускается."""
+    if row.get(CONFLICT_KEYS[table]) is None:
+        return None
+    row = dict(row)
+    if isinstance(row.get("registration_date"), str):
+        try:
+            row["registration_date"] = datetime.strptime(
+                row["registration_date"], DATE_FORMAT
+            )
+        except ValueError:
+            return None
+    if table == "users" and "role" in row:
+        # Роль из справочника проставляется заново после загрузки
+        row["role_id"] = None
+    return row
+
+
+async def _upsert_rows(
+    session: AsyncSession,
+    table: str,
+    rows: List[dict],
+    summary: ImportSummary,
+):
+    """
+    INSERT ... ON CONFLICT DO UPDATE для пачки записей одной таблицы.
+    Существующие записи обновляются только переданными полями,
+    первичный ключ существующих пользователей не меняется.
+    """
+    model = MODELS[table]
+    key = getattr(model, CONFLICT_KEYS[table])
+    existing = await session.execute(
+        select(key).where(key.in_([row[key.key] for row in rows]))
+    )
+    existing_keys = set(existing.scalars())
+    # В одном executemany все записи должны иметь одинаковый набор полей
+    rows_by_fields = defaultdict(list)
+    for row in rows:
+        rows_by_fields[tuple(sorted(row))].append(row)
+    for fields, group in rows_by_fields.items():
+        statement = insert(model)
+        update_fields = {
+            field: statement.excluded[field]
+            for field in fields if field not in (key.key, "id")
+        }
+        statement = (
+            statement.on_conflict_do_update(
+                index_elements=[key], set_=update_fields
+            ) if update_fields
+            else statement.on_conflict_do_nothing(index_elements=[key])
+        )
+        await session.execute(statement, group)
+    updated = sum(row[key.key] in existing_keys for row in rows)
+    summary.updated += updated
+    summary.inserted += len(rows) - updated
+
+
+async def _apply_batch(
+    session: AsyncSession,
+    table: str,
+    rows: List[dict],
+    summary: ImportSummary,
+):
+    """
+    Запись пачки одной транзакцией. Если пачка нарушает ограничения БД
+    (например, username уже занят другим пользователем), она повторяется
+    по одной записи, и пропускаются только записи с ошибками.
+    """
+    try:
+        await _upsert_rows(session, table, rows, summary)
+        await session.commit()
+        return
+    except IntegrityError:
+        await session.rollback()
+    for row in rows:
+        try:
+            await _upsert_rows(session, table, [row], summary)
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            summary.skipped += 1
+
+
+async def import_fixtures(
+    session: AsyncSession,
+    file_path: str,
+    chunk_size: int = FIXTURE_IMPORT_CHUNK_SIZE,
+) -> Dict[str, ImportSummary]:
+    """
+    Загрузка фикстур пачками по chunk_size записей с коммитом после
+    каждой пачки: блокировка записи SQLite не держится весь импорт,
+    а в памяти находится только текущая пачка. Файл читается один раз,
+    каждая пачка проверяется перед записью, поэтому при ошибке в файле
+    пачки до нее остаются записанными (их итог - в error.summary).
+    Возвращает количество добавленных/обновленных/пропущенных записей
+    по каждой таблице.
+    """
+    summary = {table: ImportSummary() for table in MODELS}
+    batches = defaultdict(list)
+
+    async def apply(table: str, rows: List[dict]):
+        _check_batch_duplicates(table, rows)
+        await _apply_batch(session, table, rows, summary[table])
+
+    try:
+        async for table, row in read_fixture_records(file_path):
+            _validate_record(table, row)
+            row = _prepare_row(table, row)
+            if row is None:
+                summary[table].skipped += 1
+                continue
+            batches[table].append(row)
+            if len(batches[table]) >= chunk_size:
+                await apply(table, batches.pop(table))
+        for table, rows in batches.items():
+            await apply(table, rows)
+    except (UnicodeDecodeError, zlib.error):
+        error = FixtureError(Messages.ERROR_FILE_FORMAT)
+        error.summary = summary
+        raise error
+    except FixtureError as error:
+        error.summary = summary
+        raise
+    return summary
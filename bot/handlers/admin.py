@@ -1,28 +1,33 @@
+import json
 import logging
 import os
-from datetime import datetime
 
 from aiogram import F
 from aiogram.dispatcher.router import Router
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.types import (CallbackQuery, ContentType, FSInputFile, Message,
-                           ReplyKeyboardRemove)
-from sqlalchemy import select
+from aiogram.types import (BufferedInputFile, CallbackQuery, ContentType,
+                           FSInputFile, Message, ReplyKeyboardRemove)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.bot import TELEGRAM_TOKEN
+from bot.cache import bump_data_version, user_status_cache
+from bot.catalog import level_catalog, role_catalog
+from bot.crypto import is_reencryption_running, reencrypt_database
 from bot.decorators import admin_required, db_session_decorator, private_only
+from bot.fixtures import (FixtureError, create_orm_dump, get_dump_file_path,
+                          import_fixtures)
 from bot.keyboards.keyboards import get_admin_buttons
 from bot.messages import Admin_messages, Messages
+from bot.peer_index import peer_index
 from bot.states.states import Admin_state, FixtureImportState, Start_state
-from bot.utils import (create_orm_dump, download_file, find_duplicates,
-                       load_existing_data, load_json_data, xor_encr_decr)
-from database.models import AdminSettings, Level, User, moscow_tz
+from bot.utils import download_file
+from bot.validators.uniqueness import uniqueness_index
+from database.sql_stats import sql_stats
 from logger.logmessages import LogMessage
-from settings import DATE_FORMAT, DUMP_FILE_NAME
+from settings import SQL_STATS_FILE_NAME
 
-router = Router()
+router = Router(name='adm_router')
 hndlr_logger = logging.getLogger('HNDLR_LOGGER')
 
 
@@ -62,55 +67,16 @@ async def encrypt_decrypt_base_handler(
     hndlr_logger.info(
         LogMessage.CRYPT_BASE_REQUEST.format(callback_query.from_user.id)
     )
-    # Получаем всех пользователей из базы данных
-    users = await session.execute(select(User))
-    users = users.scalars().all()
-
-    admin_settings = await session.execute(select(AdminSettings).limit(1))
-    admin_settings = admin_settings.scalar()
-
-    operation = (
-        "ЗАШИФРОВАНА" if not admin_settings.is_encrypted else "ДЕШИФРОВАНА"
-    )
-
-    for user in users:
-        # Обновляем зашифрованные значения в объекте user
-        user.username = xor_encr_decr(
-            user.username, TELEGRAM_TOKEN
-        )
-        user.sber_id = xor_encr_decr(
-            user.sber_id, TELEGRAM_TOKEN
-        )
-        user.role = xor_encr_decr(
-            user.role, TELEGRAM_TOKEN
-        )
-        user.team_name = xor_encr_decr(
-            user.team_name, TELEGRAM_TOKEN
+    if is_reencryption_running():
+        await callback_query.message.answer(
+            Messages.CRYPT_IN_PROGRESS_MESSAGE
         )
-        user.description = xor_encr_decr(
-            user.description, TELEGRAM_TOKEN
-        )
-        user.school21_nickname = xor_encr_decr(
-            user.school21_nickname, TELEGRAM_TOKEN
-        )
-
-    # Шифруем данные уровней
-    levels = await session.execute(select(Level))
-    levels = levels.scalars().all()
-
-    for level in levels:
-        # Обновляем зашифрованное значение в объекте level
-        level.name = xor_encr_decr(level.name, TELEGRAM_TOKEN)
-
-    # признак шифровки=1/дешифровки=0
-    admin_settings.is_encrypted = not admin_settings.is_encrypted
-    # кем произведено действие
-    admin_settings.updated_by = callback_query.from_user.id
-    # когда произведено действие
-    admin_settings.last_updated = datetime.now(moscow_tz)
-
-    # Сохраняем изменения в базе данных
-    await session.commit()
+        return
+    # Перешифровка пачками с контрольной точкой в AdminSettings
+    is_encrypted = await reencrypt_database(
+        session, TELEGRAM_TOKEN, updated_by=callback_query.from_user.id
+    )
+    operation = "ЗАШИФРОВАНА" if is_encrypted else "ДЕШИФРОВАНА"
     hndlr_logger.info(LogMessage.JOB_IS_DONE)
 
     # Отправляем сообщение пользователю, что процесс завершен
@@ -136,11 +102,11 @@ async def send_dump(
     hndlr_logger.info(
         LogMessage.DUMP_BASE_REQUEST.format(callback_query.from_user.id)
     )
-    dump_file_path = DUMP_FILE_NAME
+    dump_file_path = get_dump_file_path()
     # Создаем дамп базы данных
     await create_orm_dump(session, dump_file_path)
 
-    # Открываем JSON файл для отправки
+    # Открываем файл дампа для отправки
     dump_file = FSInputFile(dump_file_path)
 
     # Отправляем файл пользователю
@@ -156,6 +122,37 @@ async def send_dump(
     os.remove(dump_file_path)
 
 
+@router.callback_query(
+    StateFilter(Admin_state.waiting_for_commands),
+    F.data.contains("sql_stats")
+)
+@db_session_decorator
+@admin_required
+@private_only
+async def send_sql_stats(
+    callback_query: CallbackQuery,
+    session: AsyncSession
+):
+    hndlr_logger.info(
+        LogMessage.SQL_STATS_REQUEST.format(callback_query.from_user.id)
+    )
+    # Гистограммы времени выполнения по нормализованным запросам
+    stats_file = BufferedInputFile(
+        json.dumps(
+            sql_stats.snapshot(), ensure_ascii=False, indent=2
+        ).encode('utf-8'),
+        filename=SQL_STATS_FILE_NAME
+    )
+    keyboard = await get_admin_buttons()
+    await callback_query.message.answer_document(
+        stats_file, caption=Messages.SQL_STATS_CAPTION
+    )
+    await callback_query.message.answer(
+        Messages.OPERATION_SUCCESS,
+        reply_markup=keyboard
+    )
+
+
 @router.callback_query(
     StateFilter(Admin_state.waiting_for_commands),
     F.data.contains("fixtures_import")
@@ -176,6 +173,16 @@ async def request_fixtures_file(
     await callback_query.answer()
 
 
+async def reset_after_import(session: AsyncSession):
+    """Импорт мог изменить флаги любых пользователей, уровни и роли."""
+    user_status_cache.clear()
+    bump_data_version()
+    await level_catalog.load(session)
+    await role_catalog.backfill(session)
+    uniqueness_index.invalidate()
+    peer_index.invalidate()
+
+
 @router.message(
     FixtureImportState.waiting_for_file,
     F.content_type == ContentType.DOCUMENT
@@ -191,85 +198,31 @@ async def handle_fixtures_file(
     if not (file_path := await download_file(message)):
         return
 
-    data = await load_json_data(file_path)
-
-    # Проверка формата файла
-    if any(key not in data for key in ["users", "levels"]):
-        await message.answer(Messages.ERROR_FILE_FORMAT)
-        os.remove(file_path)
-
-    # Загрузка существующих данных из базы
-    existing_users, existing_levels = await load_existing_data(session)
-
-    fields_to_check = (
-        "id", "telegram_id", "username", "sber_id", "school21_nickname",
-    )
-    duplicate_messages = []
-
-    for field in fields_to_check:
-        duplicates = find_duplicates(data, field)
-        if duplicates:
-            duplicates_str = ', '.join(map(str, duplicates))
-            duplicate_messages.append(f"{field}: {duplicates_str}")
-
-    if duplicate_messages:
-        await message.answer(
-            Messages.ERROR_FIXTURE_FILE_DUBLICATES.format(
-                dublicates="; ".join(duplicate_messages)
+    # Загрузка пачками с проверкой и коммитом каждой пачки
+    try:
+        summary = await import_fixtures(session, file_path)
+    except FixtureError as error:
+        text = str(error)
+        if any(
+            table.inserted or table.updated
+            for table in error.summary.values()
+        ):
+            await reset_after_import(session)
+            text += Messages.FIXTURE_IMPORT_STOPPED + (
+                Messages.FIXTURE_IMPORT_SUMMARY.format(**error.summary)
             )
-        )
+        await message.answer(text)
         os.remove(file_path)
         return
 
-    # Проверка и обработка пользователей
-    for user_data in data["users"]:
-        db_user = existing_users.get(user_data["telegram_id"])
-
-        # Обновляем данные существующего пользователя или добавляем нового
-        if "registration_date" in user_data and isinstance(
-            user_data["registration_date"], str
-        ):
-            user_data["registration_date"] = datetime.strptime(
-                user_data["registration_date"], DATE_FORMAT
-            )
-
-        if db_user:
-            for field in user_data:
-                if hasattr(db_user, field):
-                    setattr(db_user, field, user_data[field])
-                else:
-                    await message.answer(
-                        Messages.ERROR_FIELD_FIXTURE_USER.format(field=field)
-                    )
-                    os.remove(file_path)
-                    return
-        else:
-            new_user = User(**user_data)
-            session.add(new_user)
-
-    # Проверка и обработка уровней
-    for level_data in data["levels"]:
-        db_level = existing_levels.get(level_data["id"])
-        # Обновляем данные существующего уровня или добавляем новый
-        if db_level:
-            for field in level_data:
-                if hasattr(db_level, field):
-                    setattr(db_level, field, level_data[field])
-                else:
-                    await message.answer(
-                        Messages.ERROR_FIELD_FIXTURE_LEVEL.format(field=field)
-                    )
-                    os.remove(file_path)
-                    return
-        else:
-            new_level = Level(**level_data)
-            session.add(new_level)
-
-    # Коммит изменений и отправка ответа
-    await session.commit()
+    await reset_after_import(session)
+    hndlr_logger.info(LogMessage.FIXTURES_IMPORTED.format(
+        message.from_user.id, summary["users"], summary["levels"]
+    ))
     keyboard = await get_admin_buttons()
     await message.answer(
-        Messages.DATA_SUCCESS_LOADED,
+        Messages.DATA_SUCCESS_LOADED
+        + Messages.FIXTURE_IMPORT_SUMMARY.format(**summary),
         reply_markup=keyboard
     )
     # Удаление временного файла
@@ -0,0 +1,46 @@
+import logging
+
+from aiogram.dispatcher.router import Router
+from aiogram.types import InlineQuery, InlineQueryResultsButton
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.decorators import db_session_decorator
+from bot.messages import Messages
+from bot.peer_index import peer_index
+from bot.utils import get_user_status
+from settings import INLINE_CACHE_TIME, INLINE_RESULTS_LIMIT
+
+router = Router(name='inline_router')
+hndlr_logger = logging.getLogger('HNDLR_LOGGER')
+
+
+# Поиск пиров из любого чата: "@бот запрос"
+@router.inline_query()
+@db_session_decorator
+async def search_inline(inline_query: InlineQuery, session: AsyncSession):
+    status = await get_user_status(session, inline_query.from_user.id)
+    if not status.is_registered:
+        # Кнопка над результатами открывает диалог с ботом
+        await inline_query.answer(
+            [],
+            cache_time=0,
+            is_personal=True,
+            button=InlineQueryResultsButton(
+                text=Messages.INLINE_NOT_REGISTERED,
+                start_parameter='inline',
+            ),
+        )
+        return
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    results, next_offset = await peer_index.search(
+        session, inline_query.query, offset, INLINE_RESULTS_LIMIT
+    )
+    # Ответ зависит от того, зарегистрирован ли пользователь, поэтому
+    # Telegram кэширует его для каждого пользователя отдельно
+    await inline_query.answer(
+        results,
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=True,
+        next_offset=str(next_offset) if next_offset is not None else '',
+    )
+    hndlr_logger.debug(inline_query.query)
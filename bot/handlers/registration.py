@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from aiogram import F
@@ -10,23 +9,24 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.decorators import db_session_decorator, private_only
 from bot.handlers.search import role_selection_keyb
+from bot.invite_pool import invite_link_pool
 from bot.keyboards.keyboards import (get_confirm_keyboard,
                                      get_join_community_keyboard, get_keyboard,
                                      get_skip_inline_keyboard)
 from bot.messages import Messages
+from bot.scheduler import registration_scheduler
 from bot.states.states import Registration, Start_state
-from bot.utils import (check_user_exists, get_user_admin, get_user_db_data,
-                       get_user_registered, parse_level_and_role,
-                       save_or_update_user, send_invite_link, timer_action)
+from bot.utils import (get_user_db_data, get_user_status, parse_level_and_role,
+                       save_or_update_user)
 from bot.validators.base import validate_and_update_state
 from bot.validators.validators import (validate_description,
                                        validate_role_level, validate_sber_id,
                                        validate_school21_nickname,
-                                       validate_team_name)
+                                       validate_team_name, validate_username)
 from logger.logmessages import LogMessage
 from settings import STATES_COLLECTION
 
-router = Router()
+router = Router(name='reg_router')
 hndlr_logger = logging.getLogger('HNDLR_LOGGER')
 
 # Кортеж для возобновления аутентификации
@@ -56,10 +56,10 @@ async def send_welcome(
 ):
     await state.set_state(Start_state.wait_for_action)
     telegram_id = message.from_user.id
-    is_registered = await get_user_registered(session, telegram_id)
-    is_admin = await get_user_admin(session, telegram_id)
-    existing_user = await check_user_exists(session, telegram_id)
-    keyboard = get_keyboard(is_registered, existing_user, is_admin)
+    status = await get_user_status(session, telegram_id)
+    is_registered = status.is_registered
+    existing_user = status.exists
+    keyboard = get_keyboard(is_registered, existing_user, status.is_admin)
     await message.answer(Messages.WELCOME_MESSAGE,
                          reply_markup=keyboard)
     hndlr_logger.info(
@@ -89,9 +89,21 @@ async def reg_action(
     state: FSMContext,
     session: AsyncSession
 ):
+    # username из Telegram не должен быть занят другим участником,
+    # иначе регистрация не сохранится
+    username_error = await validate_username(
+        message.from_user.username, session, message.from_user.id
+    )
+    if username_error:
+        await message.answer(username_error)
+        return
     # Включение таймера прерывания регистрации
-    timer_task = asyncio.create_task(timer_action(message, state, session))
-    await state.update_data(timer_task=timer_task)
+    await registration_scheduler.schedule(
+        session,
+        message.from_user.id,
+        message.chat.id,
+        message.from_user.username,
+    )
     # Запросить пользователя ввести ник в Школе 21
     await message.answer(
         Messages.ENTER_NICK_SCHOOL_MESSAGE,
@@ -108,8 +120,19 @@ async def continue_reg_action(
     state: FSMContext,
     session: AsyncSession
 ):
-    timer_task = asyncio.create_task(timer_action(message, state, session))
-    await state.update_data(timer_task=timer_task)
+    # Как и при начале регистрации, проверяем username из Telegram
+    username_error = await validate_username(
+        message.from_user.username, session, message.from_user.id
+    )
+    if username_error:
+        await message.answer(username_error)
+        return
+    await registration_scheduler.schedule(
+        session,
+        message.from_user.id,
+        message.chat.id,
+        message.from_user.username,
+    )
     # Получаем данные из БД по заполненным полям
     user_fields = await get_user_db_data(session, message.from_user.id)
     # Заполняем state данными
@@ -287,12 +310,8 @@ async def handle_join_community(
     state: FSMContext,
     session: AsyncSession,
 ):
-    data = await state.get_data()
-    if 'timer_task' in data:
-        timer_task = data['timer_task']
-        if not timer_task.done():  # Проверяем, завершена ли задача
-            # Отменяем таймер
-            timer_task.cancel()
+    # Отменяем таймер прерывания регистрации
+    await registration_scheduler.cancel(session, callback_query.from_user.id)
     # Устанавливаем флаг, что регистрация на финальной стадии
     await state.set_state(Registration.waiting_for_final_confirmation)
     telegram_id = callback_query.from_user.id
@@ -311,9 +330,11 @@ async def handle_join_community(
         )
     )
     # Ссылка на сообщество для пользователя
-    invite_link = await send_invite_link(
+    invite_link = await invite_link_pool.issue(
+        session,
         callback_query.bot,
-        callback_query.message
+        callback_query.message,
+        telegram_id,
     )
     if invite_link:
         keyboard = await get_join_community_keyboard(invite_link)
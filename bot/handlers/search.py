@@ -8,17 +8,18 @@ from aiogram.types import CallbackQuery, Message, ReplyKeyboardRemove
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.catalog import (ROLE_CALLBACK_PREFIX, level_catalog,
+                         parse_role_callback)
 from bot.decorators import db_session_decorator, private_only
 from bot.keyboards.keyboards import (get_buttons, get_inline_keyboard,
                                      get_keyboard)
 from bot.messages import Buttons, Messages
 from bot.states.states import Search, Start_state
-from bot.utils import (check_user_exists, get_user_admin, get_user_registered,
-                       processing_user_list)
+from bot.utils import get_user_status, processing_user_list
 from database.models import Level, User
-from settings import LIMIT, START_OFFSET
+from settings import LIMIT
 
-router = Router()
+router = Router(name='srch_router')
 hndlr_logger = logging.getLogger('HNDLR_LOGGER')
 
 
@@ -31,7 +32,7 @@ hndlr_logger = logging.getLogger('HNDLR_LOGGER')
 @private_only
 @db_session_decorator
 async def role_selection_keyb(message: Message, state: FSMContext, session):
-    await state.update_data(offset=START_OFFSET)
+    await state.update_data(first_id=None, last_id=None)
     await state.update_data(limit=LIMIT)
     keyboard = await get_inline_keyboard(session, User)
     await message.answer(
@@ -43,7 +44,10 @@ async def role_selection_keyb(message: Message, state: FSMContext, session):
 
 
 # Фильтрация по роли
-@router.callback_query(StateFilter(Search.waiting_for_role))
+@router.callback_query(
+    StateFilter(Search.waiting_for_role),
+    F.data.startswith(ROLE_CALLBACK_PREFIX)
+)
 @private_only
 @db_session_decorator
 async def choosing_a_role(
@@ -51,7 +55,9 @@ async def choosing_a_role(
     state: FSMContext,
     session: AsyncSession,
 ):
-    await state.update_data(role=callback_query.data)
+    await state.update_data(
+        role_id=parse_role_callback(callback_query.data), keywords=None
+    )
     keyboard = await get_inline_keyboard(session, Level)
     await callback_query.message.answer(
         Messages.WHAT_LEVEL,
@@ -62,6 +68,23 @@ async def choosing_a_role(
     await state.set_state(Search.waiting_for_level)
 
 
+# Поиск по словам в описании, команде и роли вместо выбора роли
+@router.message(
+    StateFilter(Search.waiting_for_role, Search.users_list),
+    F.text
+)
+@private_only
+@db_session_decorator
+async def search_by_keywords(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+):
+    await state.update_data(keywords=message.text, first_id=None, last_id=None)
+    await processing_user_list(state, session, message)
+    await state.set_state(Search.users_list)
+
+
 # Обработка нажатия кнопки "Назад"
 @router.callback_query(
     StateFilter(Search.waiting_for_level),
@@ -80,7 +103,7 @@ async def go_to_searching_start(
         reply_markup=keyboard
     )
     await callback_query.answer()
-    await state.update_data(offset=START_OFFSET)
+    await state.update_data(first_id=None, last_id=None)
     await state.set_state(Search.waiting_for_role)
 
 
@@ -93,19 +116,14 @@ async def choosing_a_level(
     state: FSMContext,
     session: AsyncSession,
 ):
-    get_level_id = await session.execute(
-        select(Level.id).where(
-            Level.name == callback_query.data
-        )
-    )
-    level_id = int(get_level_id.scalar_one())
-    list_counter: int = 0
-    await state.update_data(
-        level_id=level_id,
-        list_counter=list_counter
-    )
+    level_id = await level_catalog.resolve(session, callback_query.data)
+    # Кнопка устаревшей клавиатуры или подделанный callback_data
+    if level_id is None:
+        await callback_query.answer(Messages.UNKNOWN_LEVEL)
+        return
+    await state.update_data(level_id=level_id)
     await callback_query.answer()
-    await processing_user_list(state, session, callback_query, list_counter)
+    await processing_user_list(state, session, callback_query)
     await state.set_state(Search.users_list)
 
 
@@ -122,12 +140,10 @@ async def get_next_users_list(
     session: AsyncSession
 ):
     data = await state.get_data()
-    list_counter = data['list_counter'] - 2
-    offset = data['limit'] * list_counter
-    await state.update_data(list_counter=list_counter)
-    await state.update_data(offset=offset)
     await callback_query.answer()
-    await processing_user_list(state, session, callback_query, list_counter)
+    await processing_user_list(
+        state, session, callback_query, before_id=data.get('first_id')
+    )
     await state.set_state(Search.users_list)
 
 
@@ -144,9 +160,10 @@ async def get_next_users_lists(
     session: AsyncSession
 ):
     data = await state.get_data()
-    list_counter = data['list_counter']
     await callback_query.answer()
-    await processing_user_list(state, session, callback_query, list_counter)
+    await processing_user_list(
+        state, session, callback_query, after_id=data.get('last_id')
+    )
     await state.set_state(Search.users_list)
 
 
@@ -193,8 +210,8 @@ async def get_user_card(
         to_begin=Buttons.TO_BEGIN,
         back=Buttons.TO_LIST
     )
-    await state.update_data(offset=START_OFFSET)
-    await state.update_data(list_counter=2)
+    # "Назад к списку" возвращает на первую страницу
+    await state.update_data(first_id=None, last_id=None)
     await callback_query.message.answer(user_card, reply_markup=keyboard)
 
 
@@ -210,13 +227,11 @@ async def back_to_begin(
     state: FSMContext
 ):
     telegram_id = callback_query.from_user.id
-    is_registered = await get_user_registered(session, telegram_id)
-    existing_user = await check_user_exists(session, telegram_id)
-    is_admin = await get_user_admin(session, telegram_id)
+    status = await get_user_status(session, telegram_id)
     keyboard = get_keyboard(
-        is_registered=is_registered,
-        existing_user=existing_user,
-        is_admin=is_admin
+        is_registered=status.is_registered,
+        existing_user=status.exists,
+        is_admin=status.is_admin
     )
     await callback_query.answer()
     await state.set_state(Start_state.wait_for_action)
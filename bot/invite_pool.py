@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.types import Message
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from bot.utils import create_invite_link, send_invite_link
+from database.engine import retry_on_busy
+from database.models import AsyncSessionLocal, InviteLink
+from logger.logmessages import LogMessage
+from settings import (CHANNEL_ID, INVITE_LINK_MIN_VALIDITY_HOURS,
+                      INVITE_POOL_CHECK_INTERVAL, INVITE_POOL_SIZE,
+                      TIME_EXPIRE_HOUR)
+
+hndlr_logger = logging.getLogger('HNDLR_LOGGER')
+
+
+def _valid_after() -> int:
+    """Ссылка годится для выдачи, если действует дольше этого момента."""
+    return int(time.time()) + INVITE_LINK_MIN_VALIDITY_HOURS * 3600
+
+
+class InviteLinkPool:
+    """
+    Запас одноразовых ссылок-приглашений в канал сообщества.
+    Ссылки создаются заранее фоновой задачей и хранятся в таблице
+    invite_links, при подтверждении регистрации пользователь получает
+    готовую ссылку без запроса к Bot API. Ссылки, срок действия которых
+    подходит к концу, заменяются новыми.
+    """
+
+    def __init__(self):
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._bot: Optional[Bot] = None
+
+    async def start(self, bot: Bot):
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def issue(
+        self,
+        session: AsyncSession,
+        bot: Bot,
+        message: Message,
+        telegram_id: int,
+    ) -> Optional[str]:
+        """
+        Ссылка для пользователя: выданная ему ранее и еще действующая,
+        иначе свободная из запаса. Если запас пуст, ссылка создается сразу.
+        """
+        link = await session.scalar(
+            select(InviteLink.link)
+            .where(
+                InviteLink.telegram_id == telegram_id,
+                InviteLink.expire_date > _valid_after(),
+            )
+            .order_by(InviteLink.expire_date.desc())
+            .limit(1)
+        )
+        if link is not None:
+            return link
+        link = await self._claim(session, telegram_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if link is not None:
+            return link
+        hndlr_logger.warning(LogMessage.INVITE_POOL_EMPTY)
+        expire_date = int(time.time()) + TIME_EXPIRE_HOUR * 3600
+        link = await send_invite_link(bot, message, expire_date)
+        if link is not None:
+            try:
+                await self._store(session, link, expire_date, telegram_id)
+            except SQLAlchemyError as error:
+                # Ссылка уже создана: пользователь получит ее, даже если
+                # запомнить ее для повторной выдачи не удалось
+                await session.rollback()
+                hndlr_logger.error(LogMessage.ERROR.format(error))
+        return link
+
+    @retry_on_busy
+    async def _claim(
+        self, session: AsyncSession, telegram_id: int
+    ) -> Optional[str]:
+        """Закрепление свободной ссылки за пользователем одним запросом,
+        две параллельные выдачи не получат одну и ту же ссылку."""
+        free_link = (
+            select(InviteLink.link)
+            .where(
+                InviteLink.telegram_id.is_(None),
+                InviteLink.expire_date > _valid_after(),
+            )
+            .order_by(InviteLink.expire_date)
+            .limit(1)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            update(InviteLink)
+            .where(InviteLink.link == free_link)
+            .values(telegram_id=telegram_id)
+            .returning(InviteLink.link)
+            .execution_options(synchronize_session=False)
+        )
+        link = result.scalar_one_or_none()
+        await session.commit()
+        return link
+
+    @retry_on_busy
+    async def _store(
+        self,
+        session: AsyncSession,
+        link: str,
+        expire_date: int,
+        telegram_id: Optional[int] = None,
+    ):
+        session.add(InviteLink(
+            link=link, expire_date=expire_date, telegram_id=telegram_id
+        ))
+        await session.commit()
+
+    @retry_on_busy
+    async def _drop_stale(self, session: AsyncSession):
+        """Удаление истекших ссылок и свободных ссылок, которые
+        закончат действовать раньше, чем ими воспользуются."""
+        await session.execute(
+            delete(InviteLink).where(or_(
+                InviteLink.expire_date <= int(time.time()),
+                (InviteLink.telegram_id.is_(None))
+                & (InviteLink.expire_date <= _valid_after()),
+            ))
+        )
+        await session.commit()
+
+    async def refill(self):
+        """Пополнение запаса свободных ссылок до INVITE_POOL_SIZE."""
+        async with AsyncSessionLocal() as session:
+            await self._drop_stale(session)
+            free = await session.scalar(
+                select(func.count()).select_from(InviteLink).where(
+                    InviteLink.telegram_id.is_(None)
+                )
+            )
+            for _ in range(INVITE_POOL_SIZE - free):
+                expire_date = int(time.time()) + TIME_EXPIRE_HOUR * 3600
+                link = await create_invite_link(
+                    self._bot, CHANNEL_ID, expire_date
+                )
+                await self._store(session, link, expire_date)
+            if free < INVITE_POOL_SIZE:
+                hndlr_logger.info(LogMessage.INVITE_POOL_REFILLED.format(
+                    INVITE_POOL_SIZE - free
+                ))
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refill()
+            except Exception as error:
+                # Например, нет прав на создание ссылок: повторим позже
+                hndlr_logger.error(LogMessage.ERROR.format(error))
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), INVITE_POOL_CHECK_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+invite_link_pool = InviteLinkPool()
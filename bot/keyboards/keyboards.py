@@ -4,10 +4,11 @@ from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import distinct
 
+from bot.cache import get_data_version, keyboard_cache
+from bot.catalog import ROLE_CALLBACK_PREFIX, level_catalog
 from bot.messages import Messages
-from database.models import Level, User
+from database.models import Level, Role, User
 from logger.logmessages import LogMessage
 
 keybrd_logger = logging.getLogger('KEYBRD_LOGGER')
@@ -33,20 +34,34 @@ def get_keyboard(
     return builder.as_markup(resize_keyboard=True)
 
 
-async def get_inline_keyboard(
+async def build_inline_keyboard(
         session: AsyncSession,
         obj: object,
 ) -> InlineKeyboardMarkup:
     if hasattr(obj, "role") and (obj, "is_registered"):
-        result = await session.execute(select(distinct(obj.role)).where(obj.is_registered))
-    elif obj is Level:
-        result = await session.execute(select(distinct(Level.name)))
+        # Роли из справочника, которые есть у зарегистрированных
+        # пользователей. В callback_data - короткий id, а не название
+        result = await session.execute(
+            select(Role.id, Role.name).where(
+                Role.id.in_(select(obj.role_id).where(obj.is_registered))
+            ).order_by(Role.name)
+        )
+        buttons = [
+            (name, f"{ROLE_CALLBACK_PREFIX}{role_id}")
+            for role_id, name in result.all()
+        ]
     else:
-        result = await session.execute(select(obj))
-    objects = result.scalars().all()
+        if obj is Level:
+            # Уровни берем из справочника в памяти без запроса к БД
+            await level_catalog.ensure_loaded(session)
+            objects = level_catalog.names
+        else:
+            result = await session.execute(select(obj))
+            objects = result.scalars().all()
+        buttons = [(str(item), str(item)[:64]) for item in objects]
     builder = InlineKeyboardBuilder()
-    for item in objects:
-        builder.button(text=str(item)[:64], callback_data=str(item)[:64])
+    for text, callback_data in buttons:
+        builder.button(text=text[:64], callback_data=callback_data)
     if not hasattr(obj, "role"):
         builder.button(text="Назад", callback_data="Back")
     builder.adjust(2)
@@ -54,6 +69,26 @@ async def get_inline_keyboard(
     return builder.as_markup(resize_keyboard=True)
 
 
+async def get_inline_keyboard(
+        session: AsyncSession,
+        obj: object,
+) -> InlineKeyboardMarkup:
+    # Клавиатуры ролей и уровней пересобираются только при смене версии
+    # данных (регистрация, правка пользователей, перезагрузка уровней)
+    if hasattr(obj, "role") and (obj, "is_registered"):
+        cache_key, version = "roles", get_data_version()
+    elif obj is Level:
+        await level_catalog.ensure_loaded(session)
+        cache_key, version = "levels", level_catalog.version
+    else:
+        return await build_inline_keyboard(session, obj)
+    keyboard = keyboard_cache.get(cache_key, version)
+    if keyboard is None:
+        keyboard = await build_inline_keyboard(session, obj)
+        keyboard_cache.set(cache_key, version, keyboard)
+    return keyboard
+
+
 async def get_admin_buttons(telegram_id: int = None) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(
@@ -68,6 +103,10 @@ async def get_admin_buttons(telegram_id: int = None) -> InlineKeyboardMarkup:
         text="Загрузка в БД",
         callback_data=str("fixtures_import")
     )
+    builder.button(
+        text="Статистика SQL",
+        callback_data=str("sql_stats")
+    )
     # Генерируем URL с использованием telegram_id, если он передан
     if telegram_id is not None:
         url = f"https://school21.online:8500/?telegram_id={telegram_id}"
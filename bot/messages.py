@@ -103,10 +103,19 @@ class Messages:
         "База данных {operation}.\n"
     )
 
+    CRYPT_IN_PROGRESS_MESSAGE: str = (
+        "Шифрование/дешифровка базы данных уже выполняется.\n"
+        "Дождитесь завершения операции."
+    )
+
     NOT_HAVE_ADMIN_RIGHTS: str = "У вас нет прав для выполнения этой команды."
 
-    WHOS_LOOKING_FOR: str = "Кого ищем?"
+    WHOS_LOOKING_FOR: str = (
+        "Кого ищем? Выберите роль или напишите слова для поиска "
+        "по описанию, команде и роли (например, kafka)."
+    )
     WHAT_LEVEL: str = "Уровень?"
+    UNKNOWN_LEVEL: str = "Такого уровня нет, выберите уровень из списка."
     USER_FOR_LIST: str = "Сберчат: {}, Команда: {}"
     LOOK_OR_NEXT_OR_BACK: str = "------- Лист {} из {} -------"
     LOOK_OR_BACK: str = (
@@ -118,6 +127,9 @@ class Messages:
         "Введите другие параметры запроса."
     )
     LIST_OUTPUT = "Пиры в соответствии с Вашим запросом:"
+    INLINE_CARD_TITLE: str = "{sber_id} (@{username})"
+    INLINE_CARD_DESCRIPTION: str = "{level} {role}, команда: {team_name}"
+    INLINE_NOT_REGISTERED: str = "Пройдите аутентификацию, чтобы искать пиров"
     LETS_START = "Хорошо, приступим!"
     UNKNOWN_COMMAND = (
         "Не понимаю Вас...\n"
@@ -130,7 +142,8 @@ class Messages:
     )
 
     ERROR_FILE_FORMAT_MESSAGES: str = (
-        "Ошибка: файл должен быть в формате JSON."
+        "Ошибка: файл должен быть в формате JSON или JSON Lines\n"
+        "(.json, .jsonl, в том числе сжатый gzip)."
     )
 
     FILE_PATH_SERVER: str = "Путь файла на сервере Telegram: {file_path}."
@@ -150,6 +163,9 @@ class Messages:
         "Ошибка: в загружаемом файле обнаружены дубликаты "
         "{dublicates}."
     )
+    FIXTURE_IMPORT_STOPPED: str = (
+        "\nЗагрузка остановлена, записи до ошибки сохранены.\n"
+    )
     ERROR_BD_CHECK: str = (
         "Для проверки прав админа требуется подключение к БД."
     )
@@ -168,7 +184,17 @@ class Messages:
         "*** ОПЕРАЦИЯ УСПЕШНО ЗАВЕРШЕНА ***\n"
         "Данные успешно загружены и обновлены.\n"
     )
+    FIXTURE_IMPORT_SUMMARY: str = (
+        "Пользователи: добавлено {users.inserted}, "
+        "обновлено {users.updated}, пропущено {users.skipped}.\n"
+        "Уровни: добавлено {levels.inserted}, "
+        "обновлено {levels.updated}, пропущено {levels.skipped}."
+    )
     OPERATION_SUCCESS: str = "*** ОПЕРАЦИЯ УСПЕШНО ЗАВЕРШЕНА ***\n"
+    SQL_STATS_CAPTION: str = (
+        "Время выполнения SQL-запросов с момента запуска бота (мс), "
+        "самые затратные запросы идут первыми."
+    )
     DATA_SUCCESS_UPLOAD: str = (
         "Данные успешно выгружены:\n"
     )
@@ -191,6 +217,7 @@ class Messages:
         '- /crypt_base - шифрование и дешифровка данных в БД\n'
         '- /fixtures_export - получение фикстур из базы данных\n'
         '- /fixtures_import - загрузка фикстур в базу данных\n'
+        '- /sql_stats - статистика времени выполнения SQL-запросов\n'
         '- переход в WEB-админ панель, где можете посмотреть '
         'пользователей, которые прервали свою регистрацию')
 
@@ -208,5 +235,6 @@ class Admin_messages:
         "1. Шифрование/дешифровка данных в БД (крипто-ключ: TELEGRAM_TOKEN)\n"
         "2. Выгрузка данных из базы в формате json-файла \n"
         "3. Загрузка данных в базу из json-файла \n"
-        "4. WEB-админ панель: метрики, управление пользователями и пр."
+        "4. Статистика времени выполнения SQL-запросов бота \n"
+        "5. WEB-админ панель: метрики, управление пользователями и пр."
     )
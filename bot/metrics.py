@@ -0,0 +1,261 @@
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiohttp import web
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from logger.logger import dropped_log_records
+from settings import METRICS_BUCKETS, METRICS_HOST, METRICS_PORT
+
+# Метки метрик обработчика: роутер, обработчик, состояние FSM
+Labels = Tuple[str, str, str]
+LABEL_NAMES = ('router', 'handler', 'state')
+# Этапы обработки апдейта: целиком, обработчик, запросы к БД и Bot API
+STAGES = ('total', 'handler', 'db', 'api')
+UNHANDLED: Labels = ('none', 'unhandled', 'none')
+
+
+class UpdateTimings:
+    """Время, затраченное на этапы обработки одного апдейта."""
+
+    def __init__(self):
+        self.labels = UNHANDLED
+        self.handler = 0.0
+        self.db = 0.0
+        self.api = 0.0
+
+
+# Замеры апдейта, который обрабатывается в текущей задаче
+_update_timings: ContextVar[Optional[UpdateTimings]] = ContextVar(
+    'update_timings', default=None
+)
+
+
+class Histogram:
+    """Гистограмма в секундах с накопительными корзинами Prometheus."""
+
+    def __init__(self):
+        self.buckets = [0] * len(METRICS_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(METRICS_BUCKETS, value)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class HandlerMetrics:
+    """Счетчики и гистограммы обработки апдейтов по обработчикам."""
+
+    def __init__(self):
+        self.updates: Dict[Labels, int] = {}
+        self.errors: Dict[Labels, int] = {}
+        self.durations: Dict[Tuple[Labels, str], Histogram] = {}
+        self.api_requests: Dict[str, int] = {}
+
+    def observe_update(self, timings: UpdateTimings, total: float,
+                       failed: bool):
+        labels = timings.labels
+        self.updates[labels] = self.updates.get(labels, 0) + 1
+        if failed:
+            self.errors[labels] = self.errors.get(labels, 0) + 1
+        values = (total, timings.handler, timings.db, timings.api)
+        for stage, value in zip(STAGES, values):
+            histogram = self.durations.get((labels, stage))
+            if histogram is None:
+                histogram = self.durations[(labels, stage)] = Histogram()
+            histogram.observe(value)
+
+    def observe_api_request(self, method: str):
+        self.api_requests[method] = self.api_requests.get(method, 0) + 1
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+        lines: List[str] = []
+        lines += _counter(
+            'bot_updates_total', 'Обработанные апдейты.', self.updates
+        )
+        lines += _counter(
+            'bot_update_errors_total',
+            'Апдейты, обработка которых завершилась исключением.',
+            self.errors,
+        )
+        lines += [
+            '# HELP bot_update_duration_seconds Время обработки апдейта '
+            'по этапам: total, handler, db, api.',
+            '# TYPE bot_update_duration_seconds histogram',
+        ]
+        for (labels, stage), histogram in self.durations.items():
+            label_str = _labels(labels) + f',stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(METRICS_BUCKETS, histogram.buckets):
+                cumulative += count
+                lines.append(
+                    'bot_update_duration_seconds_bucket'
+                    f'{{{label_str},le="{bound}"}} {cumulative}'
+                )
+            lines += [
+                'bot_update_duration_seconds_bucket'
+                f'{{{label_str},le="+Inf"}} {histogram.count}',
+                f'bot_update_duration_seconds_sum{{{label_str}}} '
+                f'{histogram.sum}',
+                f'bot_update_duration_seconds_count{{{label_str}}} '
+                f'{histogram.count}',
+            ]
+        lines += [
+            '# HELP bot_api_requests_total Запросы к Telegram Bot API.',
+            '# TYPE bot_api_requests_total counter',
+        ]
+        lines += [
+            f'bot_api_requests_total{{method="{method}"}} {count}'
+            for method, count in self.api_requests.items()
+        ]
+        lines += [
+            '# HELP bot_log_records_dropped_total Записи лога, отброшенные '
+            'из-за переполнения очереди.',
+            '# TYPE bot_log_records_dropped_total counter',
+            f'bot_log_records_dropped_total {dropped_log_records()}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def _labels(labels: Labels) -> str:
+    return ','.join(
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(LABEL_NAMES, labels)
+    )
+
+
+def _counter(name: str, help_text: str, values: Dict[Labels, int]):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    lines += [
+        f'{name}{{{_labels(labels)}}} {count}'
+        for labels, count in values.items()
+    ]
+    return lines
+
+
+handler_metrics = HandlerMetrics()
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer-middleware апдейтов: замер полного времени обработки апдейта.
+    Время обработчика, БД и Bot API накапливается в UpdateTimings
+    из HandlerMetricsMiddleware, хуков движка и ApiMetricsMiddleware.
+    """
+
+    async def __call__(self, handler, event, data):
+        timings = UpdateTimings()
+        token = _update_timings.set(timings)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _update_timings.reset(token)
+            handler_metrics.observe_update(
+                timings, time.perf_counter() - start, failed
+            )
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner-middleware событий: метки обработчика и время его работы.
+    Регистрируется на диспетчере и действует на вложенные роутеры.
+    """
+
+    async def __call__(self, handler, event, data):
+        timings = _update_timings.get()
+        if timings is None:
+            return await handler(event, data)
+        handler_object = data.get('handler')
+        router = data.get('event_router')
+        timings.labels = (
+            router.name if router else 'none',
+            handler_object.callback.__name__ if handler_object else 'none',
+            data.get('raw_state') or 'none',
+        )
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            timings.handler += time.perf_counter() - start
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: время и число запросов к Bot API."""
+
+    async def __call__(self, make_request, bot, method):
+        handler_metrics.observe_api_request(type(method).__name__)
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            timings = _update_timings.get()
+            if timings is not None:
+                timings.api += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    start = conn.info['metrics_start'].pop()
+    timings = _update_timings.get()
+    if timings is not None:
+        timings.db += time.perf_counter() - start
+
+
+def install_db_metrics(engine: AsyncEngine):
+    """Учет времени запросов к БД в замерах текущего апдейта."""
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', _before_cursor_execute
+    )
+    event.listen(
+        engine.sync_engine, 'after_cursor_execute', _after_cursor_execute
+    )
+
+
+async def metrics_view(request: web.Request) -> web.Response:
+    return web.Response(
+        text=handler_metrics.render(),
+        content_type='text/plain',
+        charset='utf-8',
+    )
+
+
+def create_metrics_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_view)
+    return app
+
+
+async def start_metrics_server(
+    host: str = METRICS_HOST, port: int = METRICS_PORT
+) -> web.AppRunner:
+    """Запуск aiohttp-сервера метрик в процессе бота."""
+    runner = web.AppRunner(create_metrics_app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
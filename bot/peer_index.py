@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import re
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from bot.cache import inline_query_cache
+from bot.catalog import level_catalog
+from bot.messages import Messages
+from database.models import User
+from logger.logmessages import LogMessage
+from settings import INLINE_INDEX_TTL, SEARCH_MAX_KEYWORDS
+
+db_logger = logging.getLogger('DB_LOGGER')
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Слова строки без учета регистра и различия е/ё."""
+    if not text:
+        return []
+    return _TOKEN.findall(text.casefold().replace('ё', 'е'))
+
+
+class PeerIndex:
+    """
+    Индекс зарегистрированных пользователей в памяти процесса для
+    инлайн-поиска: слово -> id пользователей и поля карточек.
+    Строится одним запросом, обновляется после каждой записи
+    пользователя ботом и перестраивается раз в INLINE_INDEX_TTL
+    (изменения из админ-панели). Карточки собираются только для
+    отдаваемой страницы. Результаты запросов запоминаются
+    в inline_query_cache до следующего изменения индекса.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._sorted_tokens: List[str] = []
+        # Слова и поля карточки каждого пользователя
+        self._tokens: Dict[int, Set[str]] = {}
+        self._cards: Dict[int, Tuple[Optional[str], ...]] = {}
+        self._all_ids: List[int] = []
+        self._built_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        # Номер состояния индекса, для кэша результатов запросов
+        self.version = 0
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._built_at is not None
+            and time.monotonic() - self._built_at <= INLINE_INDEX_TTL
+        )
+
+    def invalidate(self):
+        """Перестроить при следующем запросе (массовые изменения)."""
+        self._built_at = None
+
+    def _add(self, user) -> List[str]:
+        """Слова и карточка пользователя, возвращает слова, которых
+        в индексе еще не было."""
+        level = level_catalog.name_by_id(user.level_id) or ''
+        card = (
+            user.sber_id, user.username, user.school21_nickname,
+            user.team_name, user.role, level, user.description,
+        )
+        tokens = set(tokenize(' '.join(filter(None, card))))
+        new_tokens = []
+        for token in tokens:
+            if token not in self._postings:
+                self._postings[token] = set()
+                new_tokens.append(token)
+            self._postings[token].add(user.id)
+        self._tokens[user.id] = tokens
+        self._cards[user.id] = card
+        return new_tokens
+
+    def _remove(self, user_id: int):
+        tokens = self._tokens.pop(user_id, None)
+        if tokens is None:
+            return
+        del self._cards[user_id]
+        del self._all_ids[bisect_left(self._all_ids, user_id)]
+        for token in tokens:
+            ids = self._postings[token]
+            ids.discard(user_id)
+            if not ids:
+                del self._postings[token]
+                del self._sorted_tokens[
+                    bisect_left(self._sorted_tokens, token)
+                ]
+
+    async def build(self, session: AsyncSession):
+        await level_catalog.ensure_loaded(session)
+        result = await session.execute(
+            select(
+                User.id,
+                User.sber_id,
+                User.username,
+                User.school21_nickname,
+                User.team_name,
+                User.role,
+                User.level_id,
+                User.description,
+            ).where(User.is_registered).order_by(User.id)
+        )
+        self._postings = {}
+        self._tokens = {}
+        self._cards = {}
+        for user in result.all():
+            self._add(user)
+        self._sorted_tokens = sorted(self._postings)
+        self._all_ids = list(self._cards)
+        self._built_at = time.monotonic()
+        self.version += 1
+        db_logger.info(LogMessage.PEER_INDEX_BUILT.format(len(self._cards)))
+
+    def update(self, user: User):
+        """Учет записанного ботом пользователя без перестроения индекса:
+        прежние слова удаляются, новые добавляются, если регистрация
+        завершена."""
+        if self._built_at is None:
+            return
+        self._remove(user.id)
+        if user.is_registered:
+            for token in self._add(user):
+                insort(self._sorted_tokens, token)
+            insort(self._all_ids, user.id)
+        self.version += 1
+
+    async def ensure_fresh(self, session: AsyncSession):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            # Индекс мог построить параллельный запрос, пока ждали
+            if not self._is_fresh():
+                await self.build(session)
+
+    def _article(self, user_id: int) -> InlineQueryResultArticle:
+        (sber_id, username, school21_nickname, team_name, role, level,
+         description) = self._cards[user_id]
+        return InlineQueryResultArticle(
+            id=str(user_id),
+            title=Messages.INLINE_CARD_TITLE.format(
+                sber_id=sber_id, username=username
+            ),
+            description=Messages.INLINE_CARD_DESCRIPTION.format(
+                level=level, role=role, team_name=team_name
+            ),
+            input_message_content=InputTextMessageContent(
+                message_text=Messages.CARD_MESSAGE.format(
+                    sber_id=sber_id,
+                    username=username,
+                    school21_nickname=school21_nickname,
+                    role=role,
+                    level=level,
+                    description=description or 'Не указано',
+                )
+            ),
+        )
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        """id пользователей, у которых есть слово, начинающееся
+        с prefix: слова индекса отсортированы, совпадения идут подряд."""
+        ids: Set[int] = set()
+        position = bisect_left(self._sorted_tokens, prefix)
+        while (
+            position < len(self._sorted_tokens)
+            and self._sorted_tokens[position].startswith(prefix)
+        ):
+            ids |= self._postings[self._sorted_tokens[position]]
+            position += 1
+        return ids
+
+    def _match(self, tokens: Tuple[str, ...]) -> List[int]:
+        if not tokens:
+            return self._all_ids
+        # Каждое слово запроса - префикс какого-либо слова пользователя
+        # (последнее слово обычно недописано)
+        found: Optional[Set[int]] = None
+        for token in tokens:
+            ids = self._prefix_matches(token)
+            found = ids if found is None else found & ids
+            if not found:
+                return []
+        # Выше - пользователи с наибольшим числом точных совпадений слов
+        return sorted(found, key=lambda user_id: (
+            -sum(user_id in self._postings.get(token, ()) for token in tokens),
+            user_id,
+        ))
+
+    async def search(
+        self,
+        session: AsyncSession,
+        query: str,
+        offset: int,
+        limit: int,
+    ) -> Tuple[List[InlineQueryResultArticle], Optional[int]]:
+        """
+        Страница карточек по запросу и смещение следующей страницы
+        (None - страница последняя).
+        """
+        await self.ensure_fresh(session)
+        tokens = tuple(dict.fromkeys(tokenize(query)))[:SEARCH_MAX_KEYWORDS]
+        user_ids = inline_query_cache.get(tokens, self.version)
+        if user_ids is None:
+            user_ids = self._match(tokens)
+            inline_query_cache.set(tokens, self.version, user_ids)
+        page = [
+            self._article(user_id)
+            for user_id in user_ids[offset:offset + limit]
+        ]
+        next_offset = offset + limit
+        return page, next_offset if next_offset < len(user_ids) else None
+
+
+peer_index = PeerIndex()
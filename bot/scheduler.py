@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from bot.utils import timer_action
+from database.engine import retry_on_busy
+from database.models import AsyncSessionLocal, RegistrationTimer
+from logger.logmessages import LogMessage
+from settings import (TIMER_RETRY_ATTEMPTS, TIMER_RETRY_BACKOFF,
+                      TIMER_RETRY_BACKOFF_MAX, TIMER_USER_STEP)
+
+scheduler_logger = logging.getLogger('SCHEDULER_LOGGER')
+
+
+class RegistrationScheduler:
+    """
+    Планировщик прерывания регистрации.
+    Вместо отдельной спящей задачи на каждого пользователя работает один
+    цикл с min-heap дедлайнов. Дедлайны хранятся в таблице
+    registration_timer, поэтому после перезапуска бота они восстанавливаются.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int]] = []
+        # Актуальный дедлайн пользователя: записи кучи, которые с ним
+        # не совпадают, считаются отмененными и пропускаются
+        self._deadlines: Dict[int, int] = {}
+        # Число неудачных попыток прервать регистрацию пользователя
+        self._failures: Dict[int, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._bot: Optional[Bot] = None
+        self._storage: Optional[BaseStorage] = None
+
+    async def start(self, bot: Bot, storage: BaseStorage):
+        """Загрузка сохраненных дедлайнов и запуск цикла планировщика."""
+        self._bot = bot
+        self._storage = storage
+        self._wakeup = asyncio.Event()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(
+                    RegistrationTimer.telegram_id,
+                    RegistrationTimer.deadline,
+                )
+            )
+            timers = result.all()
+        for telegram_id, deadline in timers:
+            self._push(telegram_id, deadline)
+        self._task = asyncio.create_task(self._run())
+        scheduler_logger.info(LogMessage.SCHEDULER_STARTED.format(len(timers)))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    @retry_on_busy
+    async def schedule(
+        self,
+        session: AsyncSession,
+        telegram_id: int,
+        chat_id: int,
+        username: str,
+    ):
+        """Запуск (или перезапуск) таймера прерывания регистрации."""
+        deadline = int(time.time()) + TIMER_USER_STEP * 3600
+        await session.merge(
+            RegistrationTimer(
+                telegram_id=telegram_id,
+                chat_id=chat_id,
+                username=username,
+                deadline=deadline,
+            )
+        )
+        await session.commit()
+        self._push(telegram_id, deadline)
+
+    @retry_on_busy
+    async def cancel(self, session: AsyncSession, telegram_id: int):
+        """Отмена таймера: запись в куче остается, но больше не сработает."""
+        self._deadlines.pop(telegram_id, None)
+        await session.execute(
+            delete(RegistrationTimer).where(
+                RegistrationTimer.telegram_id == telegram_id
+            )
+        )
+        await session.commit()
+        # Не даем куче разрастаться из-за отмененных записей
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [
+                (deadline, telegram_id)
+                for telegram_id, deadline in self._deadlines.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def _push(self, telegram_id: int, deadline: int):
+        self._deadlines[telegram_id] = deadline
+        heapq.heappush(self._heap, (deadline, telegram_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0][0] <= time.time():
+                deadline, telegram_id = heapq.heappop(self._heap)
+                if self._deadlines.get(telegram_id) != deadline:
+                    continue
+                del self._deadlines[telegram_id]
+                await self._expire(telegram_id)
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _expire(self, telegram_id: int):
+        """Прерывание регистрации в отдельной короткой сессии БД."""
+        try:
+            async with AsyncSessionLocal() as session:
+                timer = await session.get(RegistrationTimer, telegram_id)
+                if timer is None:
+                    self._failures.pop(telegram_id, None)
+                    return
+                if timer.deadline > time.time():
+                    # Таймер был перезапущен, ждем новый дедлайн
+                    self._push(telegram_id, timer.deadline)
+                    return
+                state = FSMContext(
+                    storage=self._storage,
+                    key=StorageKey(
+                        bot_id=self._bot.id,
+                        chat_id=timer.chat_id,
+                        user_id=telegram_id,
+                    ),
+                )
+                await timer_action(self._bot, timer, state, session)
+                await session.delete(timer)
+                await session.commit()
+            self._failures.pop(telegram_id, None)
+            scheduler_logger.info(
+                LogMessage.REG_TIMER_EXPIRED.format(telegram_id)
+            )
+        except Exception as error:
+            scheduler_logger.error(LogMessage.ERROR.format(error))
+            self._retry_later(telegram_id)
+
+    def _retry_later(self, telegram_id: int):
+        """
+        Повтор после ошибки (БД занята, ошибка Telegram): запись таймера
+        осталась в БД, поэтому дедлайн возвращается в кучу с
+        экспоненциально растущей задержкой. После TIMER_RETRY_ATTEMPTS
+        повторов таймер остается только в БД до перезапуска бота.
+        """
+        if telegram_id in self._deadlines:
+            # Таймер перезапустили, пока его обрабатывали
+            return
+        failures = self._failures.get(telegram_id, 0)
+        if failures >= TIMER_RETRY_ATTEMPTS:
+            del self._failures[telegram_id]
+            scheduler_logger.error(
+                LogMessage.REG_TIMER_GAVE_UP.format(telegram_id, failures)
+            )
+            return
+        self._failures[telegram_id] = failures + 1
+        delay = min(
+            TIMER_RETRY_BACKOFF * 2 ** failures, TIMER_RETRY_BACKOFF_MAX
+        )
+        self._push(telegram_id, int(time.time() + delay))
+        scheduler_logger.warning(
+            LogMessage.REG_TIMER_RETRY.format(telegram_id, delay)
+        )
+
+
+registration_scheduler = RegistrationScheduler()
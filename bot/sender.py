@@ -0,0 +1,289 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Union
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from logger.logmessages import LogMessage
+from settings import (SEND_BULK_METHODS, SEND_CHAT_BURST, SEND_CHAT_RATE,
+                      SEND_GLOBAL_BURST, SEND_GLOBAL_RATE, SEND_GROUP_BURST,
+                      SEND_GROUP_RATE, SEND_IDLE_BUCKETS_MAX,
+                      SEND_QUEUED_METHOD_PREFIXES,
+                      SEND_RETRY_AFTER_ATTEMPTS)
+
+bot_logger = logging.getLogger("BOT_LOGGER")
+
+# Приоритеты очереди отправки: чем меньше значение, тем раньше запрос
+INTERACTIVE = 0
+BULK = 1
+
+ChatId = Union[int, str]
+
+# Приоритет запросов, отправляемых из текущей задачи. Вне обработки
+# апдейта (таймеры регистрации, фоновые задачи) отправка массовая
+_send_priority: ContextVar[int] = ContextVar('send_priority', default=BULK)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше burst."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # Telegram попросил не отправлять до этого момента (retry_after)
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Сколько секунд ждать, пока появится токен."""
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float):
+        self.paused_until = max(
+            self.paused_until, time.monotonic() + seconds
+        )
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst and now >= self.paused_until
+
+
+class SendScheduler:
+    """
+    Очередь исходящих запросов к Bot API. Запрос получает разрешение
+    на отправку, когда есть токены в глобальном ведре и в ведре его
+    чата. Из готовых к отправке запросов первым идет запрос с меньшим
+    приоритетом, при равных - пришедший раньше.
+
+    Запросы хранятся в очередях своих чатов. В общих кучах лежит
+    по одной актуальной записи на чат: в _ready - свободные чаты
+    по приоритету их первого запроса, в _delayed - ждущие токена
+    по времени освобождения. Выбор запроса стоит O(log n).
+    """
+
+    def __init__(self):
+        self._global = TokenBucket(SEND_GLOBAL_RATE, SEND_GLOBAL_BURST)
+        self._chats: Dict[ChatId, TokenBucket] = {}
+        # Ожидающие запросы чатов: куча (priority, seq, future)
+        self._pending: Dict[ChatId, List[tuple]] = {}
+        # Свободные чаты: куча (priority, seq, chat_id) первого запроса
+        self._ready: List[tuple] = []
+        # Чаты, ждущие токена: куча (время освобождения, seq, chat_id)
+        self._delayed: List[tuple] = []
+        # Актуальная запись чата в _ready или _delayed, остальные записи
+        # этого чата в кучах устарели и пропускаются
+        self._entries: Dict[ChatId, tuple] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Отрицательные id и @username - группы и каналы
+            if isinstance(chat_id, str) or chat_id < 0:
+                bucket = TokenBucket(SEND_GROUP_RATE, SEND_GROUP_BURST)
+            else:
+                bucket = TokenBucket(SEND_CHAT_RATE, SEND_CHAT_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def pause_chat(self, chat_id: ChatId, seconds: float):
+        self.chat_bucket(chat_id).pause(seconds)
+
+    @property
+    def queued(self) -> int:
+        return sum(len(items) for items in self._pending.values())
+
+    async def acquire(self, chat_id: ChatId, priority: int = INTERACTIVE):
+        """Ожидание очереди на отправку в чат chat_id."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        item = (priority, next(self._counter), future)
+        items = self._pending.setdefault(chat_id, [])
+        heapq.heappush(items, item)
+        # Запрос стал первым в чате - запись чата в кучах устарела
+        if items[0] is item:
+            self._schedule(chat_id, time.monotonic())
+        self._wakeup.set()
+        await future
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for items in self._pending.values():
+            for *_, future in items:
+                future.cancel()
+        self._pending.clear()
+        self._ready.clear()
+        self._delayed.clear()
+        self._entries.clear()
+
+    def _schedule(self, chat_id: ChatId, now: float):
+        """Новая запись чата в _ready или _delayed по его первому
+        запросу. Запросы, ожидание которых отменили, отбрасываются."""
+        items = self._pending[chat_id]
+        while items and items[0][2].done():
+            heapq.heappop(items)
+        if not items:
+            del self._pending[chat_id]
+            self._entries.pop(chat_id, None)
+            return
+        wait = self.chat_bucket(chat_id).wait_time(now)
+        if wait > 0:
+            entry = (now + wait, next(self._counter), chat_id)
+            heapq.heappush(self._delayed, entry)
+        else:
+            entry = (items[0][0], items[0][1], chat_id)
+            heapq.heappush(self._ready, entry)
+        self._entries[chat_id] = entry
+
+    def _next_ready(self, now: float):
+        """Чат, первый запрос которого идет следующим, и время до
+        освобождения ближайшего чата, если свободных нет."""
+        while self._delayed and self._delayed[0][0] <= now:
+            entry = heapq.heappop(self._delayed)
+            if self._entries.get(entry[2]) is entry:
+                self._schedule(entry[2], now)
+        while self._ready:
+            entry = heapq.heappop(self._ready)
+            chat_id = entry[2]
+            if self._entries.get(chat_id) is not entry:
+                continue
+            # Первый запрос отменили или чат приостановлен на retry_after
+            if (self._pending[chat_id][0][2].done()
+                    or self.chat_bucket(chat_id).wait_time(now) > 0):
+                self._schedule(chat_id, now)
+                continue
+            return chat_id, 0.0
+        if self._delayed:
+            return None, self._delayed[0][0] - now
+        return None, None
+
+    def _drop_idle_buckets(self, now: float):
+        if len(self._chats) <= SEND_IDLE_BUCKETS_MAX:
+            return
+        for chat_id in [
+            chat_id for chat_id, bucket in self._chats.items()
+            if chat_id not in self._pending and bucket.is_idle(now)
+        ]:
+            del self._chats[chat_id]
+
+    async def _sleep(self, timeout: Optional[float]):
+        """Пауза до timeout или до прихода нового запроса."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._entries:
+                await self._sleep(None)
+                continue
+            now = time.monotonic()
+            global_wait = self._global.wait_time(now)
+            if global_wait > 0:
+                await self._sleep(global_wait)
+                continue
+            chat_id, wait = self._next_ready(now)
+            if chat_id is None:
+                await self._sleep(wait)
+                continue
+            self._global.consume(now)
+            self.chat_bucket(chat_id).consume(now)
+            *_, future = heapq.heappop(self._pending[chat_id])
+            future.set_result(None)
+            self._schedule(chat_id, now)
+            self._drop_idle_buckets(now)
+
+
+send_scheduler = SendScheduler()
+
+
+@contextmanager
+def bulk_sending():
+    """Запросы внутри блока уступают очередь ответам пользователям."""
+    token = _send_priority.set(BULK)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class InteractivePriorityMiddleware(BaseMiddleware):
+    """Outer-middleware апдейтов: ответы на апдейт - интерактивные."""
+
+    async def __call__(self, handler, event, data):
+        token = _send_priority.set(INTERACTIVE)
+        try:
+            return await handler(event, data)
+        finally:
+            _send_priority.reset(token)
+
+
+class SendSchedulerMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: отправки сообщений (Send*, Copy*, Forward*)
+    проходят через очередь с ограничением частоты, остальные запросы
+    (ссылки-приглашения, ответы на callback и т.п.) - напрямую.
+    На 429 чат приостанавливается на retry_after, и запрос повторяется
+    через очередь.
+    """
+
+    def __init__(self, scheduler: SendScheduler = send_scheduler):
+        self.scheduler = scheduler
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None or not name.startswith(
+            SEND_QUEUED_METHOD_PREFIXES
+        ):
+            return await make_request(bot, method)
+        priority = _send_priority.get()
+        if name in SEND_BULK_METHODS:
+            priority = BULK
+        for attempt in range(SEND_RETRY_AFTER_ATTEMPTS + 1):
+            await self.scheduler.acquire(chat_id, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                if attempt == SEND_RETRY_AFTER_ATTEMPTS:
+                    raise
+                bot_logger.warning(LogMessage.SEND_RETRY_AFTER.format(
+                    type(method).__name__, chat_id, error.retry_after
+                ))
+                self.scheduler.pause_chat(chat_id, error.retry_after)
@@ -0,0 +1,175 @@
+import copy
+import json
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (BaseStorage, DefaultKeyBuilder,
+                                      KeyBuilder, StateType, StorageKey)
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.future import select
+
+from database.engine import retry_on_busy
+from database.models import FSMRecord
+from settings import FSM_STORAGE_PURGE_INTERVAL, FSM_STORAGE_TTL
+
+# Записи FSM, прочитанные и измененные в рамках обработки одного апдейта
+_fsm_batch: ContextVar[Optional[Dict[str, dict]]] = ContextVar(
+    'fsm_batch', default=None
+)
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Хранилище состояний FSM в SQLite (таблица fsm_storage).
+    Внутри batch() все изменения копятся в памяти и записываются в БД
+    одним коммитом при выходе, вне batch() каждая запись пишется сразу.
+    Черновики, не обновлявшиеся дольше FSM_STORAGE_TTL, считаются
+    устаревшими и удаляются.
+    """
+
+    def __init__(
+        self,
+        session_maker,
+        key_builder: Optional[KeyBuilder] = None,
+    ):
+        self._session_maker = session_maker
+        self._key_builder = key_builder or DefaultKeyBuilder(
+            with_bot_id=True, with_destiny=True
+        )
+        self._last_purge = 0.0
+
+    async def set_state(self, key: StorageKey, state: StateType = None):
+        record = await self._get_record(key)
+        record['state'] = state.state if isinstance(state, State) else state
+        await self._write(key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._get_record(key)
+        return record['state']
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]):
+        record = await self._get_record(key)
+        record['data'] = copy.deepcopy(data)
+        await self._write(key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._get_record(key)
+        return copy.deepcopy(record['data'])
+
+    async def close(self):
+        pass
+
+    @asynccontextmanager
+    async def batch(self):
+        """Объединение всех изменений внутри блока в одну запись в БД."""
+        if _fsm_batch.get() is not None:
+            yield
+            return
+        token = _fsm_batch.set({})
+        try:
+            yield
+        finally:
+            records = _fsm_batch.get()
+            _fsm_batch.reset(token)
+            dirty = {
+                key: record for key, record in records.items()
+                if record['dirty']
+            }
+            if dirty:
+                await self._flush(dirty)
+
+    @retry_on_busy
+    async def purge_expired(self):
+        """Удаление черновиков, которые не менялись дольше TTL."""
+        self._last_purge = time.time()
+        async with self._session_maker() as session:
+            await session.execute(
+                delete(FSMRecord).where(
+                    FSMRecord.updated_at < self._expire_before()
+                )
+            )
+            await session.commit()
+
+    def _expire_before(self) -> int:
+        return int(time.time()) - FSM_STORAGE_TTL * 3600
+
+    async def _get_record(self, key: StorageKey) -> dict:
+        storage_key = self._key_builder.build(key)
+        batch = _fsm_batch.get()
+        if batch is not None and storage_key in batch:
+            return batch[storage_key]
+        async with self._session_maker() as session:
+            result = await session.execute(
+                select(FSMRecord.state, FSMRecord.data).where(
+                    FSMRecord.key == storage_key,
+                    FSMRecord.updated_at >= self._expire_before(),
+                )
+            )
+            row = result.first()
+        record = {
+            'state': row.state if row else None,
+            'data': json.loads(row.data) if row and row.data else {},
+            'dirty': False,
+        }
+        if batch is not None:
+            batch[storage_key] = record
+        return record
+
+    async def _write(self, key: StorageKey, record: dict):
+        batch = _fsm_batch.get()
+        if batch is not None:
+            record['dirty'] = True
+            return
+        await self._flush({self._key_builder.build(key): record})
+
+    async def _flush(self, records: Dict[str, dict]):
+        now = int(time.time())
+        await self._write_records(records, now)
+        if now - self._last_purge > FSM_STORAGE_PURGE_INTERVAL * 3600:
+            await self.purge_expired()
+
+    @retry_on_busy
+    async def _write_records(self, records: Dict[str, dict], now: int):
+        async with self._session_maker() as session:
+            for storage_key, record in records.items():
+                # Пустые записи не храним: завершенный сценарий не занимает
+                # места ни в памяти, ни в БД
+                if record['state'] is None and not record['data']:
+                    await session.execute(
+                        delete(FSMRecord).where(
+                            FSMRecord.key == storage_key
+                        )
+                    )
+                    continue
+                values = {
+                    'state': record['state'],
+                    'data': json.dumps(record['data'], ensure_ascii=False),
+                    'updated_at': now,
+                }
+                await session.execute(
+                    insert(FSMRecord)
+                    .values(key=storage_key, **values)
+                    .on_conflict_do_update(
+                        index_elements=[FSMRecord.key], set_=values
+                    )
+                )
+            await session.commit()
+
+
+class FSMWriteBehindMiddleware(BaseMiddleware):
+    """
+    Outer-middleware апдейтов: все вызовы state.update_data/set_state
+    в обработчике записываются в SQLiteStorage одним коммитом.
+    """
+
+    async def __call__(self, handler, event, data):
+        storage = data.get('fsm_storage')
+        if not isinstance(storage, SQLiteStorage):
+            return await handler(event, data)
+        async with storage.batch():
+            return await handler(event, data)
@@ -1,56 +1,73 @@
-import asyncio
-import json
 import logging
 import os
 import re
 import time
+from typing import NamedTuple, Optional, Union
 
-import aiofiles
-from aiogram.exceptions import TelegramBadRequest
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, ChatInviteLink, Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy import func, literal_column, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from bot.cache import (bump_data_version, get_data_version,
+                       invalidate_user_status, user_count_cache,
+                       user_status_cache)
+from bot.catalog import DEFAULT_LEVEL_ID, level_catalog, role_catalog
+from bot.crypto import xor_encr_decr_many
+from bot.fixtures import FIXTURE_FILE_EXTENSIONS
 from bot.keyboards.keyboards import get_buttons, get_card_button, get_keyboard
 from bot.messages import Buttons, Messages
-from database.models import Level, User
+from bot.peer_index import peer_index
+from bot.validators.uniqueness import uniqueness_index
+from database.engine import retry_on_busy
+from database.models import RegistrationTimer, User, users_fts
 from logger.logmessages import LogMessage
-from settings import (CHANNEL_ID, START_OFFSET, STATES_COLLECTION,
-                      TIME_EXPIRE_HOUR, TIMER_USER_STEP)
+from settings import (CHANNEL_ID, SEARCH_FTS_WEIGHTS, SEARCH_MAX_KEYWORDS,
+                      STATES_COLLECTION, TIME_EXPIRE_HOUR)
 
 hndlr_logger = logging.getLogger('HNDLR_LOGGER')
 
 
+class UserStatus(NamedTuple):
+    is_registered: bool
+    is_admin: bool
+    exists: bool
+
+
+class UserListRow(NamedTuple):
+    id: int
+    sber_id: str
+    team_name: str
+    # Номер пользователя в выборке, начиная с 1
+    position: int
+
+
 async def timer_action(
-    message: Message,
+    bot: Bot,
+    timer: RegistrationTimer,
     state: FSMContext,
     session: AsyncSession,
 ):
     """
-    Функция включает таймер на время, определенное константой TIMER_USER_STEP.
-    Таймер ожидает, когда пользователь пройдёт дальше по регистрации.
-    Если нет движений, через TIMER_USER_STEP
+    Функция вызывается планировщиком регистрации, когда истекает время,
+    определенное константой TIMER_USER_STEP.
+    Если пользователь за это время не прошел дальше по регистрации,
     в базу данных записывается пользователь со всеми заполненными полями,
     в незаполненные подаётся значение "Пусто" или 0, в поле is_registered
     записывается False, в поле field_not_filled указывается то поле
     базы данных, перед которым пользователь остановился.
     Если в базе данных уже присутствует пользователь, запись обновляется.
     """
-    await asyncio.sleep(TIMER_USER_STEP * 3600)
-    telegram_id = message.from_user.id
-    is_registered = await get_user_registered(session, telegram_id)
-    existing_user = await check_user_exists(session, telegram_id)
-    is_admin = await get_user_admin(session, telegram_id)
+    telegram_id = timer.telegram_id
+    status = await get_user_status(session, telegram_id)
     keyboard = get_keyboard(
-        is_registered=is_registered,
-        existing_user=existing_user,
-        is_admin=is_admin
-    )
-    await message.answer(
-        Messages.USER_BREAKE_OUT_REGISTRATION,
-        reply_markup=keyboard
+        is_registered=status.is_registered,
+        existing_user=status.exists,
+        is_admin=status.is_admin
     )
     data = await state.get_data()
 
@@ -64,7 +81,7 @@ async def timer_action(
         level_id, role = await parse_level_and_role(
             data['role_level'], session
         )
-    username = message.from_user.username
+    username = timer.username
     sber_id = data.get('sber_id') if data.get('sber_id') else 'Пусто'
     school21_nickname = (data.get('school21_nickname')
                          if data.get('school21_nickname') else 'Пусто')
@@ -78,7 +95,7 @@ async def timer_action(
     )
     is_registered = False
     field_not_filled = field_not_filled
-    if await check_user_exists(session, telegram_id):
+    if status.exists:
         await update_user(
             session,
             telegram_id=telegram_id,
@@ -108,22 +125,36 @@ async def timer_action(
             field_not_filled=field_not_filled,
         )
         await state.clear()
+    # Уведомление - после записи: недоступный чат не должен мешать
+    # сохранить черновик и снять таймер
+    try:
+        await bot.send_message(
+            timer.chat_id,
+            Messages.USER_BREAKE_OUT_REGISTRATION,
+            reply_markup=keyboard
+        )
+    except (TelegramForbiddenError, TelegramBadRequest) as error:
+        hndlr_logger.warning(
+            LogMessage.REG_TIMER_NOTIFY_FAILED.format(telegram_id, error)
+        )
 
 
 # Функция для создания временной ссылки на приглашение в группу
-async def create_invite_link(bot, chat_id):
+async def create_invite_link(bot, chat_id, expire_date=None):
+    if expire_date is None:
+        expire_date = int(time.time()) + (3600 * TIME_EXPIRE_HOUR)
     invite_link: ChatInviteLink = await bot.create_chat_invite_link(
         chat_id=chat_id,
-        expire_date=int(time.time()) + (3600 * TIME_EXPIRE_HOUR),
+        expire_date=expire_date,
         member_limit=1,  # Лимит на одного пользователя
     )
     return invite_link.invite_link
 
 
-async def send_invite_link(bot, message):
+async def send_invite_link(bot, message, expire_date=None):
     """Создать и отправить приглашение в чат с обработкой ошибок."""
     try:
-        invite_link = await create_invite_link(bot, CHANNEL_ID)
+        invite_link = await create_invite_link(bot, CHANNEL_ID, expire_date)
         return invite_link
     except TelegramBadRequest as error_rights:
         # Обработка ошибки, если недостаточно прав для создания ссылки
@@ -134,6 +165,7 @@ async def send_invite_link(bot, message):
         return None
 
 
+@retry_on_busy
 async def save_or_update_user(
     session, telegram_id, telegram_name, user_data, role, level_id
 ):
@@ -160,14 +192,7 @@ async def save_or_update_user(
 
 # Функция шифрования по ключу
 def xor_encr_decr(text, key) -> str:
-    if text is None:
-        return None
-
-    key_length = len(key)
-    return ''.join(
-        chr(ord(char) ^ ord(key[i % key_length]))
-        for i, char in enumerate(text)
-    )
+    return xor_encr_decr_many([text], key)[0]
 
 
 # Получение записи зарегистрированного пользователя
@@ -185,6 +210,32 @@ async def get_user_registered(db: AsyncSession, telegram_id: int) -> bool:
     return user_is_registered or False
 
 
+# Флаги пользователя для стартовой клавиатуры одним запросом
+async def get_user_status(db: AsyncSession, telegram_id: int) -> UserStatus:
+    status = user_status_cache.get(telegram_id)
+    if status is not None:
+        return status
+    result = await db.execute(
+        select(
+            User.is_registered,
+            User.is_admin
+        ).filter_by(
+            telegram_id=telegram_id
+        )
+    )
+    row = result.first()
+    if row is None:
+        status = UserStatus(is_registered=False, is_admin=False, exists=False)
+    else:
+        status = UserStatus(
+            is_registered=bool(row.is_registered),
+            is_admin=bool(row.is_admin),
+            exists=True,
+        )
+    user_status_cache[telegram_id] = status
+    return status
+
+
 # Проверка наличия прав администратора
 async def get_user_admin(db: AsyncSession, telegram_id: int) -> bool:
     # Выполняем запрос для получения информации по пользователю
@@ -219,6 +270,7 @@ async def add_user(
         school21_nickname=school21_nickname,
         team_name=team_name,
         role=role,
+        role_id=await role_catalog.get_or_create(db, role),
         level_id=level_id,
         description=description,
         is_registered=is_registered,
@@ -226,7 +278,14 @@ async def add_user(
     )
     db.add(new_user)
     await db.commit()
+    invalidate_user_status(telegram_id)
+    uniqueness_index.update(
+        telegram_id, is_registered, username=username, sber_id=sber_id,
+        school21_nickname=school21_nickname,
+    )
+    bump_data_version()
     await db.refresh(new_user)
+    peer_index.update(new_user)
     return new_user
 
 
@@ -234,7 +293,7 @@ async def check_user_exists(
     db: AsyncSession,
     telegram_id: int
 ) -> bool:
-    result = await db.execute(select(User).where(
+    result = await db.execute(select(User.id).where(
         User.telegram_id == telegram_id)
     )
     return result.scalar_one_or_none() is not None
@@ -264,95 +323,145 @@ async def update_user(
     updating_user.school21_nickname = school21_nickname
     updating_user.team_name = team_name
     updating_user.role = role
+    updating_user.role_id = await role_catalog.get_or_create(db, role)
     updating_user.level_id = level_id
     updating_user.description = description
     updating_user.is_registered = is_registered
     updating_user.field_not_filled = field_not_filled
     await db.commit()
+    invalidate_user_status(telegram_id)
+    uniqueness_index.update(
+        telegram_id, is_registered, username=username, sber_id=sber_id,
+        school21_nickname=school21_nickname,
+    )
+    bump_data_version()
     await db.refresh(updating_user)
+    peer_index.update(updating_user)
     return updating_user
 
 
-async def create_orm_dump(session: AsyncSession, dump_file_path: str):
-    # Словарь для хранения данных из таблиц
-    all_data = {
-        "users": [],
-        "levels": [],
-    }
-
-    # Дамп данных из таблицы User
-    result_users = await session.execute(select(User))
-    users = result_users.scalars().all()
-    all_data["users"] = [user.to_dict() for user in users]
-
-    # Дамп данных из таблицы Level
-    result_levels = await session.execute(select(Level))
-    levels = result_levels.scalars().all()
-    all_data["levels"] = [level.to_dict() for level in levels]
-
-    # Запись данных в JSON файл
-    with open(dump_file_path, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, indent=4, ensure_ascii=False, default=str)
-
-
 # для парсера роли+уровня
 async def parse_level_and_role(input_str, session: AsyncSession):
-    # Получаем все уровни из базы данных с их идентификаторами
-    result = await session.execute(select(Level.id, Level.name))
-    # Создаем словарь {название уровня: id уровня}
-    levels = {row[1]: row[0] for row in result.fetchall()}
-
-    # Создаем регулярное выражение на основе названий уровней из базы
-    level_pattern = rf"^({'|'.join(map(re.escape, levels.keys()))})\b"
-
-    # Ищем уровень в начале строки
-    match = re.match(level_pattern, input_str)
-
-    # Уровень найден
-    if match:
-        level_name = match.group(0)
-        # Получаем id уровня из словаря, если нет — 0
-        level_id = levels.get(level_name, 0)
-        # Всё, что после уровня, является ролью
-        role = input_str[len(level_name):].strip()
-    else:
-        level_id = 1  # Если уровень не найден, ставим "Не важно"
-        # Вся строка — это роль
-        role = input_str.strip()
-    return level_id, role
+    # Уровни и регулярное выражение берутся из справочника в памяти,
+    # БД читается только при первой загрузке справочника
+    await level_catalog.ensure_loaded(session)
+    return level_catalog.parse(input_str)
 
 
-# Получение списка пользователей с пагинацией
+# Получение страницы пользователей с keyset-пагинацией по User.id
 async def get_user_list(
     session: AsyncSession,
     level_id: int,
-    offset: int,
     limit: int,
-    role: str,
+    role_id: int,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    cursor_position: int = 0,
 ):
-    if level_id == 1:
-        user_list = await session.execute(
-            select(User.id, User.sber_id, User.team_name).where(
-                User.role == role
-            )
-        )
-        limited_user_list = await session.execute(
-            select(User.id, User.sber_id, User.team_name).where(
-                User.role == role
-            ).offset(offset).limit(limit)
+    """
+    Возвращает страницу пользователей с ролью role_id из справочника
+    после after_id (или перед before_id)
+    и общее количество найденных. Страница читается по индексу условием
+    на id и LIMIT, без нумерации всей выборки: номера строк отсчитываются
+    от cursor_position - номера пользователя after_id (before_id).
+    Общее количество берется из user_count_cache, привязанного к версии
+    данных, и считается запросом COUNT только после изменения
+    пользователей.
+    """
+    filters = [User.role_id == role_id, User.is_registered]
+    if level_id != DEFAULT_LEVEL_ID:
+        filters.append(User.level_id == level_id)
+    cache_key, version = (role_id, level_id), get_data_version()
+    total = user_count_cache.get(cache_key, version)
+    if total is None:
+        total = await session.scalar(
+            select(func.count()).select_from(User).where(*filters)
         )
+        user_count_cache.set(cache_key, version, total)
+    query = select(User.id, User.sber_id, User.team_name).where(*filters)
+    if before_id is not None:
+        query = query.where(User.id < before_id).order_by(User.id.desc())
     else:
-        user_list = await session.execute(
-            select(User.id, User.sber_id, User.team_name).where(
-                User.level_id == level_id, User.role == role
-            )
-        )
-        limited_user_list = await session.execute(
-            select(User.id, User.sber_id, User.team_name).where(
-                User.level_id == level_id, User.role == role
-            ).offset(offset).limit(limit)
-        )
-    return limited_user_list.all(), len(user_list.all())
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        query = query.order_by(User.id)
+    result = await session.execute(query.limit(limit))
+    rows = result.all()
+    if before_id is not None:
+        rows.reverse()
+        start = max(cursor_position - len(rows), 1)
+    else:
+        start = cursor_position + 1
+    users_list = [
+        UserListRow(row.id, row.sber_id, row.team_name, start + number)
+        for number, row in enumerate(rows)
+    ]
+    return users_list, total
+
+
+def build_fts_query(keywords: str) -> Optional[str]:
+    """
+    Запрос FTS5 из текста пользователя: слова берутся в кавычки, чтобы
+    символы синтаксиса FTS5 не ломали запрос, и ищутся по префиксу.
+    Все слова должны встретиться в описании, команде или роли.
+    """
+    words = re.findall(r'\w+', keywords)[:SEARCH_MAX_KEYWORDS]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+# Страница пользователей, найденных по словам, с ранжированием bm25
+async def search_users(
+    session: AsyncSession,
+    keywords: str,
+    limit: int,
+    after_position: Optional[int] = None,
+    before_position: Optional[int] = None,
+):
+    """
+    Возвращает страницу результатов полнотекстового поиска после позиции
+    after_position (или перед before_position) и общее количество
+    найденных. Строки те же, что у get_user_list: позиция в выдаче
+    служит курсором, т.к. порядок задан релевантностью, а не id.
+    """
+    query = build_fts_query(keywords)
+    if query is None:
+        return [], 0
+    matches = select(
+        users_fts.c.rowid.label('id'),
+        func.bm25(
+            literal_column('users_fts'), *SEARCH_FTS_WEIGHTS
+        ).label('score'),
+    ).where(
+        text('users_fts MATCH :query').bindparams(query=query)
+    ).subquery()
+    ranked = select(
+        User.id,
+        User.sber_id,
+        User.team_name,
+        func.count().over().label('total'),
+        func.row_number().over(
+            order_by=(matches.c.score, User.id)
+        ).label('position'),
+    ).join(matches, User.id == matches.c.id).where(
+        User.is_registered
+    ).subquery()
+    page = select(ranked)
+    if before_position is not None:
+        page = page.where(
+            ranked.c.position < before_position
+        ).order_by(ranked.c.position.desc())
+    else:
+        if after_position is not None:
+            page = page.where(ranked.c.position > after_position)
+        page = page.order_by(ranked.c.position)
+    result = await session.execute(page.limit(limit))
+    users_list = result.all()
+    if before_position is not None:
+        users_list.reverse()
+    count = users_list[0].total if users_list else 0
+    return users_list, count
 
 
 async def download_file(
@@ -362,7 +471,7 @@ async def download_file(
     os.makedirs("./temp", exist_ok=True)
     file_path = f"./temp/{message.document.file_name}"
 
-    if not message.document.file_name.endswith(".json"):
+    if not message.document.file_name.endswith(FIXTURE_FILE_EXTENSIONS):
         await message.answer(Messages.ERROR_FILE_FORMAT_MESSAGES)
         return None
 
@@ -383,34 +492,6 @@ async def download_file(
     return file_path
 
 
-async def load_json_data(file_path):
-    # Чтение JSON и проверка данных
-    async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-        content = await f.read()
-        return json.loads(content)
-
-
-async def load_existing_data(session):
-    existing_users = {
-        user.telegram_id: user for user in (
-            await session.execute(select(User))
-        ).scalars()
-    }
-    existing_levels = {
-        level.id: level for level in (
-            await session.execute(select(Level))
-        ).scalars()
-    }
-    return existing_users, existing_levels
-
-
-def find_duplicates(data, field):
-    field_values = [user.get(field) for user in data["users"] if field in user]
-    return [
-        value for value in set(field_values) if field_values.count(value) > 1
-    ]
-
-
 async def get_user_db_data(db: AsyncSession, telegram_id: int) -> bool:
     # Выполняем запрос для получения информации по пользователю
     result = await db.execute(
@@ -442,92 +523,103 @@ async def get_user_db_data(db: AsyncSession, telegram_id: int) -> bool:
 async def processing_user_list(
     state: FSMContext,
     session: AsyncSession,
-    callback_query: CallbackQuery,
-    list_counter: int
+    callback_query: Union[CallbackQuery, Message],
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
 ):
-    get_data = await state.get_data()
-    users_list, count = await get_user_list(
-        session,
-        level_id=get_data['level_id'],
-        offset=get_data['offset'],
-        limit=get_data['limit'],
-        role=get_data['role'],
+    # Список выводится по нажатию кнопки или в ответ на поиск по словам
+    message = (
+        callback_query if isinstance(callback_query, Message)
+        else callback_query.message
     )
+    get_data = await state.get_data()
+    limit = int(get_data['limit'])
+    keywords = get_data.get('keywords')
+
+    async def fetch_page(after=None, before=None):
+        # В поиске по словам курсор - позиция в ранжированной выдаче
+        if keywords:
+            return await search_users(
+                session, keywords, limit,
+                after_position=after, before_position=before,
+            )
+        # При листании номер курсора берется из состояния
+        if after is not None:
+            cursor_position = get_data.get('last_position') or 0
+        else:
+            cursor_position = get_data.get('first_position') or 0
+        paging = after is not None or before is not None
+        return await get_user_list(
+            session,
+            level_id=get_data['level_id'],
+            limit=limit,
+            role_id=get_data.get('role_id'),
+            after_id=after,
+            before_id=before,
+            cursor_position=cursor_position if paging else 0,
+        )
+
+    users_list, count = await fetch_page(after_id, before_id)
+    if not users_list and (after_id is not None or before_id is not None):
+        # Список изменился, пока его листали, показываем его с начала
+        users_list, count = await fetch_page()
     builder = InlineKeyboardBuilder()
     for user in users_list:
         await get_card_button(user, builder)
     builder.adjust(1)
-    await callback_query.message.answer(
+    await message.answer(
         Messages.LIST_OUTPUT,
         reply_markup=builder.as_markup(resize_keyboard=True)
     )
     if count == 0:
         keyboard = await get_buttons(back=Buttons.BACK)
-        await state.update_data(offset=START_OFFSET)
-        return await callback_query.message.answer(
+        return await message.answer(
             Messages.NOTHING_WAS_FIND,
             reply_markup=keyboard
         )
-    elif count < get_data['limit']:
+    elif count < limit:
         keyboard = await get_buttons(to_begin=Buttons.TO_BEGIN)
-        await state.update_data(offset=START_OFFSET)
-        return await callback_query.message.answer(
+        return await message.answer(
             Messages.LOOK_OR_BACK,
             reply_markup=keyboard
         )
     else:
-        if get_data['offset'] == 0:
-            if (
-                count == int(get_data['limit'])
-            ):
+        first_user, last_user = users_list[0], users_list[-1]
+        has_next = last_user.position < count
+        next_button = Buttons.NEXT.format(last_user.position + 1, count)
+        if first_user.position == 1:
+            if has_next:
                 keyboard = await get_buttons(
-                    to_begin=Buttons.TO_BEGIN
+                    to_begin=Buttons.TO_BEGIN,
+                    next=next_button
                 )
             else:
-                next_start_pag = (
-                    int(get_data['offset']) + int(get_data['limit']) + 1
-                )
                 keyboard = await get_buttons(
-                    to_begin=Buttons.TO_BEGIN,
-                    next=Buttons.NEXT.format(
-                        next_start_pag,
-                        count
-                    )
+                    to_begin=Buttons.TO_BEGIN
                 )
         else:
-            if int(get_data['offset']) + int(get_data['limit']) < count:
-                next_start_pag = (
-                    int(get_data['offset']) + int(get_data['limit']) + 1
-                )
-                previous_end_pag = int(get_data['offset'])
+            back_button = Buttons.BACK.format(1, first_user.position - 1)
+            if has_next:
                 keyboard = await get_buttons(
-                    back=Buttons.BACK.format(
-                        1,
-                        previous_end_pag
-                    ),
-                    next=Buttons.NEXT.format(
-                        next_start_pag,
-                        count
-                    ),
+                    back=back_button,
+                    next=next_button,
                     to_begin=Buttons.TO_BEGIN
                 )
             else:
-                previous_end_pag = int(get_data['offset'])
                 keyboard = await get_buttons(
-                    back=Buttons.BACK.format(
-                        1,
-                        previous_end_pag
-                    ),
+                    back=back_button,
                     to_begin=Buttons.TO_BEGIN
                 )
-        if count % int(get_data['limit']) != 0:
-            all_list_count = count // int(get_data['limit']) + 1
-        else:
-            all_list_count = count // int(get_data['limit'])
-        await state.update_data(offset=get_data['offset'] + len(users_list))
-        list_counter += 1
-        await state.update_data(list_counter=list_counter)
-        return await callback_query.message.answer(
+        # Курсоры текущей страницы для перехода вперед/назад
+        await state.update_data(
+            first_id=first_user.position if keywords else first_user.id,
+            last_id=last_user.position if keywords else last_user.id,
+            first_position=first_user.position,
+            last_position=last_user.position,
+        )
+        list_counter = (first_user.position - 1) // limit + 1
+        all_list_count = (count + limit - 1) // limit
+        return await message.answer(
             Messages.LOOK_OR_NEXT_OR_BACK.format(
                 list_counter,
                 all_list_count
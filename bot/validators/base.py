@@ -1,11 +1,11 @@
 import re
+from typing import Optional
 
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
-from database.models import User
+from .uniqueness import uniqueness_index
 
 
 async def validate_length(
@@ -35,14 +35,17 @@ async def validate_existence(
         value: str,
         session: AsyncSession,
         error_message: str,
-        field_name: str
+        field_name: str,
+        telegram_id: Optional[int] = None,
 ):
-    """Проверка существования значения в базе данных по указанному полю."""
-    query = await session.execute(
-        select(User).where(getattr(User, field_name) == value)
-    )
-    existing_user = query.scalar()
-    if existing_user and existing_user.is_registered:
+    """
+    Проверка, что значение поля не занято другим зарегистрированным
+    пользователем. Сначала проверяется индекс в памяти, БД - только
+    при совпадении.
+    """
+    if await uniqueness_index.is_taken(
+        session, field_name, value, telegram_id
+    ):
         return error_message
     return None
 
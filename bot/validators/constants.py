@@ -49,6 +49,15 @@ class ValidatorsMessages:
         f"Такой пользователь уже есть. Поищи канал в списке своих чатов\n"
         f"или напиши нам на почту: {ValidatorsStrValues.SUPPORT_EMAIL}."
     )
+    SBER_ID_EXIST_ERROR = (
+        "Пользователь с таким именем в СберЧате уже зарегистрирован.\n"
+        "Проверь имя или напиши нам на почту: "
+        f"{ValidatorsStrValues.SUPPORT_EMAIL}."
+    )
+    USERNAME_EXIST_ERROR = (
+        f"Твой username в Telegram уже указан у другого участника.\n"
+        f"Напиши нам на почту: {ValidatorsStrValues.SUPPORT_EMAIL}."
+    )
     ROLE_ERROR = (
         "Введите, пожалуйста, корректный уровень и роль через пробел\n"
         "Например, Senior python разработчик"
@@ -0,0 +1,110 @@
+import logging
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from database.models import User
+from logger.logmessages import LogMessage
+from settings import UNIQUENESS_INDEX_TTL
+
+db_logger = logging.getLogger('DB_LOGGER')
+
+# Поля, уникальные среди зарегистрированных пользователей
+UNIQUE_FIELDS = ('school21_nickname', 'sber_id', 'username')
+
+
+class UniquenessIndex:
+    """
+    Занятые зарегистрированными пользователями значения уникальных полей
+    в памяти процесса: значение -> telegram_id владельца. Загружается
+    при старте, обновляется после каждой записи пользователя ботом и
+    перечитывается раз в UNIQUENESS_INDEX_TTL (изменения из админ-панели).
+    Промах означает, что значение свободно, совпадение проверяется
+    запросом EXISTS по уникальному индексу: запись могли изменить
+    в другом процессе.
+    """
+
+    def __init__(self):
+        self._owners: Dict[str, Dict[str, int]] = {
+            field: {} for field in UNIQUE_FIELDS
+        }
+        # Обратное соответствие: telegram_id -> занятые им значения
+        self._values: Dict[int, Dict[str, str]] = {}
+        self._loaded_at: Optional[float] = None
+
+    async def load(self, session: AsyncSession):
+        result = await session.execute(
+            select(
+                User.telegram_id,
+                *(getattr(User, field) for field in UNIQUE_FIELDS)
+            ).where(User.is_registered)
+        )
+        self._owners = {field: {} for field in UNIQUE_FIELDS}
+        self._values = {}
+        users = result.all()
+        for user in users:
+            self.update(user.telegram_id, True, **{
+                field: getattr(user, field) for field in UNIQUE_FIELDS
+            })
+        self._loaded_at = time.monotonic()
+        db_logger.info(LogMessage.UNIQUENESS_INDEX_LOADED.format(len(users)))
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > UNIQUENESS_INDEX_TTL
+        ):
+            await self.load(session)
+
+    def invalidate(self):
+        """Перечитать при следующей проверке (массовые изменения)."""
+        self._loaded_at = None
+
+    def update(
+        self, telegram_id: int, is_registered: bool, **values: Optional[str]
+    ):
+        """Учет записанного пользователя: прежние значения освобождаются,
+        новые заняты, если регистрация завершена."""
+        for field, value in self._values.pop(telegram_id, {}).items():
+            if self._owners[field].get(value) == telegram_id:
+                del self._owners[field][value]
+        if not is_registered:
+            return
+        current = {
+            field: values[field] for field in UNIQUE_FIELDS
+            if values.get(field) is not None
+        }
+        for field, value in current.items():
+            self._owners[field][value] = telegram_id
+        if telegram_id is not None:
+            self._values[telegram_id] = current
+
+    async def is_taken(
+        self,
+        session: AsyncSession,
+        field: str,
+        value: str,
+        telegram_id: Optional[int] = None,
+    ) -> bool:
+        """Занято ли значение другим зарегистрированным пользователем."""
+        await self.ensure_loaded(session)
+        owners = self._owners[field]
+        if value not in owners or (
+            telegram_id is not None and owners[value] == telegram_id
+        ):
+            return False
+        column = getattr(User, field)
+        condition = exists().where(column == value, User.is_registered)
+        if telegram_id is not None:
+            condition = condition.where(User.telegram_id != telegram_id)
+        if await session.scalar(select(condition)):
+            return True
+        # Значение освободили в другом процессе
+        owners.pop(value, None)
+        return False
+
+
+uniqueness_index = UniquenessIndex()
@@ -1,4 +1,5 @@
 import re
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -66,9 +67,37 @@ async def validate_sber_id(
     if pattern_error:
         return pattern_error
 
+    # Проверка на существование sber_id в базе данных
+    existence_error = await validate_existence(
+        sber_id,
+        session,
+        ValidatorsMessages.SBER_ID_EXIST_ERROR,
+        'sber_id'
+    )
+    if existence_error:
+        return existence_error
+
     return None
 
 
+async def validate_username(
+        username: Optional[str],
+        session: AsyncSession,
+        telegram_id: int
+):
+    # username задается в Telegram, а не вводится: проверяем, что он не
+    # остался за другим зарегистрированным аккаунтом
+    if username is None:
+        return None
+    return await validate_existence(
+        username,
+        session,
+        ValidatorsMessages.USERNAME_EXIST_ERROR,
+        'username',
+        telegram_id
+    )
+
+
 async def validate_team_name(
     team_name: str,
     session: AsyncSession,
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import re
+import secrets
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import (SimpleRequestHandler,
+                                            setup_application)
+from aiohttp import web
+
+from logger.logmessages import LogMessage
+from settings import (WEBHOOK_BASE_URL, WEBHOOK_HOST, WEBHOOK_PATH,
+                      WEBHOOK_PORT, WEBHOOK_SECRET)
+
+webhook_logger = logging.getLogger('WEBHOOK_LOGGER')
+
+# Допустимый секрет вебхука (ограничение Bot API)
+_SECRET_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,256}')
+
+
+def check_webhook_config(
+    base_url: Optional[str], secret: Optional[str]
+) -> Optional[str]:
+    """Описание ошибки в настройках вебхука или None, если их можно
+    передать в setWebhook."""
+    if not base_url:
+        return LogMessage.WEBHOOK_NO_BASE_URL
+    if not base_url.startswith('https://'):
+        return LogMessage.WEBHOOK_NOT_HTTPS.format(base_url)
+    if secret and not _SECRET_PATTERN.fullmatch(secret):
+        return LogMessage.WEBHOOK_BAD_SECRET
+    return None
+
+
+def create_webhook_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    secret_token: Optional[str],
+    path: str = WEBHOOK_PATH,
+) -> web.Application:
+    """
+    aiohttp-приложение для приема апдейтов от Telegram.
+    Запросы без верного секрета отклоняются, апдейт передается
+    диспетчеру в фоне, и Telegram получает ответ, не дожидаясь
+    завершения обработчика.
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=secret_token,
+    ).register(app, path=path)
+    # Запуск и остановка приложения вызывают startup/shutdown диспетчера
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot):
+    """Регистрация вебхука в Telegram и запуск aiohttp-сервера."""
+    # Настройки проверяются до запуска сервера, чтобы не упасть
+    # на регистрации вебхука с непонятной ошибкой
+    error = check_webhook_config(WEBHOOK_BASE_URL, WEBHOOK_SECRET)
+    if error is not None:
+        webhook_logger.error(LogMessage.WEBHOOK_CONFIG_ERROR.format(error))
+        return
+    secret_token = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    app = create_webhook_app(dispatcher, bot, secret_token)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+    await site.start()
+    # Апдейты, пришедшие во время перезапуска, не сбрасываются:
+    # Telegram доставит их на вебхук после старта
+    await bot.set_webhook(
+        url=WEBHOOK_BASE_URL.rstrip('/') + WEBHOOK_PATH,
+        secret_token=secret_token,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    webhook_logger.info(
+        LogMessage.WEBHOOK_STARTED.format(WEBHOOK_HOST, WEBHOOK_PORT)
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,32 @@
+"""search_indexes
+
+Revision ID: 4aa4be4dd9fc
+Revises: bac4e1892f15
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4aa4be4dd9fc'
+down_revision: Union[str, None] = 'bac4e1892f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_search', ['role', 'level_id'], unique=False, sqlite_where=sa.text('is_registered = 1'))
+        batch_op.create_index('ix_users_incomplete', ['is_registered', 'field_not_filled'], unique=False)
+        batch_op.create_index('ix_users_registration_date', ['is_registered', 'registration_date'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_registration_date')
+        batch_op.drop_index('ix_users_incomplete')
+        batch_op.drop_index('ix_users_search')
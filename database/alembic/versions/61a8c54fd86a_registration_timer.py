@@ -0,0 +1,37 @@
+"""registration_timer
+
+Revision ID: 61a8c54fd86a
+Revises: b652be3b6e80
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '61a8c54fd86a'
+down_revision: Union[str, None] = 'b652be3b6e80'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('registration_timer',
+    sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+    sa.Column('chat_id', sa.BigInteger(), nullable=True),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('deadline', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('telegram_id')
+    )
+    with op.batch_alter_table('registration_timer', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_registration_timer_deadline'), ['deadline'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('registration_timer', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_registration_timer_deadline'))
+
+    op.drop_table('registration_timer')
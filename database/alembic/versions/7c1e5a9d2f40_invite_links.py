@@ -0,0 +1,38 @@
+"""invite_links
+
+Revision ID: 7c1e5a9d2f40
+Revises: e4bb69f3bc27
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e5a9d2f40'
+down_revision: Union[str, None] = 'e4bb69f3bc27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('invite_links',
+    sa.Column('link', sa.String(), nullable=False),
+    sa.Column('expire_date', sa.Integer(), nullable=False),
+    sa.Column('telegram_id', sa.BigInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('link')
+    )
+    with op.batch_alter_table('invite_links', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_invite_links_telegram_id'), ['telegram_id'], unique=False)
+        batch_op.create_index('ix_invite_links_free', ['expire_date'], unique=False, sqlite_where=sa.text('telegram_id IS NULL'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('invite_links', schema=None) as batch_op:
+        batch_op.drop_index('ix_invite_links_free')
+        batch_op.drop_index(batch_op.f('ix_invite_links_telegram_id'))
+
+    op.drop_table('invite_links')
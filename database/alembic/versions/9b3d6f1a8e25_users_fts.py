@@ -0,0 +1,56 @@
+"""users_fts
+
+Revision ID: 9b3d6f1a8e25
+Revises: 7c1e5a9d2f40
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3d6f1a8e25'
+down_revision: Union[str, None] = '7c1e5a9d2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FTS_ADD = """
+    INSERT INTO users_fts (rowid, description, team_name, role)
+    VALUES (NEW.id, NEW.description, NEW.team_name, NEW.role);
+"""
+FTS_REMOVE = """
+    INSERT INTO users_fts (users_fts, rowid, description, team_name, role)
+    VALUES ('delete', OLD.id, OLD.description, OLD.team_name, OLD.role);
+"""
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+        "description, team_name, role, content='users', "
+        "content_rowid='id', tokenize='unicode61 remove_diacritics 2', "
+        "prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tr_users_fts_insert "
+        "AFTER INSERT ON users BEGIN" + FTS_ADD + "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tr_users_fts_delete "
+        "AFTER DELETE ON users BEGIN" + FTS_REMOVE + "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tr_users_fts_update "
+        "AFTER UPDATE OF description, team_name, role ON users "
+        "BEGIN" + FTS_REMOVE + FTS_ADD + "END"
+    )
+    # Индексирование уже существующих пользователей
+    op.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS tr_users_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS tr_users_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS tr_users_fts_insert")
+    op.execute("DROP TABLE IF EXISTS users_fts")
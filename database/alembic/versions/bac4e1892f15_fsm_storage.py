@@ -0,0 +1,37 @@
+"""fsm_storage
+
+Revision ID: bac4e1892f15
+Revises: 61a8c54fd86a
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'bac4e1892f15'
+down_revision: Union[str, None] = '61a8c54fd86a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('fsm_storage',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('state', sa.String(), nullable=True),
+    sa.Column('data', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('fsm_storage', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_fsm_storage_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('fsm_storage', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_fsm_storage_updated_at'))
+
+    op.drop_table('fsm_storage')
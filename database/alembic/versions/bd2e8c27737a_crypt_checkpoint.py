@@ -0,0 +1,32 @@
+"""crypt_checkpoint
+
+Revision ID: bd2e8c27737a
+Revises: 4aa4be4dd9fc
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd2e8c27737a'
+down_revision: Union[str, None] = '4aa4be4dd9fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('admin_settings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('crypt_in_progress', sa.Boolean(), nullable=True))
+        batch_op.add_column(sa.Column('crypt_table', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('crypt_last_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('admin_settings', schema=None) as batch_op:
+        batch_op.drop_column('crypt_last_id')
+        batch_op.drop_column('crypt_table')
+        batch_op.drop_column('crypt_in_progress')
@@ -0,0 +1,43 @@
+"""roles
+
+Revision ID: c5a2e8f47b19
+Revises: 9b3d6f1a8e25
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a2e8f47b19'
+down_revision: Union[str, None] = '9b3d6f1a8e25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('roles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=256), nullable=False),
+    sa.Column('name', sa.String(length=256), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    # Без пересоздания таблицы users, чтобы сохранить ее триггеры.
+    # role_id заполняется при старте бота (нормализация ролей в Python)
+    # или командой python -m database.backfill_roles
+    op.execute(
+        "ALTER TABLE users ADD COLUMN role_id INTEGER REFERENCES roles (id)"
+    )
+    op.drop_index('ix_users_search', table_name='users')
+    op.create_index('ix_users_search', 'users', ['role_id', 'level_id'], unique=False, sqlite_where=sa.text('is_registered = 1'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_search', table_name='users')
+    op.create_index('ix_users_search', 'users', ['role', 'level_id'], unique=False, sqlite_where=sa.text('is_registered = 1'))
+    op.execute("ALTER TABLE users DROP COLUMN role_id")
+    op.drop_table('roles')
@@ -0,0 +1,81 @@
+"""registration_daily_stats
+
+Revision ID: e4bb69f3bc27
+Revises: bd2e8c27737a
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4bb69f3bc27'
+down_revision: Union[str, None] = 'bd2e8c27737a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATS_ADD = """
+    INSERT INTO registration_daily_stats
+        (date, total, registered, abandoned)
+    SELECT date(NEW.registration_date), 1,
+           NEW.is_registered IS 1, NEW.is_registered IS NOT 1
+    WHERE NEW.registration_date IS NOT NULL
+    ON CONFLICT (date) DO UPDATE SET
+        total = total + 1,
+        registered = registered + excluded.registered,
+        abandoned = abandoned + excluded.abandoned;
+"""
+STATS_REMOVE = """
+    UPDATE registration_daily_stats SET
+        total = total - 1,
+        registered = registered - (OLD.is_registered IS 1),
+        abandoned = abandoned - (OLD.is_registered IS NOT 1)
+    WHERE date = date(OLD.registration_date);
+    DELETE FROM registration_daily_stats
+    WHERE date = date(OLD.registration_date) AND total <= 0;
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'registration_daily_stats',
+        sa.Column('date', sa.String(length=10), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('registered', sa.Integer(), nullable=False),
+        sa.Column('abandoned', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('date')
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tr_users_stats_insert "
+        "AFTER INSERT ON users BEGIN" + STATS_ADD + "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tr_users_stats_delete "
+        "AFTER DELETE ON users BEGIN" + STATS_REMOVE + "END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tr_users_stats_update "
+        "AFTER UPDATE OF registration_date, is_registered ON users "
+        "WHEN date(OLD.registration_date) IS NOT date(NEW.registration_date) "
+        "OR (OLD.is_registered IS 1) != (NEW.is_registered IS 1) "
+        "BEGIN" + STATS_REMOVE + STATS_ADD + "END"
+    )
+    # Заполнение по уже существующим пользователям
+    op.execute(
+        "INSERT INTO registration_daily_stats "
+        "(date, total, registered, abandoned) "
+        "SELECT date(registration_date), count(*), "
+        "sum(is_registered IS 1), sum(is_registered IS NOT 1) "
+        "FROM users WHERE registration_date IS NOT NULL "
+        "GROUP BY date(registration_date)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS tr_users_stats_update")
+    op.execute("DROP TRIGGER IF EXISTS tr_users_stats_delete")
+    op.execute("DROP TRIGGER IF EXISTS tr_users_stats_insert")
+    op.drop_table('registration_daily_stats')
@@ -0,0 +1,19 @@
+"""
+Проставление users.role_id по справочнику ролей для пользователей,
+у которых его нет. Бот выполняет то же самое при старте.
+Запуск из корня проекта: python -m database.backfill_roles
+"""
+import asyncio
+
+from bot.catalog import role_catalog
+from database.models import AsyncSessionLocal, engine
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        await role_catalog.backfill(session)
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
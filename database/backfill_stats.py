@@ -0,0 +1,18 @@
+"""
+Пересчет таблицы registration_daily_stats по таблице users.
+Запуск из корня проекта: python -m database.backfill_stats
+"""
+import asyncio
+
+from database.models import (AsyncSessionLocal, backfill_registration_stats,
+                             engine)
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        await backfill_registration_stats(session)
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import random
+import sqlite3
+from functools import wraps
+
+from sqlalchemy import event, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    create_async_engine)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from logger.logmessages import LogMessage
+from settings import (DB_BUSY_BACKOFF_MAX_MS, DB_BUSY_BACKOFF_MS,
+                      DB_BUSY_RETRIES, SQLITE_BUSY_TIMEOUT_MS,
+                      SQLITE_CACHE_SIZE_KIB, SQLITE_MMAP_SIZE,
+                      SQLITE_SYNCHRONOUS)
+
+db_logger = logging.getLogger("DB_LOGGER")
+
+# Базовый код ошибки SQLite "база данных занята"
+SQLITE_BUSY = 5
+_BUSY_MESSAGES = ('database is locked', 'database is busy')
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Настройка каждого нового соединения пула: busy_timeout - ждать
+    освобождения блокировки вместо немедленной ошибки, кэш страниц
+    и mmap действуют, пока соединение живет в пуле.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        # Отрицательное значение cache_size задает размер в КиБ
+        cursor.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}')
+        cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str, **kwargs) -> AsyncEngine:
+    """
+    Движок БД, общий для бота и админ-панели. Соединения с файлом
+    SQLite держатся в пуле, и настройки из settings выполняются один
+    раз на соединение, а не на каждую сессию. Потоки соединений
+    aiosqlite не фоновые: процесс должен закрыть движок
+    (engine.dispose()) перед выходом.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite' and parsed.database not in (
+        None, '', ':memory:'
+    ):
+        kwargs.setdefault('poolclass', AsyncAdaptedQueuePool)
+    engine = create_async_engine(url, **kwargs)
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine.sync_engine, 'connect', _set_sqlite_pragmas)
+    return engine
+
+
+async def enable_wal(engine: AsyncEngine):
+    """
+    Перевод БД в режим WAL: чтение не ждет записи из другого процесса.
+    Режим сохраняется в файле БД, поэтому достаточно одного раза
+    при старте.
+    """
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+
+
+def is_busy_error(error: Exception) -> bool:
+    """Ошибка вызвана тем, что БД заблокирована другим соединением."""
+    if not isinstance(error, OperationalError):
+        return False
+    orig = error.orig
+    code = getattr(orig, 'sqlite_errorcode', None)
+    if code is not None:
+        # Расширенные коды (SQLITE_BUSY_SNAPSHOT и др.) в младшем байте
+        # содержат базовый код
+        return code & 0xff == SQLITE_BUSY
+    return isinstance(orig, sqlite3.OperationalError) and str(orig) in (
+        _BUSY_MESSAGES
+    )
+
+
+def busy_backoff(attempt: int) -> float:
+    """Задержка (в секундах) перед повтором: экспонента с джиттером."""
+    delay_ms = min(DB_BUSY_BACKOFF_MS * 2 ** attempt, DB_BUSY_BACKOFF_MAX_MS)
+    return delay_ms * random.uniform(0.5, 1) / 1000
+
+
+def retry_on_busy(func):
+    """
+    Повтор записи, если БД занята дольше busy_timeout. Функция должна
+    выполнять транзакцию целиком (с коммитом), чтобы ее можно было
+    повторить. Переданная ей сессия перед повтором откатывается.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        for attempt in range(DB_BUSY_RETRIES + 1):
+            try:
+                return await func(*args, **kwargs)
+            except OperationalError as error:
+                if attempt == DB_BUSY_RETRIES or not is_busy_error(error):
+                    raise
+                for value in (*args, *kwargs.values()):
+                    if isinstance(value, AsyncSession):
+                        await value.rollback()
+                delay = busy_backoff(attempt)
+                db_logger.warning(LogMessage.DB_BUSY_RETRY.format(
+                    func.__qualname__, attempt + 1, DB_BUSY_RETRIES,
+                    round(delay * 1000),
+                ))
+                await asyncio.sleep(delay)
+    return wrapper
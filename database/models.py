@@ -4,12 +4,16 @@ from datetime import datetime
 
 import pytz
 from dotenv import load_dotenv
-from sqlalchemy import (BigInteger, Boolean, Column, DateTime, ForeignKey,
-                        Integer, String)
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import (DDL, BigInteger, Boolean, Column, DateTime, ForeignKey,
+                        Index, Integer, String, Text, case, delete, event,
+                        func, insert, text)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.sql import column, table
 
+from database.engine import create_db_engine, enable_wal
+from database.sql_stats import install_sql_timing
 from logger.logmessages import LogMessage
 from settings import DATE_FORMAT
 
@@ -19,8 +23,11 @@ CHANNEL_ID = os.getenv("CHANNEL_ID")
 db_logger = logging.getLogger("DB_LOGGER")
 
 
-# Создаем асинхронный движок
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Создаем асинхронный движок (общая фабрика бота и админ-панели:
+# WAL и настройки SQLite). Вместо вывода каждого запроса (echo)
+# замеряем время выполнения, медленные запросы пишутся в лог с планом
+engine = create_db_engine(DATABASE_URL)
+install_sql_timing(engine)
 
 # Настройка сессии для работы с базой данных
 AsyncSessionLocal = sessionmaker(
@@ -49,6 +56,8 @@ class User(Base):
     team_name = Column(String(256))
     # Пользователь вводит уровень + роль
     role = Column(String(256))
+    # Нормализованная роль из справочника roles, по ней идет поиск
+    role_id = Column(Integer, ForeignKey("roles.id"))
     # Внешний ключ на уровень
     level_id = Column(Integer, ForeignKey("level.id"))
     # Вкратце описание, над чем работает человек
@@ -65,6 +74,20 @@ class User(Base):
     # Первое незаполненное поле у пользователей, прервавших регистрацию
     field_not_filled = Column(String(64), default=None)
 
+    __table_args__ = (
+        # Поиск коллег по роли и уровню среди зарегистрированных
+        Index(
+            'ix_users_search', 'role_id', 'level_id',
+            sqlite_where=text('is_registered = 1'),
+        ),
+        # Статистика незавершенных регистраций в админ-панели
+        Index('ix_users_incomplete', 'is_registered', 'field_not_filled'),
+        # Статистика регистраций по датам в админ-панели
+        Index(
+            'ix_users_registration_date', 'is_registered', 'registration_date'
+        ),
+    )
+
     # Определяем отношения с другими таблицами
     level = relationship("Level")
 
@@ -102,6 +125,16 @@ class Level(Base):
         }
 
 
+class Role(Base):
+    __tablename__ = "roles"
+    id = Column(Integer, primary_key=True)
+    # Нормализованное название (регистр, пробелы, синонимы), по нему
+    # одинаковые роли, введенные по-разному, получают один id
+    key = Column(String(256), unique=True, nullable=False)
+    # Название для клавиатуры поиска (первое введенное написание)
+    name = Column(String(256), nullable=False)
+
+
 class AdminSettings(Base):
     __tablename__ = "admin_settings"
     id = Column(Integer, primary_key=True, index=True)
@@ -120,9 +153,167 @@ class AdminSettings(Base):
     # Связь с таблицей пользователей (администратор, который сделал изменение)
     updated_by_user = relationship("User", foreign_keys=[updated_by])
 
+    # Контрольная точка шифрования/дешифровки БД: идет ли перешифровка,
+    # текущая таблица и id последней обработанной строки в ней
+    crypt_in_progress = Column(Boolean, default=False)
+    crypt_table = Column(String(16))
+    crypt_last_id = Column(Integer)
+
+
+class RegistrationTimer(Base):
+    __tablename__ = "registration_timer"
+    # Telegram ID пользователя, проходящего регистрацию
+    telegram_id = Column(BigInteger, primary_key=True)
+    # Чат, в который отправляется сообщение о прерывании регистрации
+    chat_id = Column(BigInteger)
+    # telegram_username на момент запуска таймера
+    username = Column(String)
+    # Момент прерывания регистрации (unix time)
+    deadline = Column(Integer, index=True)
+
+
+class FSMRecord(Base):
+    __tablename__ = "fsm_storage"
+    # Ключ хранилища FSM (бот, чат, пользователь)
+    key = Column(String, primary_key=True)
+    # Текущее состояние FSM
+    state = Column(String)
+    # Данные FSM в формате JSON
+    data = Column(Text)
+    # Время последнего изменения (unix time), для удаления по TTL
+    updated_at = Column(Integer, index=True)
+
+
+class InviteLink(Base):
+    __tablename__ = "invite_links"
+    # Одноразовая ссылка-приглашение в канал сообщества
+    link = Column(String, primary_key=True)
+    # Момент окончания действия ссылки (unix time)
+    expire_date = Column(Integer, nullable=False)
+    # Пользователь, которому выдана ссылка, NULL - ссылка в запасе
+    telegram_id = Column(BigInteger, index=True)
+
+    __table_args__ = (
+        # Выдача свободной ссылки с ближайшим сроком действия
+        Index(
+            'ix_invite_links_free', 'expire_date',
+            sqlite_where=text('telegram_id IS NULL'),
+        ),
+    )
+
+
+class RegistrationDailyStats(Base):
+    __tablename__ = "registration_daily_stats"
+    # Дата регистрации в формате YYYY-MM-DD
+    date = Column(String(10), primary_key=True)
+    # Пользователи, начавшие регистрацию в этот день
+    total = Column(Integer, default=0, nullable=False)
+    # Из них завершили регистрацию
+    registered = Column(Integer, default=0, nullable=False)
+    # Из них прервали регистрацию
+    abandoned = Column(Integer, default=0, nullable=False)
+
+
+# Триггеры, поддерживающие registration_daily_stats при любом изменении
+# users (бот, админ-панель, импорт фикстур) в той же транзакции
+_STATS_ADD = """
+    INSERT INTO registration_daily_stats
+        (date, total, registered, abandoned)
+    SELECT date(NEW.registration_date), 1,
+           NEW.is_registered IS 1, NEW.is_registered IS NOT 1
+    WHERE NEW.registration_date IS NOT NULL
+    ON CONFLICT (date) DO UPDATE SET
+        total = total + 1,
+        registered = registered + excluded.registered,
+        abandoned = abandoned + excluded.abandoned;
+"""
+_STATS_REMOVE = """
+    UPDATE registration_daily_stats SET
+        total = total - 1,
+        registered = registered - (OLD.is_registered IS 1),
+        abandoned = abandoned - (OLD.is_registered IS NOT 1)
+    WHERE date = date(OLD.registration_date);
+    DELETE FROM registration_daily_stats
+    WHERE date = date(OLD.registration_date) AND total <= 0;
+"""
+REGISTRATION_STATS_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS tr_users_stats_insert "
+    "AFTER INSERT ON users BEGIN" + _STATS_ADD + "END",
+    "CREATE TRIGGER IF NOT EXISTS tr_users_stats_delete "
+    "AFTER DELETE ON users BEGIN" + _STATS_REMOVE + "END",
+    "CREATE TRIGGER IF NOT EXISTS tr_users_stats_update "
+    "AFTER UPDATE OF registration_date, is_registered ON users "
+    "WHEN date(OLD.registration_date) IS NOT date(NEW.registration_date) "
+    "OR (OLD.is_registered IS 1) != (NEW.is_registered IS 1) "
+    "BEGIN" + _STATS_REMOVE + _STATS_ADD + "END",
+)
+for trigger in REGISTRATION_STATS_TRIGGERS:
+    event.listen(Base.metadata, "after_create", DDL(trigger))
+
+
+# Полнотекстовый индекс FTS5 по описанию, команде и роли. Таблица
+# хранит только индекс (content='users'), триггеры поддерживают его
+# при любом изменении users
+users_fts = table("users_fts", column("rowid"))
+_FTS_COLUMNS = "description, team_name, role"
+_FTS_ADD = (
+    f" INSERT INTO users_fts (rowid, {_FTS_COLUMNS})"
+    " VALUES (NEW.id, NEW.description, NEW.team_name, NEW.role);"
+)
+_FTS_REMOVE = (
+    f" INSERT INTO users_fts (users_fts, rowid, {_FTS_COLUMNS})"
+    " VALUES ('delete', OLD.id, OLD.description, OLD.team_name, OLD.role);"
+)
+USERS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+    f"{_FTS_COLUMNS}, content='users', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS tr_users_fts_insert "
+    "AFTER INSERT ON users BEGIN" + _FTS_ADD + " END",
+    "CREATE TRIGGER IF NOT EXISTS tr_users_fts_delete "
+    "AFTER DELETE ON users BEGIN" + _FTS_REMOVE + " END",
+    "CREATE TRIGGER IF NOT EXISTS tr_users_fts_update "
+    f"AFTER UPDATE OF {_FTS_COLUMNS} ON users "
+    "BEGIN" + _FTS_REMOVE + _FTS_ADD + " END",
+)
+for statement in USERS_FTS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement))
+
+
+async def backfill_registration_stats(session: AsyncSession):
+    """Пересчет registration_daily_stats по всей таблице users."""
+    registration_day = func.date(User.registration_date)
+    registered = case((User.is_registered.is_(True), 1), else_=0)
+    await session.execute(delete(RegistrationDailyStats))
+    await session.execute(
+        insert(RegistrationDailyStats).from_select(
+            ["date", "total", "registered", "abandoned"],
+            select(
+                registration_day,
+                func.count(),
+                func.sum(registered),
+                func.count() - func.sum(registered),
+            )
+            .where(User.registration_date.isnot(None))
+            .group_by(registration_day)
+        )
+    )
+    await session.commit()
+    db_logger.info(LogMessage.REGISTRATION_STATS_BACKFILLED)
+
+
+async def rebuild_users_fts(session: AsyncSession):
+    """Перестроение полнотекстового индекса по всей таблице users."""
+    await session.execute(
+        text("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+    )
+    await session.commit()
+    db_logger.info(LogMessage.USERS_FTS_REBUILT)
+
 
 async def init_db():
     db_logger.info(LogMessage.START_INIT_DB)
+    await enable_wal(engine)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
         # Проверяем, есть ли данные в таблице Level
@@ -145,6 +336,20 @@ async def init_db():
             await session.commit()
             db_logger.info(LogMessage.JOB_IS_DONE)
 
+        # Таблица статистики создана на уже заполненной БД - заполняем ее
+        stats_exist = await session.scalar(
+            select(RegistrationDailyStats.date).limit(1)
+        )
+        if not stats_exist and await session.scalar(select(User.id).limit(1)):
+            await backfill_registration_stats(session)
+
+        # Полнотекстовый индекс создан на уже заполненной БД - строим его
+        indexed = await session.scalar(
+            text("SELECT id FROM users_fts_docsize LIMIT 1")
+        )
+        if not indexed and await session.scalar(select(User.id).limit(1)):
+            await rebuild_users_fts(session)
+
         admin_settings = await session.execute(
             select(AdminSettings)
         )
@@ -0,0 +1,158 @@
+import bisect
+import logging
+import re
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from logger.logmessages import LogMessage
+from settings import (SQL_HISTOGRAM_BUCKETS_MS, SQL_SLOW_QUERY_MS,
+                      SQL_STATS_MAX_STATEMENTS)
+
+sql_logger = logging.getLogger('SQL_LOGGER')
+
+# Литералы и списки параметров заменяются на ?, чтобы запросы,
+# отличающиеся только значениями, попадали в одну гистограмму
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+# Запросы, для которых можно получить EXPLAIN QUERY PLAN
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+# Ключ для запросов сверх SQL_STATS_MAX_STATEMENTS
+OTHER_STATEMENTS = '<other>'
+
+
+def normalize_sql(statement: str) -> str:
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _PARAM_LIST.sub('(?)', statement)
+    statement = _VALUES_ROWS.sub('(?), ...', statement)
+    return _SPACES.sub(' ', statement).strip()
+
+
+class LatencyHistogram:
+    """Гистограмма времени выполнения запроса по корзинам (в мс)."""
+
+    def __init__(self):
+        # Последняя корзина - для значений больше верхней границы
+        self.buckets = [0] * (len(SQL_HISTOGRAM_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms: float):
+        self.buckets[
+            bisect.bisect_left(SQL_HISTOGRAM_BUCKETS_MS, elapsed_ms)
+        ] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Верхняя граница корзины, в которую попадает перцентиль."""
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(SQL_HISTOGRAM_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        labels = [f'<={bound}' for bound in SQL_HISTOGRAM_BUCKETS_MS]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': dict(zip(labels + ['+Inf'], self.buckets)),
+        }
+
+
+class SQLStats:
+    """Гистограммы времени выполнения по нормализованному SQL."""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float):
+        key = normalize_sql(statement)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                if len(self._histograms) >= SQL_STATS_MAX_STATEMENTS:
+                    key = OTHER_STATEMENTS
+                histogram = self._histograms.setdefault(
+                    key, LatencyHistogram()
+                )
+            histogram.add(elapsed_ms)
+
+    def snapshot(self) -> List[dict]:
+        """Статистика по запросам, самые затратные по суммарному времени
+        идут первыми."""
+        with self._lock:
+            rows = [
+                {'sql': sql, **histogram.to_dict()}
+                for sql, histogram in self._histograms.items()
+            ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+sql_stats = SQLStats()
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    """План медленного запроса, выполняется отдельным курсором."""
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return '; '.join(str(row[-1]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+    sql_stats.record(statement, elapsed_ms)
+    if elapsed_ms < SQL_SLOW_QUERY_MS:
+        return
+    plan = None
+    if not executemany and statement.lstrip().upper().startswith(
+        _EXPLAINABLE
+    ):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as error:
+            plan = LogMessage.ERROR.format(error)
+    sql_logger.warning(
+        LogMessage.SLOW_QUERY.format(round(elapsed_ms, 1), statement, plan)
+    )
+
+
+def install_sql_timing(engine: AsyncEngine):
+    """Подключение замера времени выполнения запросов к движку."""
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', _before_cursor_execute
+    )
+    event.listen(
+        engine.sync_engine, 'after_cursor_execute', _after_cursor_execute
+    )
@@ -11,3 +11,10 @@ LOG_FORMAT = (
 DT_FORMAT = '%d-%m-%Y_%H-%M-%S'
 MAXBYTES = 10**6
 BACKUP_COUNT = 5
+# Ротированные файлы логов сжимаются gzip
+COMPRESS_ROTATED = True
+# Очередь записей между потоком приложения и потоком записи логов:
+# размер и поведение при переполнении ('drop' - запись отбрасывается
+# и учитывается в счетчике, 'block' - поток ждет места в очереди)
+LOG_QUEUE_SIZE = 10000
+LOG_QUEUE_POLICY = 'drop'
@@ -1,17 +1,75 @@
+import atexit
+import gzip
 import logging
+import os
+import queue
+import shutil
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
-from .config import (BACKUP_COUNT, BASE_DIR, DT_FORMAT, LOG_FORMAT,
+from .config import (BACKUP_COUNT, BASE_DIR, COMPRESS_ROTATED, DT_FORMAT,
+                     LOG_FORMAT, LOG_QUEUE_POLICY, LOG_QUEUE_SIZE,
                      LOGGING_LEVEL, MAXBYTES)
 
 filename = f'{datetime.now().strftime(DT_FORMAT)}_logfile.log'
 
+# Поток записи логов, запускается в configure_logging
+log_listener: Optional[QueueListener] = None
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Передача записей в ограниченную очередь без файлового ввода-вывода
+    в потоке приложения. При переполнении очереди запись либо
+    отбрасывается (с учетом в счетчике dropped), либо поток ждет места.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block: bool = False):
+        super().__init__(log_queue)
+        self.block = block
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put(record, block=self.block)
+        except queue.Full:
+            # emit вызывается под блокировкой обработчика
+            self.dropped += 1
+
+
+def gzip_rotator(source: str, dest: str):
+    """Сжатие ротированного файла, выполняется в потоке записи логов."""
+    with open(source, 'rb') as source_file:
+        with gzip.open(dest, 'wb') as dest_file:
+            shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+def dropped_log_records() -> int:
+    """Количество записей, отброшенных из-за переполнения очереди."""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, BoundedQueueHandler):
+            return handler.dropped
+    return 0
+
+
+def stop_logging():
+    """Запись оставшихся в очереди логов и остановка потока записи."""
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
 
 def configure_logging():
     """
     Базовая конфигурация логирования.
+    Логгеры пишут записи в ограниченную очередь, а файл и консоль
+    обслуживает отдельный поток QueueListener, поэтому запись, ротация
+    и сжатие файлов не блокируют цикл событий.
     """
+    global log_listener
     log_dir = BASE_DIR / 'logfiles'
     try:
         log_dir.mkdir(exist_ok=True)
@@ -22,9 +80,27 @@ def configure_logging():
     rotating_handler = RotatingFileHandler(
         log_file, maxBytes=MAXBYTES, backupCount=BACKUP_COUNT, encoding="utf-8"
     )
+    if COMPRESS_ROTATED:
+        rotating_handler.namer = lambda name: name + '.gz'
+        rotating_handler.rotator = gzip_rotator
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DT_FORMAT)
+    handlers = (rotating_handler, logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stop_logging()
+    log_listener = QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    log_listener.start()
+    atexit.register(stop_logging)
+    queue_handler = BoundedQueueHandler(
+        log_queue, block=LOG_QUEUE_POLICY == 'block'
+    )
+    # В очередь попадает только текст сообщения (с трейсбеком),
+    # итоговый формат применяют обработчики потока записи
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
     logging.basicConfig(
-        datefmt=DT_FORMAT,
-        format=LOG_FORMAT,
-        level=LOGGING_LEVEL,
-        handlers=(rotating_handler, logging.StreamHandler())
+        level=LOGGING_LEVEL, handlers=(queue_handler,), force=True
     )
@@ -26,13 +26,60 @@ class LogMessage:
     DUMP_BASE_REQUEST: str = (
         "Пользователь {} сделал запрос на дамп базы данных!"
     )
+    SQL_STATS_REQUEST: str = (
+        "Пользователь {} запросил статистику SQL-запросов"
+    )
+    FIXTURES_IMPORTED: str = (
+        "Пользователь {} загрузил фикстуры: пользователи {}, уровни {}"
+    )
     NOT_ENOUGH_RIGHTS: str = (
         "У пользователя {} недостаточно прав на выполнение операции!"
     )
 
+    # webhook
+    WEBHOOK_STARTED: str = "Вебхук-сервер запущен на {}:{}"
+    WEBHOOK_CONFIG_ERROR: str = "Вебхук не запущен, ошибка настроек: {}"
+    WEBHOOK_NO_BASE_URL: str = "не задан WEBHOOK_BASE_URL"
+    WEBHOOK_NOT_HTTPS: str = "WEBHOOK_BASE_URL должен начинаться с https://: {}"
+    WEBHOOK_BAD_SECRET: str = (
+        "WEBHOOK_SECRET должен состоять из 1-256 символов A-Z, a-z, 0-9, _ и -"
+    )
+
+    # scheduler
+    SCHEDULER_STARTED: str = (
+        "Планировщик регистрации запущен, восстановлено таймеров: {}"
+    )
+    REG_TIMER_EXPIRED: str = "Регистрация пользователя {} прервана по таймеру"
+    REG_TIMER_RETRY: str = (
+        "Не удалось прервать регистрацию пользователя {}, повтор через {} с"
+    )
+    REG_TIMER_GAVE_UP: str = (
+        "Не удалось прервать регистрацию пользователя {} за {} попыток, "
+        "таймер будет обработан после перезапуска"
+    )
+    REG_TIMER_NOTIFY_FAILED: str = (
+        "Пользователь {} не получил сообщение о прерванной регистрации: {}"
+    )
+
     # keyboards
     KEYBRD_IS_DONE: str = "Клавиатура подготовлена"
 
     # database
     START_INIT_DB: str = "Инициализация базы данных запущена"
     PRESETTING_VALUES: str = "Установка первичных значений базы данных..."
+    REGISTRATION_STATS_BACKFILLED: str = (
+        "Статистика регистраций по дням пересчитана по таблице users"
+    )
+    CRYPT_RESUMED: str = (
+        "Продолжение прерванной перешифровки: таблица {}, после id {}"
+    )
+    SLOW_QUERY: str = "Медленный запрос ({} мс): {} | план: {}"
+    SEND_RETRY_AFTER: str = "Ограничение Telegram: {} в чат {}, повтор через {} с"
+    INVITE_POOL_REFILLED: str = "Создано ссылок-приглашений в запас: {}"
+    INVITE_POOL_EMPTY: str = "Запас ссылок-приглашений пуст, ссылка создается сразу"
+    USERS_FTS_REBUILT: str = "Полнотекстовый индекс пользователей перестроен"
+    DB_BUSY_RETRY: str = "БД занята ({}), повтор {} из {} через {} мс"
+    ROLES_BACKFILLED: str = "Роль из справочника проставлена пользователям: {}"
+    PEER_INDEX_BUILT: str = "Индекс инлайн-поиска построен, пользователей: {}"
+    UNIQUENESS_INDEX_LOADED: str = "Занятые ники загружены, пользователей: {}"
+    LEVEL_CATALOG_LOADED: str = "Справочник уровней загружен, уровней: {}"
@@ -4,26 +4,65 @@ import logging
 from aiogram.methods.delete_webhook import DeleteWebhook
 from dotenv import find_dotenv, load_dotenv
 
-from bot.bot import bot, dp
+from bot.bot import TELEGRAM_TOKEN, bot, dp
+from bot.catalog import level_catalog, role_catalog
+from bot.crypto import resume_reencryption
 from bot.handlers.admin import router as adm_router
+from bot.handlers.inline import router as inline_router
 from bot.handlers.registration import router as reg_router
 from bot.handlers.search import router as srch_router
-from database.models import init_db
+from bot.invite_pool import invite_link_pool
+from bot.metrics import start_metrics_server
+from bot.scheduler import registration_scheduler
+from bot.sender import send_scheduler
+from bot.validators.uniqueness import uniqueness_index
+from bot.webhook import run_webhook
+from database.models import AsyncSessionLocal, engine, init_db
 from logger.logger import configure_logging
 from logger.logmessages import LogMessage
+from settings import BOT_MODE, INVITE_POOL_SIZE, METRICS_ENABLED
 
 load_dotenv(find_dotenv(), override=True, verbose=True)
 
+# Ссылки на фоновые задачи, чтобы их не удалил сборщик мусора
+background_tasks = set()
+# Сервер метрик Prometheus, запускается при старте бота
+metrics_runner = None
 
-class StartupMiddleware:
-    def __init__(self):
-        self.initialized = False
 
-    async def __call__(self, handler, event, data):
-        if not self.initialized:
-            await init_db()
-            self.initialized = True
-        return await handler(event, data)
+async def on_startup():
+    global metrics_runner
+    await init_db()
+    # Загружаем справочник уровней в память
+    async with AsyncSessionLocal() as session:
+        await level_catalog.load(session)
+        # Нормализуем роли пользователей, у которых нет роли из справочника
+        await role_catalog.backfill(session)
+        # Занятые ники для проверок при регистрации
+        await uniqueness_index.load(session)
+    # Продолжаем прерванную шифровку/дешифровку БД в фоне
+    background_tasks.add(
+        asyncio.create_task(resume_reencryption(TELEGRAM_TOKEN))
+    )
+    # Восстанавливаем таймеры прерывания регистрации из БД
+    await registration_scheduler.start(bot, dp.storage)
+    # Заранее создаем ссылки-приглашения для подтверждения регистрации
+    if INVITE_POOL_SIZE > 0:
+        await invite_link_pool.start(bot)
+    if METRICS_ENABLED and metrics_runner is None:
+        metrics_runner = await start_metrics_server()
+
+
+async def on_shutdown():
+    global metrics_runner
+    await registration_scheduler.stop()
+    await send_scheduler.stop()
+    await invite_link_pool.stop()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+        metrics_runner = None
+    # Закрываем соединения с БД, чтобы процесс завершился по SIGTERM
+    await engine.dispose()
 
 
 async def main():
@@ -31,10 +70,18 @@ async def main():
     dp.include_router(reg_router)
     dp.include_router(srch_router)
     dp.include_router(adm_router)
+    dp.include_router(inline_router)
     main_logger.debug(LogMessage.ROUTERS)
 
-    # Добавляем middleware для выполнения при старте
-    dp.message.middleware(StartupMiddleware())
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+    if BOT_MODE == 'webhook':
+        # Апдейты принимает aiohttp-сервер, startup/shutdown диспетчера
+        # вызываются при его запуске и остановке
+        main_logger.debug(LogMessage.BOT_UP)
+        await run_webhook(dp, bot)
+        return
 
     # Чтобы бот не реагировал на обновления в Телеграме, пока был выключен
     await bot(DeleteWebhook(drop_pending_updates=True))
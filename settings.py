@@ -2,6 +2,141 @@ import os
 
 # Время, по истечении которого регистрация прерывается, задается в часах
 TIMER_USER_STEP = 6
+# Повтор прерывания регистрации, завершившегося ошибкой: начальная
+# и максимальная задержка в секундах (задержка удваивается) и число
+# повторов, после которого таймер ждет перезапуска бота
+TIMER_RETRY_BACKOFF = 30
+TIMER_RETRY_BACKOFF_MAX = 3600
+TIMER_RETRY_ATTEMPTS = 10
+
+# Хранилище состояний FSM: время жизни незавершенных черновиков и
+# периодичность их очистки, задаются в часах.
+# FSM_STORAGE_TTL должен быть больше TIMER_USER_STEP
+FSM_STORAGE_TTL = 24
+FSM_STORAGE_PURGE_INTERVAL = 1
+
+# Кэш статусов пользователей (зарегистрирован/администратор/существует):
+# максимальное число записей и время жизни записи в секундах
+USER_STATUS_CACHE_SIZE = 10000
+USER_STATUS_CACHE_TTL = 60
+
+# Время жизни (в секундах) готовых клавиатур ролей и уровней.
+# Изменения из бота сбрасывают кэш сразу, TTL нужен для изменений
+# из админ-панели
+KEYBOARD_CACHE_TTL = 300
+
+# Время жизни (в секундах) агрегированных метрик админ-панели.
+# Изменения из админ-панели сбрасывают кэш сразу, TTL нужен для
+# регистраций через бота
+METRICS_CACHE_TTL = 10
+
+# Количество пользователей по роли и уровню для списка поиска: число
+# запомненных пар и время жизни в секундах. Изменения из бота сбрасывают
+# кэш сразу, TTL нужен для изменений из админ-панели
+USER_COUNT_CACHE_SIZE = 1000
+USER_COUNT_CACHE_TTL = 60
+
+# Кэш готовых графиков админ-панели: число PNG и время их жизни
+# в секундах
+CHART_CACHE_SIZE = 32
+CHART_CACHE_TTL = 60
+
+# Время (в секундах), через которое справочник уровней перечитывается из БД
+LEVEL_CATALOG_TTL = 300
+# Не чаще чем раз в столько секунд справочник уровней перечитывается
+# из-за запроса неизвестного уровня
+LEVEL_CATALOG_MISS_RELOAD_INTERVAL = 30
+
+# Справочник ролей: время (в секундах), через которое он перечитывается
+# из БД, сколько различных ролей нормализуется за одну транзакцию при
+# заполнении users.role_id, и синонимы, которые приводятся к одному
+# написанию при нормализации (сравнение без учета регистра, после
+# схлопывания пробелов; ключи - слова или фразы целиком)
+ROLE_CATALOG_TTL = 300
+ROLE_BACKFILL_BATCH_SIZE = 500
+ROLE_SYNONYMS = {
+    'back end': 'backend',
+    'back-end': 'backend',
+    'бэкенд': 'backend',
+    'бекенд': 'backend',
+    'front end': 'frontend',
+    'front-end': 'frontend',
+    'фронтенд': 'frontend',
+    'golang': 'go',
+    'питон': 'python',
+    'пайтон': 'python',
+    'developer': 'разработчик',
+    'разраб': 'разработчик',
+    'программист': 'разработчик',
+    'тестировщик': 'qa',
+    'аналитик данных': 'data analyst',
+    'тимлид': 'team lead',
+    'teamlead': 'team lead',
+    'девопс': 'devops',
+}
+
+# Режим получения апдейтов: 'polling' (long polling) или 'webhook'
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+# Публичный HTTPS-адрес бота, на который Telegram отправляет апдейты
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL")
+WEBHOOK_PATH = "/webhook"
+# Секрет из заголовка X-Telegram-Bot-Api-Secret-Token, если не задан -
+# генерируется при каждом запуске
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+# Адрес, на котором слушает aiohttp-сервер
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+
+# Время (в секундах), через которое значения уникальных полей
+# зарегистрированных пользователей (ник, Сберчат, username)
+# перечитываются из БД для проверок при регистрации
+UNIQUENESS_INDEX_TTL = 300
+
+# Замер времени SQL-запросов: порог медленного запроса (в мс), который
+# пишется в лог вместе с EXPLAIN QUERY PLAN, границы корзин гистограммы
+# (в мс) и максимальное число различных запросов в статистике
+SQL_SLOW_QUERY_MS = 100
+SQL_HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+SQL_STATS_MAX_STATEMENTS = 500
+SQL_STATS_FILE_NAME = "sql_stats.json"
+
+# SQLite, общий для процессов бота и админ-панели: режим синхронизации
+# (в режиме WAL достаточно NORMAL), время ожидания блокировки (в мс),
+# размер кэша страниц соединения (в КиБ) и объем файла БД,
+# отображаемый в память (в байтах)
+SQLITE_SYNCHRONOUS = "NORMAL"
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_CACHE_SIZE_KIB = 20000
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+# Повтор записи, если БД занята другим процессом (SQLITE_BUSY): число
+# повторов и начальная/максимальная задержка между ними (в мс)
+DB_BUSY_RETRIES = 5
+DB_BUSY_BACKOFF_MS = 50
+DB_BUSY_BACKOFF_MAX_MS = 2000
+
+# Очередь исходящих запросов к Bot API (ведра токенов): сообщений
+# в секунду и размер всплеска для бота в целом, для личного чата
+# и для группы/канала. Через очередь идут только отправки сообщений
+# (методы с этими префиксами), документы - с низким приоритетом.
+# На ответ 429 запрос повторяется не больше SEND_RETRY_AFTER_ATTEMPTS
+# раз, свободные ведра чатов удаляются сверх SEND_IDLE_BUCKETS_MAX
+SEND_GLOBAL_RATE = 30
+SEND_GLOBAL_BURST = 30
+SEND_CHAT_RATE = 1
+SEND_CHAT_BURST = 3
+SEND_GROUP_RATE = 20 / 60
+SEND_GROUP_BURST = 3
+SEND_QUEUED_METHOD_PREFIXES = ('Send', 'Copy', 'Forward')
+SEND_BULK_METHODS = ('SendDocument',)
+SEND_RETRY_AFTER_ATTEMPTS = 3
+SEND_IDLE_BUCKETS_MAX = 10000
+
+# Метрики обработчиков в формате Prometheus: адрес aiohttp-сервера
+# (GET /metrics) и границы корзин гистограмм (в секундах)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
 
 # Настройки Метрик
 STATES_COLLECTION = (
@@ -16,11 +151,34 @@ STATES_COLLECTION = (
 # Админские команды
 # для команды /dump имя файла
 DUMP_FILE_NAME = "database_dump.json"
+# формат дампа: JSON Lines вместо JSON и сжатие gzip
+DUMP_JSONL = False
+DUMP_GZIP = False
+# сколько строк читается из БД и пишется в файл за один раз
+DUMP_CHUNK_SIZE = 1000
+# сколько записей фикстур записывается в БД одной транзакцией
+FIXTURE_IMPORT_CHUNK_SIZE = 500
+# сколько строк шифруется/дешифруется одной транзакцией
+CRYPT_BATCH_SIZE = 500
 
 # настройка вывода списка (пагинация)
-START_OFFSET = 0
 LIMIT = 10
 
+# Поиск по словам (FTS5): сколько слов запроса учитывается и веса
+# совпадений в описании, команде и роли для ранжирования bm25
+SEARCH_MAX_KEYWORDS = 8
+SEARCH_FTS_WEIGHTS = (1.0, 2.0, 2.0)
+
+# Инлайн-поиск (@бот запрос) по индексу в памяти: карточек в одном
+# ответе (не больше 50 - ограничение Telegram), время (в секундах),
+# на которое Telegram кэширует ответ, через которое индекс
+# перестраивается при изменениях из админ-панели, и число
+# запомненных результатов запросов
+INLINE_RESULTS_LIMIT = 50
+INLINE_CACHE_TIME = 60
+INLINE_INDEX_TTL = 300
+INLINE_QUERY_CACHE_SIZE = 1000
+
 # канал сообщества, если не менять - подтягивается из .env
 CHANNEL_ID = os.getenv("CHANNEL_ID")
 
@@ -28,3 +186,9 @@ DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 # Время действия ссылки на переход в сообщество, задается в часах
 TIME_EXPIRE_HOUR = 72
+# Запас заранее созданных ссылок: число свободных ссылок, сколько часов
+# ссылка должна еще действовать, чтобы ее выдать (остальные заменяются
+# новыми), и периодичность проверки запаса в секундах
+INVITE_POOL_SIZE = 20
+INVITE_LINK_MIN_VALIDITY_HOURS = 24
+INVITE_POOL_CHECK_INTERVAL = 600
@@ -0,0 +1,342 @@
+"""
+Нагрузочный прогон сценария бота: /start, вся цепочка регистрации,
+подтверждение и постраничный поиск коллег для N пользователей.
+
+Апдейты подаются в dp.feed_update, запросы к Bot API обслуживает
+локальная сессия-заглушка, данные пишутся в отдельный файл SQLite.
+В конце выводятся апдейты в секунду, p50/p95/p99 по обработчикам
+и пиковое потребление памяти процессом.
+
+Запуск из корня проекта:
+    python -m tests.load_registration --users 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import resource
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import ChatInviteLink, Message, Update
+from sqlalchemy import func, select
+
+# Настройки, без которых не импортируются модули бота. Движок
+# из DATABASE_URL не используется: прогон идет на отдельном файле БД
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("TELEGRAM_TOKEN", "42:LOAD_TEST")
+os.environ.setdefault("CHANNEL_ID", "-1001")
+
+from bot import utils  # noqa: E402
+from bot.bot import dp  # noqa: E402
+from bot.cache import (bump_data_version, keyboard_cache,  # noqa: E402
+                       user_status_cache)
+from bot.catalog import (ROLE_CALLBACK_PREFIX, level_catalog,  # noqa: E402
+                         normalize_role, role_catalog)
+from bot.handlers.admin import router as adm_router  # noqa: E402
+from bot.handlers.registration import router as reg_router  # noqa: E402
+from bot.handlers.search import router as srch_router  # noqa: E402
+from database.engine import create_db_engine  # noqa: E402
+from database.models import (AsyncSessionLocal, Base, Level,  # noqa: E402
+                             Role, User)
+
+BOT_ID = 42
+# Telegram ID синтетических пользователей не пересекаются с тестовыми
+FIRST_TELEGRAM_ID = 10 ** 9
+ROLES = ("Backend", "Frontend", "DevOps", "QA", "Analyst")
+LEVELS = ("Junior", "Middle", "Senior", "Lead", "Стажер")
+DEFAULT_LEVELS = ("Не важно",) + LEVELS
+# Сколько раз пользователь листает список вперед
+SEARCH_PAGES = 2
+
+
+class FakeBotSession(BaseSession):
+    """Сессия Bot API, отвечающая локально без сетевых запросов."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+        self._message_ids = itertools.count(1)
+        # Ссылки-приглашения уникальны, как у настоящего Bot API
+        self._link_ids = itertools.count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests += 1
+        returning = method.__returning__
+        if returning is Message:
+            result = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": getattr(method, "chat_id", 0),
+                         "type": "private"},
+                "from": {"id": BOT_ID, "is_bot": True,
+                         "first_name": "Bot"},
+                "text": getattr(method, "text", None),
+            }
+        elif returning is ChatInviteLink:
+            result = {
+                "invite_link": (
+                    f"https://t.me/+load_test_{next(self._link_ids)}"
+                ),
+                "creator": {"id": BOT_ID, "is_bot": True,
+                            "first_name": "Bot"},
+                "creates_join_request": False,
+                "is_primary": False,
+                "is_revoked": False,
+            }
+        else:
+            result = True
+        response = self.check_response(
+            bot, method, 200, json.dumps({"ok": True, "result": result})
+        )
+        return response.result
+
+    async def stream_content(self, url, headers=None, timeout=30,
+                             chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+class SimulatedUser:
+    """Пользователь, отправляющий апдейты от своего имени."""
+
+    _update_ids = itertools.count(1)
+
+    def __init__(self, number: int):
+        self.number = number
+        self.telegram_id = FIRST_TELEGRAM_ID + number
+        self.username = f"load_user_{number}"
+        self.role = ROLES[number % len(ROLES)]
+        self.level = LEVELS[number % len(LEVELS)]
+
+    @property
+    def school21_nickname(self) -> str:
+        """Уникальный ник из латинских букв (4-16 символов)."""
+        letters = []
+        number = self.number
+        for _ in range(6):
+            number, rest = divmod(number, 26)
+            letters.append(chr(ord('a') + rest))
+        return "load" + "".join(letters)
+
+    def _user(self) -> dict:
+        return {
+            "id": self.telegram_id,
+            "is_bot": False,
+            "first_name": "Load",
+            "username": self.username,
+        }
+
+    def _message(self, text: Optional[str], from_bot: bool = False) -> dict:
+        return {
+            "message_id": next(self._update_ids),
+            "date": int(time.time()),
+            "chat": {"id": self.telegram_id, "type": "private"},
+            "from": (
+                {"id": BOT_ID, "is_bot": True, "first_name": "Bot"}
+                if from_bot else self._user()
+            ),
+            "text": text,
+        }
+
+    def message(self, text: str) -> Update:
+        return Update.model_validate({
+            "update_id": next(self._update_ids),
+            "message": self._message(text),
+        })
+
+    def callback(self, data: str) -> Update:
+        return Update.model_validate({
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._update_ids)),
+                "from": self._user(),
+                "chat_instance": str(self.telegram_id),
+                "message": self._message("...", from_bot=True),
+                "data": data,
+            },
+        })
+
+    def scenario(self):
+        """Пары (обработчик, апдейт) в порядке действий пользователя."""
+        yield "send_welcome", self.message("/start")
+        yield "reg_action", self.message("Пройти аутентификацию")
+        yield "process_school21_nickname", self.message(
+            self.school21_nickname
+        )
+        yield "process_sber_id", self.message(f"load.user{self.number}")
+        yield "process_team_number", self.message(
+            f"Команда {self.number % 50}"
+        )
+        yield "process_role", self.message(f"{self.level} {self.role}")
+        yield "process_activity_description", self.message(
+            "Нагрузочное тестирование"
+        )
+        yield "handle_join_community", self.callback("confirm")
+        yield "handle_search_peers", self.callback("search_peers")
+        yield "choosing_a_role", self.callback(
+            f"{ROLE_CALLBACK_PREFIX}{ROLES.index(self.role) + 1}"
+        )
+        yield "choosing_a_level", self.callback(self.level)
+        for _ in range(SEARCH_PAGES):
+            yield "get_next_users_lists", self.callback("next")
+
+
+class LoadReport:
+    """Задержки обработки апдейтов по обработчикам."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors = 0
+        self.unhandled = 0
+        self.started = time.perf_counter()
+        self.finished = self.started
+
+    def add(self, handler: str, seconds: float):
+        self.latencies.setdefault(handler, []).append(seconds)
+
+    @property
+    def updates(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def updates_per_second(self) -> float:
+        return self.updates / max(self.finished - self.started, 1e-9)
+
+    @staticmethod
+    def percentiles(values: List[float]) -> List[float]:
+        if len(values) < 2:
+            return values * 3
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+        return [cuts[49], cuts[94], cuts[98]]
+
+    def format(self, registered: int) -> str:
+        peak_rss_mb = resource.getrusage(
+            resource.RUSAGE_SELF
+        ).ru_maxrss / 1024
+        lines = [
+            f"Апдейтов: {self.updates}, ошибок: {self.errors}, "
+            f"без обработчика: {self.unhandled}, "
+            f"зарегистрировано: {registered}",
+            f"Время: {self.finished - self.started:.2f} с, "
+            f"апдейтов в секунду: {self.updates_per_second:.1f}",
+            f"Пиковая память (RSS): {peak_rss_mb:.1f} МБ",
+            f"{'обработчик':<30}{'n':>7}{'p50, мс':>10}"
+            f"{'p95, мс':>10}{'p99, мс':>10}",
+        ]
+        for handler, values in self.latencies.items():
+            p50, p95, p99 = self.percentiles(values)
+            lines.append(
+                f"{handler:<30}{len(values):>7}{p50 * 1000:>10.2f}"
+                f"{p95 * 1000:>10.2f}{p99 * 1000:>10.2f}"
+            )
+        return "\n".join(lines)
+
+
+async def prepare_database(db_path: str):
+    """Новая БД SQLite со схемой, уровнями и ролями, на нее
+    переключаются все сессии бота."""
+    engine = create_db_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal.configure(bind=engine)
+    async with AsyncSessionLocal() as session:
+        session.add_all([
+            Level(id=level_id, name=name)
+            for level_id, name in enumerate(DEFAULT_LEVELS, start=1)
+        ])
+        # id ролей известны заранее: их передают кнопки поиска
+        session.add_all([
+            Role(id=role_id, key=normalize_role(name)[0], name=name)
+            for role_id, name in enumerate(ROLES, start=1)
+        ])
+        await session.commit()
+        await level_catalog.load(session)
+        await role_catalog.load(session)
+    return engine
+
+
+def reset_process_state():
+    """Сброс кэшей процесса, заполненных во время прогона."""
+    keyboard_cache.clear()
+    user_status_cache.clear()
+    bump_data_version()
+
+
+async def run_user(bot: Bot, user: SimulatedUser, report: LoadReport,
+                   semaphore: asyncio.Semaphore):
+    async with semaphore:
+        for handler, update in user.scenario():
+            start = time.perf_counter()
+            try:
+                result = await dp.feed_update(bot, update)
+            except Exception:
+                report.errors += 1
+            else:
+                # Апдейт не дошел до обработчика сценария
+                if result is UNHANDLED:
+                    report.unhandled += 1
+            report.add(handler, time.perf_counter() - start)
+
+
+async def run_load(users: int, concurrency: int,
+                   db_path: Optional[str] = None):
+    """Прогон сценария для users пользователей, не более concurrency
+    одновременно. Возвращает отчет и число завершивших регистрацию."""
+    if reg_router.parent_router is None:
+        dp.include_routers(reg_router, srch_router, adm_router)
+    original_bind = AsyncSessionLocal.kw.get("bind")
+    original_channel = utils.CHANNEL_ID
+    utils.CHANNEL_ID = os.environ["CHANNEL_ID"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = await prepare_database(
+            db_path or os.path.join(temp_dir, "load.db")
+        )
+        bot = Bot(f"{BOT_ID}:LOAD_TEST", session=FakeBotSession())
+        report = LoadReport()
+        semaphore = asyncio.Semaphore(concurrency)
+        try:
+            await asyncio.gather(*(
+                run_user(bot, SimulatedUser(number), report, semaphore)
+                for number in range(users)
+            ))
+            report.finished = time.perf_counter()
+            async with AsyncSessionLocal() as session:
+                registered = await session.scalar(
+                    select(func.count()).select_from(User)
+                    .where(User.is_registered.is_(True))
+                )
+        finally:
+            await engine.dispose()
+            AsyncSessionLocal.configure(bind=original_bind)
+            utils.CHANNEL_ID = original_channel
+            reset_process_state()
+    return report, registered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--db", help="файл SQLite (по умолчанию временный)"
+    )
+    args = parser.parse_args()
+    print(f"Старт: {datetime.now():%H:%M:%S}, пользователей: {args.users}")
+    report, registered = asyncio.run(
+        run_load(args.users, args.concurrency, args.db)
+    )
+    print(report.format(registered))
+
+
+if __name__ == "__main__":
+    main()
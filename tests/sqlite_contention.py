@@ -0,0 +1,154 @@
+"""
+Нагрузочный тест конкурентной записи в один файл SQLite из двух
+процессов, как у контейнеров бота и админ-панели.
+
+Каждый процесс выполняет транзакции записи (вставка строки и
+обновление общего счетчика) вперемешку с чтением агрегата. По каждому
+процессу выводятся транзакции в секунду, p50/p99 времени транзакции
+и число ошибок "database is locked".
+
+Запуск из корня проекта:
+    python -m tests.sqlite_contention --writes 2000
+    python -m tests.sqlite_contention --writes 2000 --plain
+С флагом --plain движок создается с настройками по умолчанию и без
+повтора записи - для сравнения с общей фабрикой database.engine.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.engine import create_db_engine, is_busy_error, retry_on_busy
+
+PROCESSES = ("bot", "admin")
+# Каждая READ_EVERY-я операция процесса - чтение агрегата
+READ_EVERY = 5
+
+
+async def _worker(db_url: str, name: str, writes: int, plain: bool) -> dict:
+    engine = create_async_engine(db_url) if plain else create_db_engine(
+        db_url
+    )
+
+    async def write(number: int):
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("INSERT INTO events (worker, number) VALUES (:w, :n)"),
+                {"w": name, "n": number},
+            )
+            await conn.execute(
+                text("UPDATE counter SET value = value + 1 WHERE id = 1")
+            )
+
+    if not plain:
+        write = retry_on_busy(write)
+    latencies = []
+    locked = 0
+    start = time.perf_counter()
+    for number in range(writes):
+        if number % READ_EVERY == 0:
+            async with engine.connect() as conn:
+                await conn.execute(
+                    text("SELECT worker, count(*) FROM events GROUP BY worker")
+                )
+        started = time.perf_counter()
+        try:
+            await write(number)
+        except OperationalError as error:
+            if not is_busy_error(error):
+                raise
+            locked += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return {
+        "name": name,
+        "ok": len(latencies),
+        "locked": locked,
+        "elapsed": elapsed,
+        "latencies": latencies,
+    }
+
+
+def run_worker(db_url: str, name: str, writes: int, plain: bool, results):
+    results.put(asyncio.run(_worker(db_url, name, writes, plain)))
+
+
+async def _prepare(db_url: str, plain: bool):
+    engine = create_async_engine(db_url) if plain else create_db_engine(
+        db_url
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY, "
+            "worker TEXT, number INTEGER)"
+        ))
+        await conn.execute(text(
+            "CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER)"
+        ))
+        await conn.execute(text("INSERT INTO counter VALUES (1, 0)"))
+    await engine.dispose()
+
+
+def format_result(result: dict) -> str:
+    latencies = result["latencies"]
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p99 = cuts[49] * 1000, cuts[98] * 1000
+    else:
+        p50 = p99 = 0.0
+    return (
+        f"{result['name']:<8}{result['ok']:>8}{result['locked']:>10}"
+        f"{result['ok'] / result['elapsed']:>12.1f}"
+        f"{p50:>10.2f}{p99:>10.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--writes", type=int, default=1000)
+    parser.add_argument(
+        "--plain", action="store_true",
+        help="движок по умолчанию, без WAL и повтора записи",
+    )
+    parser.add_argument(
+        "--db", help="файл SQLite (по умолчанию временный)"
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = args.db or os.path.join(temp_dir, "contention.db")
+        db_url = f"sqlite+aiosqlite:///{db_path}"
+        asyncio.run(_prepare(db_url, args.plain))
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=run_worker,
+                args=(db_url, name, args.writes, args.plain, results),
+            )
+            for name in PROCESSES
+        ]
+        for process in processes:
+            process.start()
+        rows = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    print(f"Режим: {'по умолчанию' if args.plain else 'database.engine'}")
+    print(
+        f"{'процесс':<8}{'успешно':>8}{'locked':>10}{'транз./с':>12}"
+        f"{'p50, мс':>10}{'p99, мс':>10}"
+    )
+    for row in sorted(rows, key=lambda row: row["name"]):
+        print(format_result(row))
+
+
+if __name__ == "__main__":
+    main()
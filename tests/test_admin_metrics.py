@@ -0,0 +1,59 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from admin.user_management import fetch_registration_counts, update_metrics
+from bot.cache import VersionedCache, bump_data_version
+from database.models import Base, User
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """Временная БД с зарегистрированными и прервавшими регистрацию."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add_all([
+            User(telegram_id=number, is_registered=number % 3 != 0)
+            for number in range(1, 10)
+        ])
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_fetch_registration_counts(session):
+    """Счетчики считаются одним агрегирующим запросом."""
+    assert await fetch_registration_counts(session) == {
+        "registered_users": 6,
+        "abandoned_users": 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_metrics_uses_cache_until_data_changes(session, mocker):
+    """Повторный вызов берет метрики из кэша, изменение данных
+    в процессе сбрасывает кэш."""
+    mock_st = mocker.patch("admin.user_management.st")
+    mocker.patch("admin.user_management.metrics_cache", VersionedCache(1, 60))
+    fetch = mocker.patch(
+        "admin.user_management.fetch_registration_counts",
+        wraps=fetch_registration_counts,
+    )
+
+    await update_metrics(session)
+    await update_metrics(session)
+    assert fetch.call_count == 1
+    assert mock_st.session_state.registered_users == 6
+    assert mock_st.session_state.abandoned_users == 3
+
+    session.add(User(telegram_id=100, is_registered=True))
+    await session.commit()
+    bump_data_version()
+    await update_metrics(session)
+    assert fetch.call_count == 2
+    assert mock_st.session_state.registered_users == 7
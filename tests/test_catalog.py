@@ -0,0 +1,154 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.future import select
+
+from bot.catalog import (LevelCatalog, RoleCatalog, normalize_role,
+                         parse_role_callback)
+from database.models import Base, Level, Role, User
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """Сессия к временной БД с набором уровней."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add_all([
+            Level(id=1, name="Не важно"),
+            Level(id=2, name="Junior"),
+            Level(id=3, name="Middle"),
+            Level(id=4, name="Senior"),
+        ])
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "input_str, expected",
+    [
+        ("Senior golang разработчик", (4, "golang разработчик")),
+        ("Junior  DevOps ", (2, "DevOps")),
+        # Уровень не в начале строки — вся строка считается ролью
+        ("Аналитик Middle", (1, "Аналитик Middle")),
+        # Название уровня должно быть отдельным словом
+        ("Seniority", (1, "Seniority")),
+    ]
+)
+async def test_parse(session, input_str, expected):
+    """Разбор строки уровень + роль по справочнику."""
+    catalog = LevelCatalog()
+    await catalog.load(session)
+
+    assert catalog.parse(input_str) == expected
+
+
+@pytest.mark.asyncio
+async def test_catalog_lookups_without_db(session, mocker):
+    """После загрузки справочник отвечает без обращения к БД."""
+    catalog = LevelCatalog()
+    await catalog.ensure_loaded(session)
+    execute = mocker.spy(session, "execute")
+
+    await catalog.ensure_loaded(session)
+    catalog.parse("Middle QA")
+
+    assert catalog.names == ["Junior", "Middle", "Senior", "Не важно"]
+    assert catalog.id_by_name("Middle") == 3
+    assert catalog.name_by_id(4) == "Senior"
+    assert await catalog.resolve(session, "Junior") == 2
+    execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_resolve_reloads_unknown_level(session):
+    """Неизвестный уровень приводит к перечитыванию справочника."""
+    catalog = LevelCatalog()
+    await catalog.load(session)
+    session.add(Level(id=5, name="Lead"))
+    await session.commit()
+
+    assert await catalog.resolve(session, "Lead") == 5
+    assert catalog.parse("Lead PM") == (5, "PM")
+
+
+@pytest.mark.asyncio
+async def test_resolve_misses_rate_limited(session, mocker):
+    """Повторные неизвестные уровни не перечитывают справочник
+    чаще LEVEL_CATALOG_MISS_RELOAD_INTERVAL."""
+    catalog = LevelCatalog()
+    await catalog.load(session)
+    execute = mocker.spy(session, "execute")
+
+    assert await catalog.resolve(session, "Unknown") is None
+    assert await catalog.resolve(session, "Other") is None
+    assert execute.call_count == 1
+
+    mocker.patch("bot.catalog.LEVEL_CATALOG_MISS_RELOAD_INTERVAL", -1)
+    assert await catalog.resolve(session, "Unknown") is None
+    assert execute.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("  Golang   Разработчик. ", ("go разработчик", "Golang Разработчик")),
+        ("go developer", ("go разработчик", "go developer")),
+        ("Back-End/Питон", ("backend python", "Back-End/Питон")),
+        ("Тимлид", ("team lead", "Тимлид")),
+        # Синонимы заменяются только целыми словами
+        ("Golangist", ("golangist", "Golangist")),
+        ("Пусто", None),
+        ("  ", None),
+        (None, None),
+    ]
+)
+def test_normalize_role(raw, expected):
+    assert normalize_role(raw) == expected
+
+
+def test_parse_role_callback():
+    assert parse_role_callback("role:12") == 12
+    assert parse_role_callback("role:x") is None
+    assert parse_role_callback("Junior") is None
+
+
+@pytest.mark.asyncio
+async def test_role_get_or_create(session):
+    """Разные написания одной роли получают один id."""
+    catalog = RoleCatalog()
+    first = await catalog.get_or_create(session, "Golang разработчик")
+    await session.commit()
+
+    assert await catalog.get_or_create(session, "GO  developer") == first
+    # Роль, добавленная другим процессом, находится без перезагрузки
+    other = RoleCatalog()
+    assert await other.get_or_create(session, "golang developer") == first
+    assert await catalog.get_or_create(session, "QA") != first
+    assert await catalog.get_or_create(session, "Пусто") is None
+
+
+@pytest.mark.asyncio
+async def test_role_backfill(session):
+    """Пользователи без role_id получают роль из справочника пачками."""
+    session.add_all([
+        User(telegram_id=1, role="DevOps"),
+        User(telegram_id=2, role=" devops"),
+        User(telegram_id=3, role="Тестировщик"),
+        User(telegram_id=4, role="Пусто"),
+    ])
+    await session.commit()
+
+    assert await RoleCatalog().backfill(session, batch_size=1) == 3
+    result = await session.execute(
+        select(User.telegram_id, Role.name)
+        .join(Role, User.role_id == Role.id)
+        .order_by(User.telegram_id)
+    )
+    assert result.all() == [(1, "DevOps"), (2, "DevOps"), (3, "Тестировщик")]
+    assert await RoleCatalog().backfill(session) == 0
@@ -0,0 +1,72 @@
+import threading
+from unittest.mock import AsyncMock
+
+import pytest
+from cachetools import TTLCache
+from matplotlib.figure import Figure
+
+from admin.chart_cache import get_chart_png
+from bot.cache import bump_data_version
+
+PNG_SIGNATURE = b"\x89PNG"
+
+
+@pytest.fixture(autouse=True)
+def chart_cache(mocker):
+    """Пустой кэш графиков на время теста."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    mocker.patch("admin.chart_cache.chart_cache", cache)
+    return cache
+
+
+def make_draw(threads):
+    """Функция рисования, запоминающая поток, в котором она вызвана."""
+    def draw(data, size):
+        threads.append(threading.current_thread())
+        fig = Figure(figsize=size)
+        fig.subplots().bar(list(data), list(data.values()))
+        return fig
+    return draw
+
+
+@pytest.mark.asyncio
+async def test_chart_is_rendered_once_per_data_version():
+    """PNG рисуется в рабочем потоке и отдается из кэша до изменения
+    версии данных."""
+    threads = []
+    load_data = AsyncMock(return_value={"Junior": 1, "Middle": 2})
+    draw = make_draw(threads)
+
+    png = await get_chart_png("levels", (4, 3), load_data, draw)
+    assert png.startswith(PNG_SIGNATURE)
+    assert await get_chart_png("levels", (4, 3), load_data, draw) == png
+    assert load_data.await_count == 1
+    assert threads and threads[0] is not threading.main_thread()
+
+    bump_data_version()
+    await get_chart_png("levels", (4, 3), load_data, draw)
+    assert load_data.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_chart_cache_evicts_least_recently_used(chart_cache):
+    """Размер входит в ключ, старые записи вытесняются по LRU."""
+    load_data = AsyncMock(return_value={"Junior": 1})
+    draw = make_draw([])
+
+    for size in [(4, 3), (5, 3), (6, 3)]:
+        await get_chart_png("levels", size, load_data, draw)
+
+    assert load_data.await_count == 3
+    assert [key[2] for key in chart_cache] == [(5, 3), (6, 3)]
+
+
+@pytest.mark.asyncio
+async def test_empty_chart_is_not_cached(chart_cache):
+    """Без данных график не рисуется и не кэшируется."""
+    draw = make_draw([])
+
+    assert await get_chart_png("levels", (4, 3), AsyncMock(
+        return_value={}
+    ), draw) is None
+    assert not chart_cache
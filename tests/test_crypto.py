@@ -0,0 +1,133 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from .constants import TestStrValues
+from bot.catalog import LevelCatalog
+from bot.crypto import reencrypt_database, xor_encr_decr_many
+from database.models import AdminSettings, Base, Level, User
+
+KEY = TestStrValues.TEST_TELEGRAM_TOKEN
+
+
+def xor_by_char(text, key):
+    """Посимвольное XOR-шифрование, как в исходной реализации."""
+    if text is None:
+        return None
+    return ''.join(
+        chr(ord(char) ^ ord(key[i % len(key)]))
+        for i, char in enumerate(text)
+    )
+
+
+def test_xor_many_matches_char_by_char():
+    """Векторное шифрование совпадает с посимвольным."""
+    texts = [
+        "test_user", None, "", "Senior golang разработчик",
+        "Lab.SberPay.NFC" * 10, "😀 эмодзи",
+    ]
+
+    assert xor_encr_decr_many(texts, KEY) == [
+        xor_by_char(text, KEY) for text in texts
+    ]
+    assert xor_encr_decr_many(xor_encr_decr_many(texts, KEY), KEY) == texts
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path, mocker):
+    """Временная БД с пользователями, уровнями и настройками."""
+    mocker.patch("bot.crypto.CRYPT_BATCH_SIZE", 2)
+    mocker.patch("bot.crypto.level_catalog", LevelCatalog())
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add_all([
+            Level(id=1, name="Не важно"),
+            Level(id=2, name="Junior"),
+            AdminSettings(is_encrypted=False),
+        ])
+        session.add_all([
+            User(
+                telegram_id=number,
+                username=f"user_{number}",
+                role="DevOps",
+                description=None,
+            )
+            for number in range(1, 6)
+        ])
+        await session.commit()
+    yield session_maker
+    await engine.dispose()
+
+
+async def load_rows(session):
+    users = (await session.execute(
+        select(User.username, User.role, User.description).order_by(User.id)
+    )).all()
+    levels = (await session.execute(
+        select(Level.name).order_by(Level.id)
+    )).scalars().all()
+    return users, levels
+
+
+@pytest.mark.asyncio
+async def test_reencrypt_database_round_trip(session_maker):
+    """Шифрование пачками и обратная дешифровка."""
+    async with session_maker() as session:
+        plain_users, plain_levels = await load_rows(session)
+
+        assert await reencrypt_database(session, KEY, updated_by=1) is True
+        users, levels = await load_rows(session)
+        assert users[0].username == xor_by_char("user_1", KEY)
+        assert users[0].description is None
+        assert levels == [xor_by_char(name, KEY) for name in plain_levels]
+        settings = await session.scalar(select(AdminSettings))
+        assert (settings.is_encrypted, settings.crypt_in_progress) == (
+            True, False
+        )
+
+        assert await reencrypt_database(session, KEY) is False
+        assert await load_rows(session) == (plain_users, plain_levels)
+
+
+@pytest.mark.asyncio
+async def test_reencrypt_database_resumes_after_crash(session_maker, mocker):
+    """После сбоя перешифровка продолжается с контрольной точки,
+    уже обработанные строки повторно не шифруются."""
+    async with session_maker() as session:
+        plain_users, plain_levels = await load_rows(session)
+    original = xor_encr_decr_many
+    calls = 0
+
+    def failing_xor(texts, key):
+        nonlocal calls
+        calls += 1
+        # Сбой на второй пачке пользователей (6 колонок на пачку)
+        if calls > 6:
+            raise RuntimeError("crash")
+        return original(texts, key)
+
+    mocker.patch("bot.crypto.xor_encr_decr_many", failing_xor)
+    async with session_maker() as session:
+        with pytest.raises(RuntimeError):
+            await reencrypt_database(session, KEY)
+    async with session_maker() as session:
+        settings = await session.scalar(select(AdminSettings))
+        assert (settings.crypt_in_progress, settings.crypt_table) == (
+            True, "users"
+        )
+        assert settings.crypt_last_id == 2
+        assert settings.is_encrypted is False
+
+    mocker.patch("bot.crypto.xor_encr_decr_many", original)
+    async with session_maker() as session:
+        assert await reencrypt_database(session, KEY) is True
+        users, levels = await load_rows(session)
+    assert [user.username for user in users] == [
+        xor_by_char(user.username, KEY) for user in plain_users
+    ]
+    assert levels == [xor_by_char(name, KEY) for name in plain_levels]
@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import database.engine
+from database.engine import (create_db_engine, enable_wal, is_busy_error,
+                             retry_on_busy)
+from settings import (DB_BUSY_BACKOFF_MAX_MS, DB_BUSY_RETRIES,
+                      SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KIB)
+
+
+def busy_error(message="database is locked"):
+    return OperationalError("INSERT", {}, sqlite3.OperationalError(message))
+
+
+def failing_write(*results):
+    """Запись, которая по очереди выбрасывает или возвращает results."""
+    calls = []
+
+    @retry_on_busy
+    async def write():
+        result = results[min(len(calls), len(results) - 1)]
+        calls.append(result)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return write, calls
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(tmp_path, mocker):
+    """Соединение пула настраивается один раз, WAL включается при старте
+    и сохраняется в файле БД."""
+    set_pragmas = mocker.spy(database.engine, "_set_sqlite_pragmas")
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    await enable_wal(engine)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    async with engine.connect() as conn:
+        pragmas = {
+            name: (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+            for name in (
+                "journal_mode", "synchronous", "busy_timeout", "cache_size"
+            )
+        }
+    await engine.dispose()
+    assert set_pragmas.call_count == 1
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": -SQLITE_CACHE_SIZE_KIB,
+    }
+
+
+def test_is_busy_error():
+    assert is_busy_error(busy_error())
+    assert not is_busy_error(busy_error("no such table: users"))
+    assert not is_busy_error(ValueError("database is locked"))
+
+
+@pytest.mark.asyncio
+async def test_retry_on_busy_retries_with_backoff(mocker):
+    sleep = mocker.patch(
+        "database.engine.asyncio.sleep", new_callable=AsyncMock
+    )
+    write, calls = failing_write(busy_error(), busy_error(), "ok")
+
+    assert await write() == "ok"
+    assert len(calls) == 3
+    delays = [call.args[0] for call in sleep.await_args_list]
+    assert len(delays) == 2
+    assert all(0 < delay <= DB_BUSY_BACKOFF_MAX_MS / 1000 for delay in delays)
+
+
+@pytest.mark.asyncio
+async def test_retry_on_busy_is_bounded(mocker):
+    mocker.patch("database.engine.asyncio.sleep", new_callable=AsyncMock)
+    write, calls = failing_write(busy_error())
+    with pytest.raises(OperationalError):
+        await write()
+    assert len(calls) == DB_BUSY_RETRIES + 1
+
+    # Прочие ошибки БД не повторяются
+    write, calls = failing_write(busy_error("no such table: users"))
+    with pytest.raises(OperationalError):
+        await write()
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_on_busy_waits_for_other_process(tmp_path, mocker):
+    """Запись дожидается снятия блокировки, удерживаемой другим
+    соединением дольше busy_timeout."""
+    mocker.patch("database.engine.SQLITE_BUSY_TIMEOUT_MS", 10)
+    mocker.patch("database.engine.DB_BUSY_BACKOFF_MS", 20)
+    db_path = tmp_path / "test.db"
+    engine = create_db_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE t (value INTEGER)"))
+
+    other = sqlite3.connect(db_path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    asyncio.get_running_loop().call_later(0.1, other.execute, "COMMIT")
+
+    @retry_on_busy
+    async def write():
+        async with engine.begin() as conn:
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    await write()
+    async with engine.connect() as conn:
+        count = (await conn.execute(text("SELECT count(*) FROM t"))).scalar()
+    other.close()
+    await engine.dispose()
+    assert count == 1
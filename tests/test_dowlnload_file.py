@@ -9,8 +9,10 @@ from bot.utils import download_file
 
 
 @pytest.fixture
-def setup_download_file(tmp_path):
-    """Настройка сообщения и мока бота."""
+def setup_download_file(tmp_path, monkeypatch):
+    """Настройка сообщения и мока бота. Файлы скачиваются во временную
+    директорию теста, а не в temp/ репозитория."""
+    monkeypatch.chdir(tmp_path)
     message = AsyncMock(spec=Message)
     message.document = AsyncMock()
     message.document.file_name = "test_dump_file.json"
@@ -22,7 +24,7 @@ def setup_download_file(tmp_path):
 
 
 @pytest.mark.asyncio
-async def test_download_file(setup_download_file):
+async def test_download_file(setup_download_file, tmp_path):
     """Тест успешной загрузки файла."""
     message = setup_download_file
     message.bot.get_file = AsyncMock(
@@ -40,11 +42,11 @@ async def test_download_file(setup_download_file):
 
     assert message.bot.get_file.called
     assert message.bot.download_file.called
-    assert os.path.exists(f"./temp/{message.document.file_name}")
+    assert (tmp_path / "temp" / message.document.file_name).exists()
 
 
 @pytest.mark.asyncio
-async def test_download_file_invalid_format(setup_download_file):
+async def test_download_file_invalid_format(setup_download_file, tmp_path):
     """Тест неверного формата файла."""
     message = setup_download_file
     message.document.file_name = "test_dump_file.txt"
@@ -52,4 +54,4 @@ async def test_download_file_invalid_format(setup_download_file):
     await download_file(message)
 
     message.answer.assert_called_once_with(Messages.ERROR_FILE_FORMAT_MESSAGES)
-    assert not os.path.exists(f"./temp/{message.document.file_name}")
+    assert not (tmp_path / "temp" / message.document.file_name).exists()
@@ -0,0 +1,203 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from bot.fixtures import FixtureError, create_orm_dump, import_fixtures
+from bot.messages import Messages
+from database.models import Base, Level, User
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path, mocker):
+    """Сессия к временной БД с пользователями и уровнями."""
+    mocker.patch("bot.fixtures.DUMP_CHUNK_SIZE", 2)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add_all([
+            Level(id=1, name="Не важно"),
+            Level(id=2, name="Junior"),
+        ])
+        session.add_all([
+            User(
+                telegram_id=number,
+                username=f"user_{number}",
+                role="DevOps",
+                level_id=2,
+                registration_date=datetime(2024, 11, 11, 10, 0, number),
+            )
+            for number in range(1, 6)
+        ])
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_json_dump_matches_orm_serialization(session, tmp_path):
+    """JSON-дамп, записанный пачками, совпадает с to_dict моделей."""
+    dump_file_path = tmp_path / "dump.json"
+
+    await create_orm_dump(session, str(dump_file_path))
+
+    with open(dump_file_path, encoding="utf-8") as dump_file:
+        data = json.load(dump_file)
+    users = (await session.execute(User.__table__.select())).all()
+    assert [user["telegram_id"] for user in data["users"]] == [
+        user.telegram_id for user in users
+    ]
+    assert data["users"][0]["registration_date"] == "2024-11-11 10:00:01"
+    assert data["levels"] == [
+        {"id": 1, "name": "Не важно"}, {"id": 2, "name": "Junior"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_jsonl_gzip_dump(session, tmp_path):
+    """Сжатый дамп в формате JSON Lines: одна запись на строку."""
+    dump_file_path = tmp_path / "dump.jsonl.gz"
+
+    await create_orm_dump(
+        session, str(dump_file_path), jsonl=True, compress=True
+    )
+
+    with gzip.open(dump_file_path, "rt", encoding="utf-8") as dump_file:
+        records = [json.loads(line) for line in dump_file]
+    assert [record["table"] for record in records] == (
+        ["users"] * 5 + ["levels"] * 2
+    )
+    assert records[4]["row"]["username"] == "user_5"
+
+
+@pytest.mark.asyncio
+async def test_json_dump_empty_tables(tmp_path):
+    """Дамп пустой БД остается корректным JSON."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/empty.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    dump_file_path = tmp_path / "dump.json"
+
+    async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+        await create_orm_dump(session, str(dump_file_path))
+    await engine.dispose()
+
+    with open(dump_file_path, encoding="utf-8") as dump_file:
+        assert json.load(dump_file) == {"users": [], "levels": []}
+
+
+def write_fixture(path, data):
+    with open(path, "w", encoding="utf-8") as fixture_file:
+        json.dump(data, fixture_file, ensure_ascii=False, indent=4)
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_import_fixtures_upserts_in_chunks(session, tmp_path, mocker):
+    """Пачки записей: новые добавляются, существующие обновляются,
+    записи, нарушающие ограничения БД, пропускаются."""
+    mocker.patch("bot.fixtures.READ_BLOCK_SIZE", 7)
+    file_path = write_fixture(tmp_path / "fixture.json", {
+        "users": [
+            # Обновление существующего пользователя
+            {"telegram_id": 1, "role": "QA", "is_registered": True,
+             "registration_date": "2024-12-01 09:00:00"},
+            {"telegram_id": 10, "username": "new_user", "role": "PM"},
+            {"telegram_id": 11, "username": "other_user"},
+            # username занят другим пользователем в БД
+            {"telegram_id": 12, "username": "user_2"},
+            # Запись без telegram_id
+            {"username": "anonymous"},
+        ],
+        "levels": [{"id": 2, "name": "Junior+"}, {"id": 3, "name": "Стажер"}],
+    })
+
+    summary = await import_fixtures(session, file_path, chunk_size=2)
+
+    assert (summary["users"].inserted, summary["users"].updated,
+            summary["users"].skipped) == (2, 1, 2)
+    assert (summary["levels"].inserted, summary["levels"].updated) == (1, 1)
+    user = (await session.execute(
+        User.__table__.select().where(User.telegram_id == 1)
+    )).one()
+    assert (user.role, user.username, user.is_registered) == (
+        "QA", "user_1", True
+    )
+    assert user.registration_date == datetime(2024, 12, 1, 9, 0, 0)
+    new_users = await session.scalar(
+        select(func.count()).where(User.telegram_id.in_([10, 11, 12]))
+    )
+    assert new_users == 2
+
+
+@pytest.mark.asyncio
+async def test_import_fixtures_round_trip(session, tmp_path):
+    """Сжатый JSON Lines дамп загружается обратно без изменений."""
+    dump_file_path = str(tmp_path / "dump.jsonl.gz")
+    await create_orm_dump(session, dump_file_path, jsonl=True, compress=True)
+
+    summary = await import_fixtures(session, dump_file_path)
+
+    assert (summary["users"].updated, summary["levels"].updated) == (5, 2)
+    assert summary["users"].inserted == summary["users"].skipped == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ({"users": []}, Messages.ERROR_FILE_FORMAT),
+        (
+            {"users": [{"telegram_id": 1, "unknown": 1}], "levels": []},
+            Messages.ERROR_FIELD_FIXTURE_USER.format(field="unknown"),
+        ),
+        (
+            {"users": [{"telegram_id": 7}, {"telegram_id": 7}], "levels": []},
+            Messages.ERROR_FIXTURE_FILE_DUBLICATES.format(
+                dublicates="telegram_id: 7"
+            ),
+        ),
+    ]
+)
+async def test_import_fixtures_rejects_invalid_file(
+    session, tmp_path, data, expected
+):
+    """Ошибки формата обнаруживаются до записи в БД."""
+    file_path = write_fixture(tmp_path / "fixture.json", data)
+
+    with pytest.raises(FixtureError) as error:
+        await import_fixtures(session, file_path)
+
+    assert str(error.value) == expected
+
+
+@pytest.mark.asyncio
+async def test_import_fixtures_validates_each_chunk(session, tmp_path):
+    """Файл читается один раз: пачки до ошибки записаны, итог по ним
+    передается в ошибке."""
+    file_path = write_fixture(tmp_path / "fixture.json", {
+        "users": [
+            {"telegram_id": 20, "username": "first"},
+            {"telegram_id": 21, "username": "second"},
+            {"telegram_id": 22, "unknown": 1},
+        ],
+        "levels": [],
+    })
+
+    with pytest.raises(FixtureError) as error:
+        await import_fixtures(session, file_path, chunk_size=2)
+
+    assert str(error.value) == Messages.ERROR_FIELD_FIXTURE_USER.format(
+        field="unknown"
+    )
+    assert error.value.summary["users"].inserted == 2
+    assert await session.scalar(
+        select(func.count()).where(User.telegram_id.in_([20, 21, 22]))
+    ) == 2
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.future import select
+
+from bot.invite_pool import InviteLinkPool
+from database.models import Base, InviteLink
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path, mocker):
+    """Отдельная SQLite-база для запаса ссылок."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'links.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession)
+    mocker.patch("bot.invite_pool.AsyncSessionLocal", maker)
+    mocker.patch("bot.invite_pool.INVITE_POOL_SIZE", 3)
+    yield maker
+    await engine.dispose()
+
+
+def make_bot():
+    """Бот, создающий ссылки link-1, link-2, ..."""
+    bot = AsyncMock()
+    counter = iter(range(1, 1000))
+    bot.create_chat_invite_link.side_effect = lambda **kwargs: MagicMock(
+        invite_link=f"link-{next(counter)}"
+    )
+    return bot
+
+
+async def links(session_maker):
+    async with session_maker() as session:
+        result = await session.execute(
+            select(InviteLink.link, InviteLink.telegram_id)
+            .order_by(InviteLink.link)
+        )
+        return result.all()
+
+
+@pytest.mark.asyncio
+async def test_refill_replaces_expiring_links(session_maker):
+    async with session_maker() as session:
+        session.add_all([
+            # Скоро истечет - заменяется новой
+            InviteLink(link="old", expire_date=int(time.time()) + 60),
+            InviteLink(link="fresh", expire_date=int(time.time()) + 10 ** 6),
+        ])
+        await session.commit()
+    bot = make_bot()
+    pool = InviteLinkPool()
+    await pool.start(bot)
+    await asyncio.sleep(0.1)
+    await pool.stop()
+
+    assert await links(session_maker) == [
+        ("fresh", None), ("link-1", None), ("link-2", None)
+    ]
+    assert bot.create_chat_invite_link.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_issue_from_pool_and_reuse(session_maker):
+    """Пользователь получает ссылку из запаса без запроса к Bot API,
+    повторно - ту же ссылку."""
+    pool = InviteLinkPool()
+    pool._bot = make_bot()
+    await pool.refill()
+    bot = make_bot()
+    async with session_maker() as session:
+        first, second, again = [
+            await pool.issue(session, bot, AsyncMock(), telegram_id)
+            for telegram_id in (1, 2, 1)
+        ]
+    assert first != second
+    assert again == first
+    bot.create_chat_invite_link.assert_not_called()
+    assert Counter(
+        telegram_id for _, telegram_id in await links(session_maker)
+    ) == Counter([None, 1, 2])
+
+
+@pytest.mark.asyncio
+async def test_issue_from_empty_pool(session_maker):
+    """Если запас пуст, ссылка создается сразу и запоминается."""
+    pool = InviteLinkPool()
+    bot = make_bot()
+    async with session_maker() as session:
+        link = await pool.issue(session, bot, AsyncMock(), 1)
+    assert link == "link-1"
+    assert await links(session_maker) == [("link-1", 1)]
+
+
+@pytest.mark.asyncio
+async def test_issue_returns_link_if_store_fails(session_maker, mocker):
+    """Созданная ссылка выдается, даже если ее не удалось сохранить."""
+    pool = InviteLinkPool()
+    mocker.patch.object(
+        pool, "_store", AsyncMock(side_effect=IntegrityError("", {}, None))
+    )
+    async with session_maker() as session:
+        link = await pool.issue(session, make_bot(), AsyncMock(), 1)
+    assert link == "link-1"
+    assert await links(session_maker) == []
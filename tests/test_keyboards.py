@@ -0,0 +1,83 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from bot.cache import bump_data_version, keyboard_cache
+from bot.catalog import LevelCatalog
+from bot.keyboards.keyboards import get_inline_keyboard
+from database.models import Base, Level, Role, User
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """Сессия к временной БД с зарегистрированным пользователем."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    keyboard_cache.clear()
+    async with session_maker() as session:
+        session.add_all([
+            Level(id=1, name="Не важно"),
+            Role(id=1, key="devops", name="DevOps"),
+            User(
+                telegram_id=1, role="devops ", role_id=1, is_registered=True
+            ),
+        ])
+        await session.commit()
+        yield session
+    keyboard_cache.clear()
+    await engine.dispose()
+
+
+def button_texts(keyboard):
+    return [button.text for row in keyboard.inline_keyboard for button in row]
+
+
+@pytest.mark.asyncio
+async def test_role_keyboard_cached_until_data_version_bump(session, mocker):
+    """Клавиатура ролей строится один раз и пересобирается после
+    изменения версии данных."""
+    first = await get_inline_keyboard(session, User)
+    execute = mocker.spy(session, "execute")
+
+    assert await get_inline_keyboard(session, User) is first
+    execute.assert_not_called()
+
+    session.add_all([
+        Role(id=2, key="qa", name="QA"),
+        User(telegram_id=2, role="QA", role_id=2, is_registered=True),
+        # Роль только у незарегистрированных в клавиатуру не попадает
+        Role(id=3, key="ml", name="ML"),
+        User(telegram_id=3, role="ML", role_id=3, is_registered=False),
+    ])
+    await session.commit()
+    bump_data_version()
+    keyboard = await get_inline_keyboard(session, User)
+
+    assert execute.call_count == 1
+    assert button_texts(keyboard) == ["DevOps", "QA"]
+    # Кнопки несут короткий id роли, а не ее название
+    assert [
+        button.callback_data for row in keyboard.inline_keyboard
+        for button in row
+    ] == ["role:1", "role:2"]
+
+
+@pytest.mark.asyncio
+async def test_level_keyboard_follows_catalog_reload(session, mocker):
+    """Клавиатура уровней пересобирается после перезагрузки справочника."""
+    level_catalog = mocker.patch(
+        "bot.keyboards.keyboards.level_catalog", LevelCatalog()
+    )
+    await level_catalog.load(session)
+    first = await get_inline_keyboard(session, Level)
+    assert await get_inline_keyboard(session, Level) is first
+
+    session.add(Level(id=2, name="Junior"))
+    await session.commit()
+    await level_catalog.load(session)
+    keyboard = await get_inline_keyboard(session, Level)
+
+    assert button_texts(keyboard) == ["Junior", "Не важно", "Назад"]
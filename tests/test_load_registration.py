@@ -0,0 +1,19 @@
+import pytest
+
+from tests.load_registration import run_load
+
+
+@pytest.mark.asyncio
+async def test_load_registration_smoke(tmp_path):
+    """Короткий прогон генератора нагрузки: все пользователи проходят
+    регистрацию и поиск без ошибок."""
+    users = 5
+    report, registered = await run_load(
+        users, concurrency=3, db_path=str(tmp_path / "load.db")
+    )
+    assert registered == users
+    assert report.errors == 0
+    assert report.unhandled == 0
+    assert len(report.latencies["handle_join_community"]) == users
+    assert report.updates == users * 13
+    assert "p99, мс" in report.format(registered)
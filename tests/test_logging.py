@@ -0,0 +1,38 @@
+import gzip
+import logging
+import queue
+
+from logger.logger import BoundedQueueHandler, gzip_rotator
+
+
+def make_record(message):
+    return logging.LogRecord(
+        "TEST_LOGGER", logging.INFO, __file__, 1, message, None, None
+    )
+
+
+def test_full_queue_drops_and_counts_records():
+    """При переполнении очереди записи отбрасываются и учитываются."""
+    log_queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    for number in range(5):
+        handler.handle(make_record(f"message {number}"))
+
+    assert log_queue.qsize() == 2
+    assert handler.dropped == 3
+    assert log_queue.get_nowait().getMessage() == "message 0"
+
+
+def test_gzip_rotator_compresses_rotated_file(tmp_path):
+    """Ротированный файл сжимается, исходный удаляется."""
+    source = tmp_path / "logfile.log.1"
+    source.write_text("строка лога\n", encoding="utf-8")
+    dest = tmp_path / "logfile.log.1.gz"
+
+    gzip_rotator(str(source), str(dest))
+
+    assert not source.exists()
+    with gzip.open(dest, "rt", encoding="utf-8") as file:
+        assert file.read() == "строка лога\n"
@@ -0,0 +1,110 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.methods import SendMessage
+from aiogram.types import Message, Update
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from bot.metrics import (ApiMetricsMiddleware, HandlerMetrics,
+                         HandlerMetricsMiddleware, UpdateMetricsMiddleware,
+                         UpdateTimings, _update_timings, create_metrics_app,
+                         install_db_metrics)
+
+
+class TestState(StatesGroup):
+    waiting = State()
+
+
+def make_update(update_id, text):
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1729152000,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+@pytest.fixture
+def metrics(mocker):
+    """Пустые метрики на время теста."""
+    metrics = HandlerMetrics()
+    mocker.patch("bot.metrics.handler_metrics", metrics)
+    return metrics
+
+
+@pytest.mark.asyncio
+async def test_update_metrics_labels_and_stages(metrics, tmp_path):
+    """Апдейт учитывается с метками роутера, обработчика и состояния,
+    время запросов к БД попадает в этап db."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    install_db_metrics(engine)
+    router = Router(name="srch_router")
+
+    @router.message(TestState.waiting)
+    async def processing_user_list(message: Message):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    dp = Dispatcher()
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.include_router(router)
+    bot = Bot("42:TEST")
+    await dp.storage.set_state(
+        StorageKey(bot_id=bot.id, chat_id=1, user_id=1), TestState.waiting
+    )
+
+    await dp.feed_update(bot, make_update(1, "QA"))
+    await dp.feed_update(bot, make_update(2, "QA"))
+    await engine.dispose()
+
+    labels = ("srch_router", "processing_user_list", "TestState:waiting")
+    assert metrics.updates == {labels: 2}
+    assert metrics.durations[(labels, "db")].count == 2
+    assert metrics.durations[(labels, "db")].sum > 0
+    assert metrics.durations[(labels, "api")].sum == 0
+    rendered = metrics.render()
+    assert (
+        'bot_updates_total{router="srch_router",'
+        'handler="processing_user_list",state="TestState:waiting"} 2'
+    ) in rendered
+    assert 'stage="total",le="+Inf"} 2' in rendered
+
+
+@pytest.mark.asyncio
+async def test_api_time_is_added_to_current_update(metrics):
+    """Запрос к Bot API учитывается в счетчике и в этапе api апдейта."""
+    timings = UpdateTimings()
+    token = _update_timings.set(timings)
+    make_request = AsyncMock(return_value="response")
+
+    result = await ApiMetricsMiddleware()(
+        make_request, Bot("42:TEST"), SendMessage(chat_id=1, text="test")
+    )
+    _update_timings.reset(token)
+
+    assert result == "response"
+    assert metrics.api_requests == {"SendMessage": 1}
+    assert timings.api > 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(metrics):
+    """Метрики отдаются в текстовом формате Prometheus."""
+    async with TestClient(TestServer(create_metrics_app())) as client:
+        response = await client.get("/metrics")
+        body = await response.text()
+
+    assert response.status == 200
+    assert response.content_type == "text/plain"
+    assert "# TYPE bot_update_duration_seconds histogram" in body
+    assert "bot_log_records_dropped_total 0" in body
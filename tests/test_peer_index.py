@@ -0,0 +1,197 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from bot.cache import inline_query_cache
+from bot.catalog import LevelCatalog
+from bot.handlers.inline import search_inline
+from bot.peer_index import PeerIndex, tokenize
+from bot.utils import add_user, update_user
+from database.models import Base, Level, User
+from settings import INLINE_CACHE_TIME, INLINE_RESULTS_LIMIT
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path, mocker):
+    """Сессия к временной БД с зарегистрированными пользователями."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    inline_query_cache.clear()
+    mocker.patch("bot.peer_index.level_catalog", LevelCatalog())
+    async with session_maker() as session:
+        session.add_all([
+            Level(id=1, name="Не важно"),
+            Level(id=2, name="Senior"),
+            User(
+                id=1, telegram_id=1, sber_id="ivanov", username="ivan",
+                school21_nickname="ivanovi", team_name="Платежи",
+                role="Golang разработчик", level_id=2,
+                description="Kafka и gRPC", is_registered=True,
+            ),
+            User(
+                id=2, telegram_id=2, sber_id="petrov", username="petr",
+                school21_nickname="petrovp", team_name="Kafka Team",
+                role="Go QA", level_id=1, is_registered=True,
+            ),
+            # Незарегистрированные в поиск не попадают
+            User(
+                id=3, telegram_id=3, sber_id="sidorov", role="Golang",
+                level_id=1, is_registered=False,
+            ),
+        ])
+        await session.commit()
+        yield session
+    inline_query_cache.clear()
+    await engine.dispose()
+
+
+def test_tokenize():
+    assert tokenize("Тёмный  Golang-разработчик") == [
+        "темный", "golang", "разработчик"
+    ]
+    assert tokenize(None) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("", ["1", "2"]),
+        ("gol", ["1"]),
+        ("ГОЛАНГ", []),
+        ("senior kaf", ["1"]),
+        ("kafka", ["1", "2"]),
+        # Точное совпадение слова выше совпадения по префиксу
+        ("go", ["2", "1"]),
+        ("kafka team", ["2"]),
+        ("sidorov", []),
+    ]
+)
+async def test_search(session, query, expected):
+    index = PeerIndex()
+    results, next_offset = await index.search(session, query, 0, 50)
+
+    assert [article.id for article in results] == expected
+    assert next_offset is None
+
+
+@pytest.mark.asyncio
+async def test_search_pages_and_card(session):
+    index = PeerIndex()
+    first, next_offset = await index.search(session, "", 0, 1)
+    second, last_offset = await index.search(session, "", next_offset, 1)
+
+    assert [first[0].id, second[0].id] == ["1", "2"]
+    assert (next_offset, last_offset) == (1, None)
+    card = first[0].input_message_content.message_text
+    assert "Роль: Senior Golang разработчик" in card
+    assert second[0].input_message_content.message_text.endswith(
+        "Над чем работаю: Не указано.\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_served_from_memory(session, mocker):
+    """Повторные запросы и запись пользователя ботом не обращаются
+    к БД за индексом, сброс индекса перестраивает его."""
+    index = PeerIndex()
+    mocker.patch("bot.utils.peer_index", index)
+    await index.search(session, "kafka", 0, 50)
+    execute = mocker.spy(session, "execute")
+    match = mocker.spy(index, "_match")
+
+    results, _ = await index.search(session, "Kafka", 0, 50)
+    await index.search(session, "petr", 0, 50)
+
+    assert len(results) == 2
+    execute.assert_not_called()
+    assert match.call_count == 1
+
+    await add_user(
+        session, telegram_id=4, username="fan", sber_id="kafka_fan",
+        school21_nickname="fan21", team_name="Ops", role="DevOps",
+        level_id=1, description=None, is_registered=True,
+        field_not_filled=None,
+    )
+    await update_user(
+        session, telegram_id=2, username="petr", sber_id="petrov",
+        school21_nickname="petrovp", team_name="QA Team", role="Go QA",
+        level_id=1, description=None, is_registered=True,
+        field_not_filled=None,
+    )
+    execute.reset_mock()
+    results, _ = await index.search(session, "kafka", 0, 50)
+
+    execute.assert_not_called()
+    assert [article.id for article in results] == ["1", "4"]
+    assert [article.id for article in (
+        await index.search(session, "qa team", 0, 50)
+    )[0]] == ["2"]
+
+    index.invalidate()
+    results, _ = await index.search(session, "kafka", 0, 50)
+
+    assert execute.call_count == 1
+    assert [article.id for article in results] == ["1", "4"]
+
+
+@pytest.mark.asyncio
+async def test_update_removes_unregistered(session):
+    index = PeerIndex()
+    await index.build(session)
+    user = await session.get(User, 1)
+    user.is_registered = False
+
+    index.update(user)
+    results, _ = await index.search(session, "", 0, 50)
+
+    assert [article.id for article in results] == ["2"]
+    assert await index.search(session, "golang", 0, 50) == ([], None)
+    assert "golang" not in index._sorted_tokens
+
+
+@pytest.mark.asyncio
+async def test_search_inline_handler(mocker):
+    inline_query = AsyncMock()
+    inline_query.from_user = MagicMock(id=1)
+    inline_query.query = "go"
+    inline_query.offset = "50"
+    mocker.patch(
+        "bot.handlers.inline.get_user_status",
+        AsyncMock(return_value=MagicMock(is_registered=True)),
+    )
+    search = mocker.patch(
+        "bot.handlers.inline.peer_index.search",
+        AsyncMock(return_value=(["card"], 100)),
+    )
+
+    await search_inline(inline_query, session=AsyncMock())
+
+    assert search.await_args.args[1:] == ("go", 50, INLINE_RESULTS_LIMIT)
+    inline_query.answer.assert_awaited_once_with(
+        ["card"], cache_time=INLINE_CACHE_TIME, is_personal=True,
+        next_offset="100",
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_inline_not_registered(mocker):
+    inline_query = AsyncMock()
+    inline_query.from_user = MagicMock(id=1)
+    mocker.patch(
+        "bot.handlers.inline.get_user_status",
+        AsyncMock(return_value=MagicMock(is_registered=False)),
+    )
+    search = mocker.patch("bot.handlers.inline.peer_index.search")
+
+    await search_inline(inline_query, session=AsyncMock())
+
+    search.assert_not_called()
+    assert inline_query.answer.await_args.args == ([],)
+    assert inline_query.answer.await_args.kwargs["button"].start_parameter \
+        == "inline"
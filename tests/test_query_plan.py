@@ -0,0 +1,91 @@
+import re
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from admin.user_management import (fetch_registration_counts,
+                                   incomplete_registration_stats,
+                                   registration_stats_by_date)
+from bot.cache import user_count_cache
+from bot.keyboards.keyboards import get_inline_keyboard
+from bot.utils import get_user_list, search_users
+from database.models import Base, User
+
+# Полный просмотр таблицы без индекса (формат SQLite до и после 3.36)
+FULL_SCAN = re.compile(r"SCAN (TABLE )?users( AS \w+)?")
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    """Движок временной БД со схемой и индексами из моделей."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def capture_statements(engine, query):
+    """Выполняет query и возвращает все SELECT-запросы к БД с параметрами."""
+    statements = []
+    user_count_cache.clear()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(
+        engine.sync_engine, "before_cursor_execute", before_cursor_execute
+    )
+    try:
+        session_maker = async_sessionmaker(engine, class_=AsyncSession)
+        async with session_maker() as session:
+            await query(session)
+    finally:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+    return statements
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "query",
+    [
+        lambda session: get_user_list(session, 1, 10, 1),
+        lambda session: get_user_list(session, 3, 10, 1, after_id=5),
+        lambda session: get_user_list(session, 3, 10, 1, before_id=5),
+        lambda session: get_inline_keyboard(session, User),
+        lambda session: search_users(session, "kafka", 10, after_position=10),
+        incomplete_registration_stats,
+        registration_stats_by_date,
+        fetch_registration_counts,
+    ],
+    ids=[
+        "user_list",
+        "user_list_next",
+        "user_list_back",
+        "role_keyboard",
+        "keyword_search",
+        "incomplete_registration_stats",
+        "registration_stats_by_date",
+        "registration_counts",
+    ]
+)
+async def test_hot_queries_use_indexes(engine, query):
+    """Горячие запросы поиска и аналитики не просматривают всю таблицу."""
+    statements = await capture_statements(engine, query)
+    assert statements
+
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, parameters
+            )
+            plan = [row[-1] for row in result]
+            assert not any(FULL_SCAN.fullmatch(step) for step in plan), (
+                statement, plan
+            )
@@ -18,6 +18,7 @@ from bot.handlers.registration import (handle_join_community,
 from bot.keyboards.keyboards import get_skip_inline_keyboard
 from bot.messages import Messages
 from bot.states.states import Registration
+from bot.validators.constants import ValidatorsMessages
 from database.models import User, moscow_tz
 
 
@@ -185,7 +186,14 @@ async def test_reg_action(is_admin, chat_type, expected_response):
     mock_session.get_user_admin = AsyncMock(return_value=is_admin)
     mock_state = AsyncMock()
 
-    await reg_action(mock_message, state=mock_state, session=mock_session)
+    with patch(
+        "bot.handlers.registration.validate_username",
+        AsyncMock(return_value=None)
+    ), patch(
+        "bot.handlers.registration.registration_scheduler"
+    ) as scheduler:
+        scheduler.schedule = AsyncMock()
+        await reg_action(mock_message, state=mock_state, session=mock_session)
 
     if expected_response is not None:
         mock_message.answer.assert_called_once_with(
@@ -196,6 +204,28 @@ async def test_reg_action(is_admin, chat_type, expected_response):
         mock_message.answer.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_reg_action_username_taken():
+    """Регистрация не начинается, если username из Telegram указан
+    у другого зарегистрированного участника."""
+    mock_message = create_mock_message(create_mock_user(), create_mock_chat())
+    mock_state = AsyncMock()
+
+    with patch(
+        "bot.handlers.registration.validate_username",
+        AsyncMock(return_value=ValidatorsMessages.USERNAME_EXIST_ERROR)
+    ), patch(
+        "bot.handlers.registration.registration_scheduler"
+    ) as scheduler:
+        await reg_action(mock_message, state=mock_state, session=AsyncMock())
+
+    mock_message.answer.assert_called_once_with(
+        ValidatorsMessages.USERNAME_EXIST_ERROR
+    )
+    scheduler.schedule.assert_not_called()
+    mock_state.set_state.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_process_school21_nickname_success():
     """Тест обработки никнейма Школы 21 с успешной валидацией."""
@@ -468,7 +498,7 @@ async def test_handle_join_community():
         return_value=None
     ), patch(
         "school_21_community_bot_3.bot.handlers.registration."
-        "send_invite_link",
+        "invite_link_pool.issue",
         return_value=None
     ):
         await handle_join_community(
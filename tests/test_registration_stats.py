@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from admin.user_management import registration_stats_by_date
+from database.models import (Base, RegistrationDailyStats, User,
+                             backfill_registration_stats)
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """Временная БД со схемой и триггерами из моделей."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_maker() as session:
+        yield session
+    await engine.dispose()
+
+
+async def load_stats(session):
+    result = await session.execute(
+        select(
+            RegistrationDailyStats.date,
+            RegistrationDailyStats.total,
+            RegistrationDailyStats.registered,
+            RegistrationDailyStats.abandoned,
+        ).order_by(RegistrationDailyStats.date)
+    )
+    return result.all()
+
+
+@pytest.mark.asyncio
+async def test_stats_follow_user_changes(session):
+    """Триггеры пересчитывают статистику дня при добавлении, завершении
+    регистрации, переносе даты и удалении пользователя."""
+    session.add_all([
+        User(
+            telegram_id=1,
+            registration_date=datetime(2024, 10, 1, 10),
+            is_registered=True,
+        ),
+        User(telegram_id=2, registration_date=datetime(2024, 10, 1, 23)),
+        User(telegram_id=3, registration_date=datetime(2024, 10, 2, 9)),
+    ])
+    await session.commit()
+    assert await load_stats(session) == [
+        ("2024-10-01", 2, 1, 1),
+        ("2024-10-02", 1, 0, 1),
+    ]
+
+    await session.execute(
+        update(User).where(User.telegram_id == 2).values(is_registered=True)
+    )
+    await session.execute(
+        update(User)
+        .where(User.telegram_id == 3)
+        .values(registration_date=datetime(2024, 10, 1, 12))
+    )
+    await session.execute(delete(User).where(User.telegram_id == 1))
+    await session.commit()
+    assert await load_stats(session) == [("2024-10-01", 2, 1, 1)]
+
+    # Полный пересчет совпадает с инкрементальным
+    await backfill_registration_stats(session)
+    assert await load_stats(session) == [("2024-10-01", 2, 1, 1)]
+
+
+@pytest.mark.asyncio
+async def test_registration_stats_by_date_reads_daily_table(session):
+    """Статистика для админ-панели берется из таблицы по дням."""
+    session.add_all([
+        RegistrationDailyStats(
+            date="2024-10-01", total=4, registered=3, abandoned=1
+        ),
+        RegistrationDailyStats(
+            date="2024-10-02", total=3, registered=0, abandoned=3
+        ),
+    ])
+    await session.commit()
+
+    assert await registration_stats_by_date(session) == {
+        "2024-10-01": {
+            "total_users": 4,
+            "registered_users": 3,
+            "unregistered_users": 1,
+            "conversion_rate": 75.0,
+        },
+        "2024-10-02": {
+            "total_users": 3,
+            "registered_users": 0,
+            "unregistered_users": 3,
+            "conversion_rate": 0,
+        },
+    }
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import SendMessage
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.future import select
+
+from bot.cache import user_status_cache
+from bot.scheduler import RegistrationScheduler
+from database.models import Base, RegistrationTimer, User
+from settings import TIMER_RETRY_BACKOFF, TIMER_USER_STEP
+
+
+@pytest.mark.asyncio
+async def test_schedule_persists_deadline():
+    """Таймер сохраняется в БД и попадает в кучу планировщика."""
+    scheduler = RegistrationScheduler()
+    session = AsyncMock()
+
+    await scheduler.schedule(session, 1, 10, "test_user")
+
+    session.merge.assert_called_once()
+    timer = session.merge.call_args[0][0]
+    assert timer.telegram_id == 1
+    assert timer.chat_id == 10
+    assert timer.deadline >= int(time.time()) + TIMER_USER_STEP * 3600 - 1
+    assert scheduler._deadlines[1] == timer.deadline
+    session.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cancel_removes_deadline():
+    """Отмененный таймер удаляется из БД и больше не срабатывает."""
+    scheduler = RegistrationScheduler()
+    session = AsyncMock()
+    await scheduler.schedule(session, 1, 10, "test_user")
+
+    await scheduler.cancel(session, 1)
+
+    assert 1 not in scheduler._deadlines
+    session.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_run_expires_only_active_timers():
+    """Цикл планировщика прерывает регистрацию только по актуальным
+    дедлайнам, отмененные и перенесенные записи пропускаются."""
+    scheduler = RegistrationScheduler()
+    scheduler._wakeup = asyncio.Event()
+    now = int(time.time())
+    scheduler._push(1, now - 10)
+    scheduler._push(2, now - 5)
+    # Перенесенный таймер: старая запись остается в куче
+    scheduler._push(3, now - 1)
+    scheduler._push(3, now + 3600)
+    scheduler._deadlines.pop(2)
+
+    with patch.object(
+        scheduler, "_expire", new_callable=AsyncMock
+    ) as mock_expire:
+        task = asyncio.create_task(scheduler._run())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    mock_expire.assert_called_once_with(1)
+    assert scheduler._deadlines == {3: now + 3600}
+
+
+@pytest.mark.asyncio
+async def test_expire_failure_is_retried_with_backoff():
+    """После ошибки прерывания регистрации дедлайн возвращается в кучу
+    с растущей задержкой."""
+    scheduler = RegistrationScheduler()
+    scheduler._wakeup = asyncio.Event()
+    now = int(time.time())
+
+    with patch(
+        "bot.scheduler.AsyncSessionLocal", side_effect=RuntimeError("busy")
+    ):
+        await scheduler._expire(1)
+        first = scheduler._deadlines.pop(1)
+        await scheduler._expire(1)
+        second = scheduler._deadlines[1]
+
+    assert now + TIMER_RETRY_BACKOFF <= first < now + TIMER_RETRY_BACKOFF + 2
+    assert second - first >= TIMER_RETRY_BACKOFF - 1
+    assert scheduler._failures == {1: 2}
+
+
+def test_retries_are_capped(mocker):
+    """После TIMER_RETRY_ATTEMPTS повторов дедлайн в кучу не возвращается."""
+    mocker.patch("bot.scheduler.TIMER_RETRY_ATTEMPTS", 2)
+    error = mocker.patch("bot.scheduler.scheduler_logger.error")
+    scheduler = RegistrationScheduler()
+    scheduler._failures[1] = 2
+
+    scheduler._retry_later(1)
+
+    assert scheduler._deadlines == {}
+    assert scheduler._failures == {}
+    error.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_expire_blocked_user(tmp_path, mocker):
+    """Пользователь, заблокировавший бота: черновик сохраняется,
+    таймер удаляется без повторов."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_maker() as session:
+        session.add(RegistrationTimer(
+            telegram_id=1, chat_id=1, username="blocked", deadline=0
+        ))
+        await session.commit()
+    mocker.patch("bot.scheduler.AsyncSessionLocal", session_maker)
+    user_status_cache.clear()
+    scheduler = RegistrationScheduler()
+    scheduler._wakeup = asyncio.Event()
+    scheduler._storage = MemoryStorage()
+    scheduler._bot = AsyncMock(id=42)
+    scheduler._bot.send_message.side_effect = TelegramForbiddenError(
+        method=SendMessage(chat_id=1, text="text"),
+        message="Forbidden: bot was blocked by the user",
+    )
+
+    await scheduler._expire(1)
+
+    async with session_maker() as session:
+        user = await session.scalar(
+            select(User).where(User.telegram_id == 1)
+        )
+        assert await session.get(RegistrationTimer, 1) is None
+    assert user.username == "blocked"
+    assert not user.is_registered
+    assert scheduler._deadlines == {}
+    assert scheduler._failures == {}
+    user_status_cache.clear()
+    await engine.dispose()
@@ -9,11 +9,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from .test_registration import (create_mock_chat, create_mock_message,
                                 create_mock_user)
-from bot.handlers.search import (back_to_begin, choosing_a_role,
-                                 go_to_searching_start, role_selection_keyb)
+from bot.handlers.search import (back_to_begin, choosing_a_level,
+                                 choosing_a_role, go_to_searching_start,
+                                 role_selection_keyb)
 from bot.messages import Messages
 from bot.states.states import Search
-from settings import LIMIT, START_OFFSET
+from settings import LIMIT
 
 
 @pytest.fixture
@@ -54,7 +55,7 @@ async def test_role_selection_keyb(mock_objects):
             session=mock_session
         )
 
-    mock_state.update_data.assert_any_call(offset=START_OFFSET)
+    mock_state.update_data.assert_any_call(first_id=None, last_id=None)
     mock_state.update_data.assert_any_call(limit=LIMIT)
     mock_message.answer.assert_any_call(
         Messages.LETS_START,
@@ -77,7 +78,7 @@ async def test_choosing_a_role():
     mock_state = AsyncMock(spec=FSMContext)
     mock_session = AsyncMock(spec=AsyncSession)
 
-    mock_callback_query.data = "role_example"
+    mock_callback_query.data = "role:5"
     mock_callback_query.message = AsyncMock()
     mock_callback_query.message.answer = AsyncMock()
 
@@ -104,7 +105,9 @@ async def test_choosing_a_role():
             session=mock_session
         )
 
-    mock_state.update_data.assert_called_once_with(role="role_example")
+    mock_state.update_data.assert_called_once_with(
+        role_id=5, keywords=None
+    )
 
     expected_message_text = Messages.WHAT_LEVEL
     mock_callback_query.message.answer.assert_called_once_with(
@@ -116,6 +119,34 @@ async def test_choosing_a_role():
     mock_state.set_state.assert_called_once_with(Search.waiting_for_level)
 
 
+@pytest.mark.asyncio
+async def test_choosing_unknown_level(mock_objects):
+    """Неизвестный уровень не сохраняется, список не выводится."""
+    mock_user, mock_chat, mock_message, mock_callback_query = mock_objects
+    mock_callback_query.data = "Architect"
+    mock_callback_query.answer = AsyncMock()
+    mock_state = AsyncMock(spec=FSMContext)
+
+    with patch(
+        "bot.handlers.search.level_catalog.resolve",
+        AsyncMock(return_value=None),
+    ), patch(
+        "bot.handlers.search.processing_user_list", AsyncMock()
+    ) as processing:
+        await choosing_a_level(
+            mock_callback_query,
+            state=mock_state,
+            session=AsyncMock(spec=AsyncSession)
+        )
+
+    mock_callback_query.answer.assert_called_once_with(
+        Messages.UNKNOWN_LEVEL
+    )
+    mock_state.update_data.assert_not_called()
+    mock_state.set_state.assert_not_called()
+    processing.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_go_to_searching_start(mock_objects):
     """Тестирование функции для обработки нажатия кнопки "Назад"."""
@@ -150,7 +181,9 @@ async def test_go_to_searching_start(mock_objects):
         reply_markup=mock_keyboard
     )
     mock_callback_query.answer.assert_called_once()
-    mock_state.update_data.assert_called_once_with(offset=START_OFFSET)
+    mock_state.update_data.assert_called_once_with(
+        first_id=None, last_id=None
+    )
     mock_state.set_state.assert_called_once_with(Search.waiting_for_role)
 
 
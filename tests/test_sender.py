@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (CreateChatInviteLink, GetMe, SendDocument,
+                             SendMessage)
+
+from bot.sender import (BULK, INTERACTIVE, InteractivePriorityMiddleware,
+                        SendScheduler, SendSchedulerMiddleware, TokenBucket,
+                        bulk_sending)
+
+
+@pytest.fixture
+def scheduler(mocker):
+    """Очередь на десять сообщений в секунду без всплесков: и на бота,
+    и на чат."""
+    mocker.patch("bot.sender.SEND_GLOBAL_RATE", 10)
+    mocker.patch("bot.sender.SEND_GLOBAL_BURST", 1)
+    mocker.patch("bot.sender.SEND_CHAT_RATE", 10)
+    mocker.patch("bot.sender.SEND_CHAT_BURST", 1)
+    return SendScheduler()
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket.updated
+    bucket.consume(now)
+    bucket.consume(now)
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 0.5) == 0
+    bucket.pause(10)
+    assert bucket.wait_time(now + 1) > 5
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_go_first(scheduler):
+    """Ответы пользователям обгоняют массовые сообщения в очереди."""
+    order = []
+
+    async def send(chat_id, priority):
+        await scheduler.acquire(chat_id, priority)
+        order.append(chat_id)
+
+    # Первое сообщение забирает единственный токен, остальные ждут
+    await send(1, BULK)
+    tasks = [asyncio.create_task(send(chat_id, BULK)) for chat_id in (2, 3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(send(4, INTERACTIVE)))
+    await asyncio.gather(*tasks)
+    await scheduler.stop()
+    assert order == [1, 4, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_per_chat_rate_limit(scheduler):
+    start = time.monotonic()
+    for _ in range(3):
+        await scheduler.acquire(1)
+    await scheduler.stop()
+    # Третье сообщение в чат - не раньше чем через два интервала
+    assert time.monotonic() - start >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_middleware_retries_after_429(scheduler, mocker):
+    warning = mocker.patch("bot.sender.bot_logger.warning")
+    method = SendMessage(chat_id=1, text="Привет")
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method, "Too Many Requests", 0.2)
+        return "ok"
+
+    middleware = SendSchedulerMiddleware(scheduler)
+    assert await middleware(make_request, None, method) == "ok"
+    await scheduler.stop()
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.2
+    warning.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_middleware_priority(scheduler, mocker):
+    acquire = mocker.patch.object(scheduler, "acquire")
+    middleware = SendSchedulerMiddleware(scheduler)
+
+    async def make_request(bot, method):
+        return "ok"
+
+    await middleware(make_request, None, GetMe())
+    # Не отправка сообщения: очередь не нужна, даже если есть chat_id
+    await middleware(
+        make_request, None, CreateChatInviteLink(chat_id="@channel")
+    )
+    acquire.assert_not_called()
+    await middleware(make_request, None, SendMessage(chat_id=1, text="a"))
+    # Вне обработки апдейта отправка массовая
+    acquire.assert_awaited_with(1, BULK)
+
+    async def handler(method, data):
+        return await middleware(make_request, None, method)
+
+    # Ответы на апдейт - интерактивные, кроме документов
+    await InteractivePriorityMiddleware()(
+        handler, SendMessage(chat_id=1, text="a"), {}
+    )
+    acquire.assert_awaited_with(1, INTERACTIVE)
+    await InteractivePriorityMiddleware()(
+        handler, SendDocument(chat_id=3, document="file_id"), {}
+    )
+    acquire.assert_awaited_with(3, BULK)
+    with bulk_sending():
+        await middleware(make_request, None, SendMessage(chat_id=2, text="b"))
+    acquire.assert_awaited_with(2, BULK)
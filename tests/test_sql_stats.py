@@ -0,0 +1,76 @@
+import logging
+import re
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from database.models import Base, User
+from database.sql_stats import SQLStats, install_sql_timing, normalize_sql
+
+
+def test_normalize_sql_merges_statements_by_shape():
+    """Запросы, отличающиеся только значениями, нормализуются одинаково."""
+    assert normalize_sql(
+        "SELECT users.id FROM users\n  WHERE users.role = 'QA' LIMIT 10"
+    ) == normalize_sql(
+        "SELECT users.id FROM users WHERE users.role = 'DevOps' LIMIT 5"
+    ) == "SELECT users.id FROM users WHERE users.role = ? LIMIT ?"
+    assert normalize_sql(
+        "SELECT school21_nickname FROM users WHERE id IN (?, ?, ?)"
+    ) == "SELECT school21_nickname FROM users WHERE id IN (?)"
+    assert normalize_sql(
+        "INSERT INTO level (id, name) VALUES (?, ?), (?, ?), (?, ?)"
+    ) == "INSERT INTO level (id, name) VALUES (?), ..."
+
+
+def test_histogram_snapshot():
+    """Статистика считает корзины, перцентили и сортирует по времени."""
+    stats = SQLStats()
+    for elapsed_ms in [0.5, 0.7, 3, 40]:
+        stats.record("SELECT 1", elapsed_ms)
+    stats.record("SELECT * FROM users", 2000)
+
+    slowest, fastest = stats.snapshot()
+    assert slowest["sql"] == "SELECT * FROM users"
+    assert slowest["buckets"]["+Inf"] == 1
+    assert fastest["sql"] == "SELECT ?"
+    assert fastest["count"] == 4
+    assert fastest["p50_ms"] == 1
+    assert fastest["p99_ms"] == 50
+    assert fastest["max_ms"] == 40
+    assert fastest["buckets"]["<=1"] == 2
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path, mocker):
+    """Движок временной БД с замером времени запросов."""
+    stats = SQLStats()
+    mocker.patch("database.sql_stats.sql_stats", stats)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    install_sql_timing(engine)
+    yield engine, stats
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logged_with_plan(engine, mocker, caplog):
+    """Запросы попадают в статистику, медленные - в лог с планом."""
+    engine, stats = engine
+    mocker.patch("database.sql_stats.SQL_SLOW_QUERY_MS", 0)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+
+    with caplog.at_level(logging.WARNING, logger="SQL_LOGGER"):
+        async with session_maker() as session:
+            for role in ["QA", "DevOps"]:
+                await session.execute(select(User).where(User.role == role))
+
+    snapshot = {row["sql"]: row for row in stats.snapshot()}
+    statement = next(sql for sql in snapshot if "FROM users" in sql)
+    assert snapshot[statement]["count"] == 2
+    # Формат плана SQLite до и после 3.36
+    assert re.search(r"план: SCAN (TABLE )?users", caplog.text)
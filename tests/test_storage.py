@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.future import select
+
+from bot.states.states import Registration
+from bot.storage import SQLiteStorage
+from database.models import Base, FSMRecord
+
+KEY = StorageKey(bot_id=1, chat_id=2, user_id=3)
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    """Отдельная SQLite-база для хранилища FSM."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'fsm.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def count_records(session_maker):
+    async with session_maker() as session:
+        result = await session.execute(select(func.count(FSMRecord.key)))
+        return result.scalar()
+
+
+@pytest.mark.asyncio
+async def test_state_and_data_roundtrip(session_maker):
+    """Состояние и данные сохраняются в БД и читаются новым экземпляром."""
+    storage = SQLiteStorage(session_maker)
+    await storage.set_state(KEY, Registration.waiting_for_sber_id)
+    await storage.update_data(KEY, {"school21_nickname": "nickname"})
+
+    restarted = SQLiteStorage(session_maker)
+    assert await restarted.get_state(KEY) == (
+        Registration.waiting_for_sber_id.state
+    )
+    assert await restarted.get_data(KEY) == {"school21_nickname": "nickname"}
+
+
+@pytest.mark.asyncio
+async def test_batch_coalesces_writes(session_maker):
+    """Все изменения внутри batch() записываются одним сбросом."""
+    storage = SQLiteStorage(session_maker)
+    with patch.object(
+        storage, "_flush", wraps=storage._flush
+    ) as mock_flush:
+        async with storage.batch():
+            await storage.update_data(KEY, {"offset": 0})
+            await storage.update_data(KEY, {"limit": 10})
+            await storage.set_state(KEY, "Search:users_list")
+            assert await count_records(session_maker) == 0
+        mock_flush.assert_called_once()
+
+    assert await storage.get_data(KEY) == {"offset": 0, "limit": 10}
+    assert await storage.get_state(KEY) == "Search:users_list"
+
+
+@pytest.mark.asyncio
+async def test_clear_removes_record(session_maker):
+    """Завершенный сценарий не оставляет записей в БД."""
+    storage = SQLiteStorage(session_maker)
+    await storage.set_state(KEY, "Search:users_list")
+    await storage.set_data(KEY, {"offset": 10})
+
+    async with storage.batch():
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+
+    assert await count_records(session_maker) == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_drafts_are_ignored_and_purged(session_maker):
+    """Черновики старше FSM_STORAGE_TTL не читаются и удаляются."""
+    storage = SQLiteStorage(session_maker)
+    await storage.update_data(KEY, {"sber_id": "ivanov"})
+    async with session_maker() as session:
+        await session.execute(update(FSMRecord).values(updated_at=0))
+        await session.commit()
+
+    assert await storage.get_data(KEY) == {}
+    await storage.purge_expired()
+    assert await count_records(session_maker) == 0
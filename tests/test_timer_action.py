@@ -1,29 +1,36 @@
 from unittest.mock import ANY, AsyncMock, patch
 
 import pytest
-from aiogram.types import Message
 
 from bot.messages import Messages
-from bot.utils import timer_action
+from bot.utils import UserStatus, timer_action
+from database.models import RegistrationTimer
 
 
 @pytest.fixture
 def setup_timer_action():
-    """Фикстура для настройки сообщения, состояния и сессии."""
-    message = AsyncMock(spec=Message)
-    message.from_user = AsyncMock()
-    message.from_user.id = 12345344
-    message.from_user.username = "test_user"
-    message.answer = AsyncMock()
+    """Фикстура для настройки бота, таймера, состояния и сессии."""
+    bot = AsyncMock()
+    timer = RegistrationTimer(
+        telegram_id=12345344,
+        chat_id=12345344,
+        username="test_user",
+        deadline=0,
+    )
     state = AsyncMock()
     session = AsyncMock()
-    return message, state, session
+    return bot, timer, state, session
 
 
-async def mock_check_user_exists(session, exists):
-    """Мок для проверки существования пользователя."""
-    session.query = AsyncMock()
-    session.query.return_value.count.return_value = 1 if exists else 0
+def mock_user_status(exists):
+    """Мок для статуса пользователя."""
+    return patch(
+        "bot.utils.get_user_status",
+        new_callable=AsyncMock,
+        return_value=UserStatus(
+            is_registered=False, is_admin=False, exists=exists
+        ),
+    )
 
 
 async def mock_user_actions(session, exists):
@@ -41,7 +48,7 @@ async def mock_parse_level_and_role(session):
 @pytest.mark.asyncio
 async def test_timer_action_user_exists(setup_timer_action):
     """Тест для случая, когда пользователь существует."""
-    message, state, session = setup_timer_action
+    bot, timer, state, session = setup_timer_action
     state.get_data.return_value = {
         "role_level": "Middle",
         "sber_id": "123456",
@@ -50,9 +57,7 @@ async def test_timer_action_user_exists(setup_timer_action):
         "activity_description": "description"
     }
 
-    await mock_check_user_exists(session, True)
-
-    with patch(
+    with mock_user_status(True), patch(
         "bot.utils.parse_level_and_role",
         new_callable=AsyncMock
     ) as mock_parse:
@@ -65,11 +70,11 @@ async def test_timer_action_user_exists(setup_timer_action):
         ) as mock_update_user:
             mock_update_user.return_value = user_action_mock
 
-            with patch("asyncio.sleep", return_value=None):
-                await timer_action(message, state, session)
+            await timer_action(bot, timer, state, session)
 
             mock_update_user.assert_called_once()
-            message.answer.assert_called_once_with(
+            bot.send_message.assert_called_once_with(
+                timer.chat_id,
                 Messages.USER_BREAKE_OUT_REGISTRATION,
                 reply_markup=ANY
             )
@@ -78,7 +83,7 @@ async def test_timer_action_user_exists(setup_timer_action):
 @pytest.mark.asyncio
 async def test_timer_action_user_does_not_exist(setup_timer_action):
     """Тест для случая, когда пользователь не существует."""
-    message, state, session = setup_timer_action
+    bot, timer, state, session = setup_timer_action
     state.get_data.return_value = {
         "role_level": "Junior",
         "sber_id": None,
@@ -87,9 +92,7 @@ async def test_timer_action_user_does_not_exist(setup_timer_action):
         "activity_description": None
     }
 
-    await mock_check_user_exists(session, False)
-
-    with patch(
+    with mock_user_status(False), patch(
         "bot.utils.parse_level_and_role",
         new_callable=AsyncMock
     ) as mock_parse:
@@ -97,16 +100,16 @@ async def test_timer_action_user_does_not_exist(setup_timer_action):
         user_action_mock = await mock_user_actions(session, False)
 
         with patch(
-            "bot.utils.update_user",
+            "bot.utils.add_user",
             new_callable=AsyncMock
-        ) as mock_update_user:
-            mock_update_user.return_value = user_action_mock
+        ) as mock_add_user:
+            mock_add_user.return_value = user_action_mock
 
-            with patch("asyncio.sleep", return_value=None):
-                await timer_action(message, state, session)
+            await timer_action(bot, timer, state, session)
 
-            mock_update_user.assert_called_once()
-            message.answer.assert_called_once_with(
+            mock_add_user.assert_called_once()
+            bot.send_message.assert_called_once_with(
+                timer.chat_id,
                 Messages.USER_BREAKE_OUT_REGISTRATION,
                 reply_markup=ANY
             )
@@ -115,7 +118,7 @@ async def test_timer_action_user_does_not_exist(setup_timer_action):
 @pytest.mark.asyncio
 async def test_timer_action_with_empty_fields(setup_timer_action):
     """Тест для случая с пустыми полями."""
-    message, state, session = setup_timer_action
+    bot, timer, state, session = setup_timer_action
     state.get_data.return_value = {
         "role_level": None,
         "sber_id": None,
@@ -124,9 +127,7 @@ async def test_timer_action_with_empty_fields(setup_timer_action):
         "activity_description": None
     }
 
-    await mock_check_user_exists(session, False)
-
-    with patch(
+    with mock_user_status(False), patch(
         "bot.utils.parse_level_and_role",
         new_callable=AsyncMock
     ) as mock_parse:
@@ -134,16 +135,16 @@ async def test_timer_action_with_empty_fields(setup_timer_action):
         user_action_mock = await mock_user_actions(session, False)
 
         with patch(
-            "bot.utils.update_user",
+            "bot.utils.add_user",
             new_callable=AsyncMock
-        ) as mock_update_user:
-            mock_update_user.return_value = user_action_mock
+        ) as mock_add_user:
+            mock_add_user.return_value = user_action_mock
 
-            with patch("asyncio.sleep", return_value=None):
-                await timer_action(message, state, session)
+            await timer_action(bot, timer, state, session)
 
-            mock_update_user.assert_called_once()
-            message.answer.assert_called_once_with(
+            mock_add_user.assert_called_once()
+            bot.send_message.assert_called_once_with(
+                timer.chat_id,
                 Messages.USER_BREAKE_OUT_REGISTRATION,
                 reply_markup=ANY
             )
@@ -0,0 +1,135 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from bot.cache import user_status_cache
+from bot.utils import add_user, update_user
+from bot.validators.constants import ValidatorsMessages
+from bot.validators.uniqueness import UniquenessIndex
+from bot.validators.validators import (validate_sber_id,
+                                       validate_school21_nickname,
+                                       validate_username)
+from database.models import Base, User
+
+USER_FIELDS = {
+    "team_name": "team",
+    "role": "DevOps",
+    "level_id": 1,
+    "description": "description",
+    "field_not_filled": None,
+}
+
+
+@pytest_asyncio.fixture
+async def index(mocker):
+    """Отдельный индекс уникальных полей для каждого теста."""
+    index = UniquenessIndex()
+    mocker.patch("bot.validators.base.uniqueness_index", index)
+    mocker.patch("bot.utils.uniqueness_index", index)
+    return index
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """Сессия к временной БД с зарегистрированным и незарегистрированным
+    пользователями."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    user_status_cache.clear()
+    async with session_maker() as session:
+        session.add_all([
+            User(
+                telegram_id=1, username="user", sber_id="sber",
+                school21_nickname="nick", is_registered=True,
+            ),
+            User(
+                telegram_id=2, username="draft", sber_id="draft.sber",
+                school21_nickname="draftnick", is_registered=False,
+            ),
+        ])
+        await session.commit()
+        yield session
+    user_status_cache.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_miss_answered_from_memory(session, index, mocker):
+    """Свободное значение проверяется без обращения к БД, занятое
+    подтверждается запросом EXISTS."""
+    await index.load(session)
+    execute = mocker.spy(session, "execute")
+    scalar = mocker.spy(session, "scalar")
+
+    assert not await index.is_taken(session, "school21_nickname", "other")
+    # Значения незарегистрированных пользователей не заняты
+    assert not await index.is_taken(
+        session, "school21_nickname", "draftnick"
+    )
+    # Свое значение не считается занятым
+    assert not await index.is_taken(session, "username", "user", 1)
+    execute.assert_not_called()
+    scalar.assert_not_called()
+
+    assert await index.is_taken(session, "sber_id", "sber")
+    assert scalar.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_value_freed_in_other_process(session, index):
+    await index.load(session)
+    await session.execute(
+        update(User).where(User.telegram_id == 1).values(sber_id="new")
+    )
+    await session.commit()
+
+    assert not await index.is_taken(session, "sber_id", "sber")
+    # До перечитывания индекса новое значение не видно, его проверит
+    # уникальный индекс БД при сохранении
+    assert not await index.is_taken(session, "sber_id", "new")
+    await index.load(session)
+    assert await index.is_taken(session, "sber_id", "new")
+
+
+@pytest.mark.asyncio
+async def test_writes_update_index(session, index, mocker):
+    """Запись пользователя ботом сразу отражается в индексе."""
+    await index.load(session)
+    await add_user(
+        session, telegram_id=3, username="third", sber_id="third.sber",
+        school21_nickname="thirdnick", is_registered=True, **USER_FIELDS
+    )
+    assert await index.is_taken(session, "school21_nickname", "thirdnick")
+
+    await update_user(
+        session, telegram_id=3, username="third", sber_id="third.sber",
+        school21_nickname="renamed", is_registered=True, **USER_FIELDS
+    )
+    execute = mocker.spy(session, "execute")
+    scalar = mocker.spy(session, "scalar")
+
+    assert not await index.is_taken(session, "school21_nickname", "thirdnick")
+    execute.assert_not_called()
+    scalar.assert_not_called()
+    assert await index.is_taken(session, "school21_nickname", "renamed")
+
+
+@pytest.mark.asyncio
+async def test_validators(session, index):
+    """Занятые ник и имя в СберЧате отклоняются на шаге ввода."""
+    assert await validate_school21_nickname("nick", session) == (
+        ValidatorsMessages.SCHOOL21NICKNAME_EXIST_ERROR
+    )
+    assert await validate_sber_id("sber", session) == (
+        ValidatorsMessages.SBER_ID_EXIST_ERROR
+    )
+    assert await validate_sber_id("draft.sber", session) is None
+    assert await validate_username("user", session, 2) == (
+        ValidatorsMessages.USERNAME_EXIST_ERROR
+    )
+    assert await validate_username("user", session, 1) is None
+    assert await validate_username(None, session, 2) is None
@@ -0,0 +1,142 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from bot.cache import bump_data_version, user_count_cache
+from bot.utils import build_fts_query, get_user_list, search_users
+from database.models import Base, Role, User
+
+ROLE = "golang разработчик"
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """Сессия к временной БД с пользователями для поиска."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    user_count_cache.clear()
+    async with session_maker() as session:
+        session.add_all([
+            User(
+                telegram_id=number,
+                username=f"user_{number}",
+                sber_id=f"sber_{number}",
+                team_name="team",
+                role=ROLE,
+                role_id=1,
+                level_id=2 if number % 2 else 3,
+                is_registered=number != 24,
+            )
+            for number in range(1, 26)
+        ])
+        # Пользователь с другой ролью в выборку не попадает
+        session.add_all([
+            Role(id=1, key=ROLE, name=ROLE),
+            Role(id=2, key="qa", name="QA"),
+            User(telegram_id=100, role="QA", role_id=2, is_registered=True),
+        ])
+        await session.commit()
+        yield session
+    user_count_cache.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_user_list_pages_forward_and_back(session, mocker):
+    """Листание вперед и назад по курсорам: номера строк отсчитываются
+    от курсора, общее количество берется из кэша до изменения данных."""
+    first_page, count = await get_user_list(
+        session, level_id=1, limit=10, role_id=1
+    )
+    assert count == 24
+    assert [user.position for user in first_page] == list(range(1, 11))
+
+    execute = mocker.spy(session, "execute")
+    scalar = mocker.spy(session, "scalar")
+    second_page, count = await get_user_list(
+        session, level_id=1, limit=10, role_id=1,
+        after_id=first_page[-1].id, cursor_position=10
+    )
+    last_page, count = await get_user_list(
+        session, level_id=1, limit=10, role_id=1,
+        after_id=second_page[-1].id, cursor_position=20
+    )
+    assert count == 24
+    assert [user.position for user in last_page] == [21, 22, 23, 24]
+    assert execute.call_count == 2
+    scalar.assert_not_called()
+
+    previous_page, count = await get_user_list(
+        session, level_id=1, limit=10, role_id=1,
+        before_id=last_page[0].id, cursor_position=21
+    )
+    assert previous_page == second_page
+
+    # После изменения пользователей количество считается заново
+    user = await session.get(User, 1)
+    user.is_registered = False
+    await session.commit()
+    bump_data_version()
+    _, count = await get_user_list(session, level_id=1, limit=10, role_id=1)
+    assert count == 23
+
+
+@pytest.mark.asyncio
+async def test_get_user_list_filters_level_and_registration(session):
+    """Фильтр по уровню, незарегистрированные пользователи не выводятся."""
+    users_list, count = await get_user_list(
+        session, level_id=3, limit=10, role_id=1
+    )
+
+    assert count == 11
+    assert len(users_list) == 10
+    assert 24 not in [user.id for user in users_list]
+
+
+@pytest.mark.asyncio
+async def test_search_users_ranked_and_paged(session):
+    """Поиск по словам в описании, команде и роли: совпадение в команде
+    весит больше, чем в описании, позиции служат курсорами."""
+    session.add_all([
+        User(telegram_id=200, description="Пишу стримы на Kafka",
+             team_name="Платежи", role="Java", is_registered=True),
+        User(telegram_id=201, description="Прочее",
+             team_name="Kafka Streams", role="Java", is_registered=True),
+        User(telegram_id=202, description="kafka", is_registered=False),
+    ])
+    await session.commit()
+
+    found, count = await search_users(session, "kafk", limit=10)
+    assert count == 2
+    assert [user.team_name for user in found] == ["Kafka Streams", "Платежи"]
+
+    found, count = await search_users(session, "Java пиШУ", limit=10)
+    assert [user.team_name for user in found] == ["Платежи"]
+
+    first_page, count = await search_users(session, "team", limit=10)
+    assert count == 24
+    last_page, count = await search_users(
+        session, "team", limit=10, after_position=20
+    )
+    assert [user.position for user in last_page] == [21, 22, 23, 24]
+    previous_page, count = await search_users(
+        session, "team", limit=10, before_position=11
+    )
+    assert previous_page == first_page
+
+    # После изменения пользователя индекс обновляется триггером
+    user = await session.get(User, found[0].id)
+    user.description = "Только Go"
+    await session.commit()
+    found, count = await search_users(session, "Java пишу", limit=10)
+    assert count == 0
+
+
+def test_build_fts_query():
+    assert build_fts_query('kafka "OR" sber-pay*') == (
+        '"kafka"* "OR"* "sber"* "pay"*'
+    )
+    assert build_fts_query(" -- ") is None
@@ -0,0 +1,75 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
+
+from bot.cache import user_status_cache
+from bot.utils import UserStatus, add_user, get_user_status, update_user
+from database.models import Base, User
+
+USER_FIELDS = {
+    "username": "user",
+    "sber_id": "sber",
+    "school21_nickname": "nick",
+    "team_name": "team",
+    "role": "DevOps",
+    "level_id": 1,
+    "description": "description",
+    "field_not_filled": None,
+}
+
+
+@pytest_asyncio.fixture
+async def session(tmp_path):
+    """Сессия к временной БД со схемой бота."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    user_status_cache.clear()
+    async with session_maker() as session:
+        yield session
+    user_status_cache.clear()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_user_status_unknown_user(session):
+    """Для незнакомого пользователя все флаги ложные."""
+    status = await get_user_status(session, 1)
+
+    assert status == UserStatus(
+        is_registered=False, is_admin=False, exists=False
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_user_status_cached(session, mocker):
+    """Повторный запрос статуса берется из кэша без обращения к БД."""
+    session.add(User(telegram_id=1, username="user", is_admin=True))
+    await session.commit()
+    execute = mocker.spy(session, "execute")
+
+    first = await get_user_status(session, 1)
+    second = await get_user_status(session, 1)
+
+    assert first == UserStatus(
+        is_registered=False, is_admin=True, exists=True
+    )
+    assert second == first
+    assert execute.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_status(session):
+    """Изменение пользователя сбрасывает закэшированный статус."""
+    await add_user(
+        session, telegram_id=1, is_registered=False, **USER_FIELDS
+    )
+    assert not (await get_user_status(session, 1)).is_registered
+
+    await update_user(
+        session, telegram_id=1, is_registered=True, **USER_FIELDS
+    )
+
+    assert (await get_user_status(session, 1)).is_registered
@@ -0,0 +1,127 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.webhook import check_webhook_config, create_webhook_app, run_webhook
+from logger.logmessages import LogMessage
+
+SECRET = "test_secret"
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def recorded_update(update_id, text):
+    """Апдейт с текстовым сообщением в формате Bot API."""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1729152000,
+            "chat": {"id": 1, "type": "private", "username": "test_user"},
+            "from": {
+                "id": 1,
+                "is_bot": False,
+                "first_name": "Test",
+                "username": "test_user",
+            },
+            "text": text,
+        },
+    }
+
+
+@pytest_asyncio.fixture
+async def webhook():
+    """Локальный вебхук-сервер с обработчиком, который ждет сигнала."""
+    handled = []
+    release = asyncio.Event()
+    router = Router()
+
+    @router.message()
+    async def handler(message: Message):
+        await release.wait()
+        handled.append(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    app = create_webhook_app(dp, Bot("42:TEST"), SECRET)
+    async with TestClient(TestServer(app)) as client:
+        yield client, handled, release
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_wrong_secret(webhook):
+    """Апдейт без верного секрета не попадает в диспетчер."""
+    client, handled, release = webhook
+    release.set()
+
+    response = await client.post(
+        "/webhook",
+        json=recorded_update(1, "/start"),
+        headers={SECRET_HEADER: "wrong"},
+    )
+    await asyncio.sleep(0.05)
+
+    assert response.status == 401
+    assert handled == []
+
+
+@pytest.mark.asyncio
+async def test_webhook_handles_updates_in_background(webhook):
+    """Telegram получает ответ сразу, обработка идет в фоне."""
+    client, handled, release = webhook
+    updates = [recorded_update(1, "/start"), recorded_update(2, "/search")]
+
+    for update in updates:
+        response = await asyncio.wait_for(
+            client.post(
+                "/webhook", json=update, headers={SECRET_HEADER: SECRET}
+            ),
+            timeout=1,
+        )
+        assert response.status == 200
+    assert handled == []
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert sorted(handled) == ["/search", "/start"]
+
+
+@pytest.mark.parametrize(
+    "base_url, secret, expected",
+    [
+        ("https://bot.example.com/", None, None),
+        ("https://bot.example.com", "Secret_1-2", None),
+        (None, None, LogMessage.WEBHOOK_NO_BASE_URL),
+        ("", "secret", LogMessage.WEBHOOK_NO_BASE_URL),
+        (
+            "http://bot.example.com",
+            None,
+            LogMessage.WEBHOOK_NOT_HTTPS.format("http://bot.example.com"),
+        ),
+        ("https://bot.example.com", "bad secret!", LogMessage.WEBHOOK_BAD_SECRET),
+        ("https://bot.example.com", "s" * 257, LogMessage.WEBHOOK_BAD_SECRET),
+    ]
+)
+def test_check_webhook_config(base_url, secret, expected):
+    assert check_webhook_config(base_url, secret) == expected
+
+
+@pytest.mark.asyncio
+async def test_run_webhook_without_base_url(mocker):
+    """Без WEBHOOK_BASE_URL сервер не запускается, ошибка в логе."""
+    mocker.patch("bot.webhook.WEBHOOK_BASE_URL", None)
+    error = mocker.patch("bot.webhook.webhook_logger.error")
+    app = mocker.patch("bot.webhook.create_webhook_app")
+    bot = AsyncMock()
+
+    await run_webhook(Dispatcher(), bot)
+
+    error.assert_called_once_with(LogMessage.WEBHOOK_CONFIG_ERROR.format(
+        LogMessage.WEBHOOK_NO_BASE_URL
+    ))
+    app.assert_not_called()
+    bot.set_webhook.assert_not_called()